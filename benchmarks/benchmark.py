@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+# -*- coding: utf8 -*-
+"""
+Benchmarks of the driver against the emulated reader and cards
+
+Reports I2C transactions, polls of the interrupt request bits and wall time
+of the basic commands and of full card dumps. Every run is appended to
+history.jsonl and compared with the previous run, more transactions or
+polls, or a slower wall time beyond the tolerance, are regressions.
+"""
+
+__author__ = "Christoph Pranzl"
+__version__ = "0.0.5"
+__license__ = "GPLv3"
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+from mfrc522_i2c import MFRC522, Metrics
+from mfrc522_i2c.emulator import EmulatedI2CDev, EmulatedMFRC522
+from mfrc522_i2c.emulator import EmulatedSMBus, MifareClassic
+from mfrc522_i2c.transport import I2CDevTransport
+
+HISTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                       'history.jsonl')
+
+ADDRESS = 0x28
+UID = [0xDE, 0xAD, 0xBE, 0xEF]
+DATA = list(range(16))
+
+
+def _smbus(device):
+    """ Returns the counting adapter and the Bus of an emulated SMBus """
+    bus = EmulatedSMBus()
+    bus.attach(ADDRESS, device)
+    return (bus, bus)
+
+
+def _i2cdev(device):
+    """ Returns the counting adapter and the Bus of an emulated i2c-dev
+
+    Transactions are the ioctl system calls
+    """
+    adapter = EmulatedI2CDev()
+    adapter.attach(ADDRESS, device)
+    return (adapter, I2CDevTransport(fd=0, ioctl=adapter.ioctl))
+
+
+# Reader configurations, adapter and keyword arguments of MFRC522
+CONFIGURATIONS = {
+    'default': (_smbus, {}),
+    'registerCache': (_smbus, {'registerCache': True}),
+    'i2cdev': (_i2cdev, {}),
+}
+
+
+class Bench:
+    """ Reader on an emulated bus with one card in the field """
+
+    def __init__(self, size, configuration):
+        (adapter, kwargs) = configuration
+        self.card = MifareClassic(UID, size)
+        (self.bus, Bus) = adapter(EmulatedMFRC522([self.card]))
+        self.metrics = Metrics()
+        self.reader = MFRC522(Bus, ADDRESS, metrics=self.metrics, **kwargs)
+
+    def polls(self):
+        """ Returns the number of interrupt request polls so far """
+        counters = self.metrics.snapshot()['counters']
+        return (sum(sample['value']
+                    for sample in counters.get('wait_polls', [])))
+
+    def idle(self):
+        """ Puts the card back into the IDLE state """
+        self.reader.deauthenticate()
+        self.card.idle()
+        self.card.halted = False
+        self.card.state = self.card.IDLE
+
+    def selected(self):
+        """ Puts the card into the ACTIVE state """
+        self.idle()
+        self.reader.scan()
+        self.reader.anticollision()
+
+    def authenticated(self):
+        """ Selects the card and authenticates sector 1 """
+        self.selected()
+        self.reader.authenticate(MFRC522.MIFARE_AUTHKEY1, 7,
+                                 MFRC522.MIFARE_KEY, UID)
+
+
+def _identify(bench):
+    bench.idle()
+    bench.reader.scan()
+
+
+def _select(bench):
+    _identify(bench)
+    (status, frame, backBits) = bench.reader.identify()
+    return (frame)
+
+
+# Name, card size, preparation and measured operation
+BENCHMARKS = [
+    ('scan', 1024, lambda bench: bench.idle(),
+     lambda bench, state: bench.reader.scan()),
+    ('identify', 1024, _identify,
+     lambda bench, state: bench.reader.identify()),
+    ('select', 1024, _select,
+     lambda bench, state: bench.reader.select(state)),
+    ('authenticate', 1024, lambda bench: bench.selected(),
+     lambda bench, state: bench.reader.authenticate(
+         MFRC522.MIFARE_AUTHKEY1, 7, MFRC522.MIFARE_KEY, UID)),
+    ('read', 1024, lambda bench: bench.authenticated(),
+     lambda bench, state: bench.reader.read(5)),
+    ('write', 1024, lambda bench: bench.authenticated(),
+     lambda bench, state: bench.reader.write(5, DATA)),
+    ('dump1K', 1024, lambda bench: bench.selected(),
+     lambda bench, state: bench.reader.read_card(MFRC522.MIFARE_KEY)),
+    ('dump4K', 4096, lambda bench: bench.selected(),
+     lambda bench, state: bench.reader.read_card(MFRC522.MIFARE_KEY)),
+]
+
+
+def run(repeat):
+    """ Runs all benchmarks in all configurations """
+    results = {}
+    for configuration in CONFIGURATIONS:
+        for (name, size, prepare, operation) in BENCHMARKS:
+            bench = Bench(size, CONFIGURATIONS[configuration])
+            transactions = []
+            polls = []
+            times = []
+            for i in range(repeat):
+                state = prepare(bench)
+                startTransactions = bench.bus.transactions
+                startPolls = bench.polls()
+                start = time.perf_counter()
+                operation(bench, state)
+                times.append(time.perf_counter() - start)
+                transactions.append(bench.bus.transactions -
+                                    startTransactions)
+                polls.append(bench.polls() - startPolls)
+
+            results[f'{configuration}/{name}'] = {
+                'transactions': max(transactions),
+                'polls': max(polls),
+                'microseconds': round(statistics.median(times) * 1e6, 1),
+            }
+    return (results)
+
+
+def revision():
+    """ Returns the current git revision, -dirty with local changes """
+    try:
+        return (subprocess.run(['git', 'describe', '--always', '--dirty'],
+                               capture_output=True, text=True, check=True,
+                               cwd=os.path.dirname(HISTORY)).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return (None)
+
+
+def history():
+    """ Returns all recorded runs, oldest first """
+    runs = []
+    if (os.path.exists(HISTORY)):
+        with open(HISTORY) as file:
+            for line in file:
+                if (line.strip()):
+                    runs.append(json.loads(line))
+    return (runs)
+
+
+def compare(previous, results, tolerance):
+    """ Returns the regressions of results against a previous run """
+    regressions = []
+    for name in results:
+        if (name not in previous['results']):
+            continue
+        before = previous['results'][name]
+        after = results[name]
+        for metric in ('transactions', 'polls'):
+            if (after[metric] > before[metric]):
+                regressions.append(f'{name}: {metric} {before[metric]} -> '
+                                   f'{after[metric]}')
+        if (after['microseconds'] >
+                before['microseconds'] * (1 + tolerance)):
+            regressions.append(f'{name}: microseconds '
+                               f'{before["microseconds"]} -> '
+                               f'{after["microseconds"]}')
+    return (regressions)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('--repeat', type=int, default=20,
+                        help='runs per benchmark (default: 20)')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='accepted wall time increase (default: 0.25)')
+    parser.add_argument('--no-save', action='store_true',
+                        help='do not append the run to the history')
+    parser.add_argument('--check', action='store_true',
+                        help='exit with status 1 on regressions')
+    args = parser.parse_args()
+
+    results = run(args.repeat)
+
+    print(f'{"benchmark":<28}{"transactions":>14}{"polls":>8}'
+          f'{"microseconds":>14}')
+    for name in results:
+        result = results[name]
+        print(f'{name:<28}{result["transactions"]:>14}'
+              f'{result["polls"]:>8}{result["microseconds"]:>14}')
+
+    runs = history()
+    regressions = []
+    if (len(runs) > 0):
+        previous = runs[-1]
+        regressions = compare(previous, results, args.tolerance)
+        print(f'\nCompared with {previous["revision"]} of '
+              f'{previous["timestamp"]}:')
+        for regression in regressions:
+            print(f'  regression {regression}')
+        if (len(regressions) == 0):
+            print('  no regressions')
+
+    if (not args.no_save):
+        entry = {'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                 'revision': revision(),
+                 'python': platform.python_version(),
+                 'results': results}
+        with open(HISTORY, 'a') as file:
+            file.write(json.dumps(entry, sort_keys=True) + '\n')
+
+    if (args.check and (len(regressions) > 0)):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -8,7 +8,7 @@ __author__ = "Christoph Pranzl"
 __version__ = "0.0.5"
 __license__ = "GPLv3"
 
-from mfrc522_i2c import MFRC522
+from mfrc522_i2c import MFRC522, PollScheduler
 import signal
 
 
@@ -32,54 +32,53 @@ i2cAddress = 0x28
 # Create an object of the class MFRC522
 MFRC522Reader = MFRC522(i2cBus, i2cAddress)
 
+# Poll fast while cards are presented, slowly while the field is empty
+scheduler = PollScheduler(MFRC522Reader)
+
 version = MFRC522Reader.getReaderVersion()
 print(f'MFRC522 Software Version: {version}')
 
 while continue_reading:
     # Scan for cards
-    (status, backData, tagType) = MFRC522Reader.scan()
+    (status, backData, tagType) = scheduler.scan()
     if status == MFRC522Reader.MIFARE_OK:
         print(f'Card detected, Type: {tagType}')
 
-        # Get UID of the card
-        (status, uid, backBits) = MFRC522Reader.identify()
+        # Get the complete UID of the card and select it
+        (status, uid, sak) = MFRC522Reader.anticollision()
         if status == MFRC522Reader.MIFARE_OK:
             print('Card identified, UID: ', end='')
             for i in range(0, len(uid) - 1):
                 print(f'{uid[i]:02x}:', end='')
             print(f'{uid[len(uid) - 1]:02x}')
 
-            # Select the scanned card
-            (status, backData, backBits) = MFRC522Reader.select(uid)
-            if status == MFRC522Reader.MIFARE_OK:
-                print('Card selected')
-
-                # TODO: Determine 1K or 4K
-
-                # Authenticate
-                for blockAddr in MFRC522Reader.MIFARE_1K_DATABLOCK:
-                    (status, backData, backBits) = MFRC522Reader.authenticate(
-                        MFRC522Reader.MIFARE_AUTHKEY1,
-                        blockAddr,
-                        MFRC522Reader.MIFARE_KEY,
-                        uid)
-                    if (status == MFRC522Reader.MIFARE_OK):
-
-                        (status, backData, backBits) = MFRC522Reader.read(
-                            blockAddr)
-                        if (status == MFRC522Reader.MIFARE_OK):
-                            print(f'Block {blockAddr:02d} : ', end='')
-                            for i in range(0, len(backData)):
-                                print(f'{backData[i]:02x} ', end='')
-                            print('read')
-
-                        else:
-                            print('Error while reading')
-
-                        continue_reading = False
+            print('Card selected')
+
+            # Card type determined from ATQA and SAK
+            print(f'Card type: {MFRC522Reader.cardType}')
+
+            # Only MIFARE Classic cards are organized in sectors
+            if ((MFRC522Reader.cardType is None) or
+                    (not MFRC522Reader.cardType.classic)):
+                print('Not a MIFARE Classic card')
+            else:
+                # Authenticate once per sector and read all of its blocks
+                (status, data, blockStatus) = MFRC522Reader.read_card(
+                    MFRC522Reader.MIFARE_KEY)
+                for blockAddr in MFRC522Reader.layout().dataBlocks:
+                    if (blockStatus.get(blockAddr) == MFRC522Reader.MIFARE_OK):
+                        offset = blockAddr * MFRC522Reader.MIFARE_BLOCKSIZE
+                        print(f'Block {blockAddr:02d} : ', end='')
+                        for i in range(offset,
+                                       offset +
+                                       MFRC522Reader.MIFARE_BLOCKSIZE):
+                            print(f'{data[i]:02x} ', end='')
+                        print('read')
 
                     else:
-                        print('Authentication error')
+                        print(f'Error while reading block {blockAddr:02d}')
+
+                continue_reading = False
 
                 # Deauthenticate
                 MFRC522Reader.deauthenticate()
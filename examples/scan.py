@@ -8,7 +8,7 @@ __author__ = "Christoph Pranzl"
 __version__ = "0.0.5"
 __license__ = "GPLv3"
 
-from mfrc522_i2c import MFRC522
+from mfrc522_i2c import MFRC522, PollScheduler
 import signal
 
 continue_reading = True
@@ -31,19 +31,26 @@ i2cAddress = 0x28
 # Create an object of the class MFRC522
 MFRC522Reader = MFRC522(i2cBus, i2cAddress)
 
+# Poll fast while cards are presented, slowly and with the antenna switched
+# off between polls while the field is empty
+scheduler = PollScheduler(MFRC522Reader, antennaOff=True)
+
 version = MFRC522Reader.getReaderVersion()
 print(f'MFRC522 Software Version: {version}')
 
 while continue_reading:
     # Scan for cards
-    (status, backData, tagType) = MFRC522Reader.scan()
+    (status, backData, tagType) = scheduler.scan()
     if status == MFRC522Reader.MIFARE_OK:
         print(f'Card detected, Type: {tagType}')
 
-        # Get UID of the card
-        (status, uid, backBits) = MFRC522Reader.identify()
+        # Get the complete UID of the card and select it
+        (status, uid, sak) = MFRC522Reader.anticollision()
         if status == MFRC522Reader.MIFARE_OK:
             print('Card identified, UID: ', end='')
             for i in range(0, len(uid) - 1):
                 print(f'{uid[i]:02x}:', end='')
             print(f'{uid[len(uid) - 1]:02x}')
+
+# Leave the antenna activated
+scheduler.close()
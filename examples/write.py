@@ -8,7 +8,7 @@ __author__ = "Christoph Pranzl"
 __version__ = "0.0.5"
 __license__ = "GPLv3"
 
-from mfrc522_i2c import MFRC522
+from mfrc522_i2c import MFRC522, PollScheduler
 import signal
 import random
 
@@ -40,83 +40,84 @@ i2cAddress = 0x28
 # Create an object of the class MFRC522
 MFRC522Reader = MFRC522(i2cBus, i2cAddress)
 
+# Poll fast while cards are presented, slowly while the field is empty
+scheduler = PollScheduler(MFRC522Reader)
+
 version = MFRC522Reader.getReaderVersion()
 print(f'MFRC522 Software Version: {version}')
 
 while continue_reading:
     # Scan for cards
-    (status, backData, tagType) = MFRC522Reader.scan()
+    (status, backData, tagType) = scheduler.scan()
     if status == MFRC522Reader.MIFARE_OK:
         print(f'Card detected, Type: {tagType}')
 
-        # Get UID of the card
-        (status, uid, backBits) = MFRC522Reader.identify()
+        # Get the complete UID of the card and select it
+        (status, uid, sak) = MFRC522Reader.anticollision()
         if status == MFRC522Reader.MIFARE_OK:
             print('Card identified, UID: ', end='')
             for i in range(0, len(uid) - 1):
                 print(f'{uid[i]:02x}:', end='')
             print(f'{uid[len(uid) - 1]:02x}')
 
-            # Select the scanned card
-            (status, backData, backBits) = MFRC522Reader.select(uid)
-            if status == MFRC522Reader.MIFARE_OK:
-                print('Card selected')
+            print('Card selected')
+
+            # Card type determined from ATQA and SAK
+            print(f'Card type: {MFRC522Reader.cardType}')
 
-                # TODO: Determine 1K or 4K
+            # Authenticate
+            blockAddr = 8
+            (status, backData, backBits) = MFRC522Reader.authenticate(
+                MFRC522Reader.MIFARE_AUTHKEY1,
+                blockAddr,
+                MFRC522Reader.MIFARE_KEY,
+                uid)
+            if (status == MFRC522Reader.MIFARE_OK):
+                print('Card authenticated')
+
+                # Read old data from card
+                (status, backData, backBits) = MFRC522Reader.read(
+                    blockAddr)
 
-                # Authenticate
-                blockAddr = 8
-                (status, backData, backBits) = MFRC522Reader.authenticate(
-                    MFRC522Reader.MIFARE_AUTHKEY1,
-                    blockAddr,
-                    MFRC522Reader.MIFARE_KEY,
-                    uid)
                 if (status == MFRC522Reader.MIFARE_OK):
-                    print('Card authenticated')
+                    print(f'Block {blockAddr:02} : ', end='')
+                    for i in range(0, len(backData)):
+                        print(f'{backData[i]:02x} ', end='')
+                    print('read')
+
+                    # Write new data to card
+                    data = random_data()
 
-                    # Read old data from card
-                    (status, backData, backBits) = MFRC522Reader.read(
-                        blockAddr)
+                    (status, backData, backBits) = MFRC522Reader.write(
+                        blockAddr,
+                        data)
 
                     if (status == MFRC522Reader.MIFARE_OK):
                         print(f'Block {blockAddr:02} : ', end='')
-                        for i in range(0, len(backData)):
-                            print(f'{backData[i]:02x} ', end='')
-                        print('read')
+                        for i in range(0, len(data)):
+                            print(f'{data[i]:02x} ', end='')
+                        print('written')
 
-                        # Write new data to card
-                        data = random_data()
-
-                        (status, backData, backBits) = MFRC522Reader.write(
-                            blockAddr,
-                            data)
+                        # Read new data from card
+                        (status, backData, backBits) = MFRC522Reader.read(
+                            blockAddr)
 
                         if (status == MFRC522Reader.MIFARE_OK):
                             print(f'Block {blockAddr:02} : ', end='')
-                            for i in range(0, len(data)):
-                                print(f'{data[i]:02x} ', end='')
-                            print('written')
-
-                            # Read new data from card
-                            (status, backData, backBits) = MFRC522Reader.read(
-                                blockAddr)
-
-                            if (status == MFRC522Reader.MIFARE_OK):
-                                print(f'Block {blockAddr:02} : ', end='')
-                                for i in range(0, len(backData)):
-                                    print(f'{backData[i]:02x} ', end='')
-                                print('read')
-
-                                continue_reading = False
-                            else:
-                                print('Error while reading new data')
+                            for i in range(0, len(backData)):
+                                print(f'{backData[i]:02x} ', end='')
+                            print('read')
+
+                            continue_reading = False
                         else:
-                            print('Error while writing new data')
+                            print('Error while reading new data')
                     else:
-                        print('Error while reading old data')
-
-                    # Deauthenticate
-                    MFRC522Reader.deauthenticate()
-                    print('Card deauthenticated')
+                        print('Error while writing new data')
                 else:
-                    print('Authentication error')
+                    print('Error while reading old data')
+
+                # Deauthenticate
+                MFRC522Reader.deauthenticate()
+                print('Card deauthenticated')
+            else:
+                print('Authentication error')
@@ -1,4 +1,17 @@
 #!/usr/bin/env python3
 # -*- coding: utf8 -*-
 
-from .mfrc522_i2c import MFRC522
\ No newline at end of file
+from .mfrc522_i2c import MFRC522
+from .bus import SharedBus, openBus
+from .transport import Transport, SMBusTransport, SMBus2Transport
+from .transport import FakeTransport, I2CDevTransport
+from .gpio import GPIOInterrupt
+from .cardtypes import CardType, MemoryLayout, classify
+from .events import PresenceTracker, TagArrived, TagLeft
+from .authenticator import KeyAuthenticator
+from .cache import BlockCache
+from .ndef import Ndef, NdefRecord
+from .metrics import Metrics
+from .scheduler import PollScheduler
+from .aio import AsyncMFRC522, busExecutor, closeBusExecutor
+from .group import ReaderGroup, TagRead
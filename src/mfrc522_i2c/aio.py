@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+# -*- coding: utf8 -*-
+"""
+asyncio front-end of the MFRC522 RFID reader/writer I2C driver
+"""
+
+__author__ = "Christoph Pranzl"
+__version__ = "0.0.5"
+__license__ = "GPLv3"
+
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .bus import _keyOf
+from .mfrc522_i2c import MFRC522
+
+
+# One worker thread per I2C bus, transactions on a bus are serialized. The
+# executors are keyed like the shared handles of the adapters.
+_busExecutors = {}
+_busExecutorsLock = threading.Lock()
+
+
+def busExecutor(Bus):
+    """ Returns the executor that performs all I/O on an I2C bus """
+    key = _keyOf(Bus)
+    with _busExecutorsLock:
+        if (key not in _busExecutors):
+            _busExecutors[key] = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix=f'mfrc522_i2c-{key}')
+        return (_busExecutors[key])
+
+
+def closeBusExecutor(Bus=None, wait=True):
+    """ Shuts down the executor of an I2C bus or all of them
+
+    Calls already submitted are completed, a later busExecutor() starts a
+    new worker
+    """
+    with _busExecutorsLock:
+        if (Bus is None):
+            executors = list(_busExecutors.values())
+            _busExecutors.clear()
+        else:
+            executors = [_busExecutors.pop(_keyOf(Bus), None)]
+
+    for executor in executors:
+        if (executor is not None):
+            executor.shutdown(wait=wait)
+
+
+class AsyncMFRC522:
+    """ Awaitable wrapper of an MFRC522
+
+    Every call is executed by the worker thread of the reader's bus. The
+    driver sleeps there while the card is busy, the event loop only awaits
+    the result and stays free for other tasks.
+    """
+
+    def __init__(self, reader, executor):
+        self.reader = reader
+        self.executor = executor
+
+    @classmethod
+    async def open(cls, Bus, Address, **kwargs):
+        """ Creates and initializes a reader on the worker of its bus """
+        executor = busExecutor(Bus)
+        loop = asyncio.get_event_loop()
+        reader = await loop.run_in_executor(
+            executor, functools.partial(MFRC522, Bus, Address, **kwargs))
+        return (cls(reader, executor))
+
+    async def close(self):
+        """ Closes the reader, the worker of its bus ends with the last """
+        sharedBus = self.reader.i2cBus
+        await self.__run(self.reader.close)
+        if ((sharedBus is not None) and (sharedBus.references <= 0)):
+            closeBusExecutor(sharedBus.bus, wait=False)
+
+    async def __aenter__(self):
+        return (self)
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def __run(self, method, *args, **kwargs):
+        """ Runs a method of the reader on the worker of its bus """
+        loop = asyncio.get_event_loop()
+        return (await loop.run_in_executor(
+            self.executor, functools.partial(method, *args, **kwargs)))
+
+    async def getReaderVersion(self):
+        """ Retrieves the version of the reader/writer """
+        return (await self.__run(self.reader.getReaderVersion))
+
+    async def scan(self):
+        """ Scans for a card """
+        return (await self.__run(self.reader.scan))
+
+    async def waitForCard(self, interval=0.1, timeout=None):
+        """ Scans until a card answers, sleeping between the scans
+
+        Returns the result of the successful scan or None if the timeout
+        in seconds expired first
+        """
+        loop = asyncio.get_event_loop()
+        if (timeout is not None):
+            deadline = loop.time() + timeout
+
+        while True:
+            (status, backData, backBits) = await self.scan()
+            if (status == self.reader.MIFARE_OK):
+                return ((status, backData, backBits))
+            if ((timeout is not None) and
+                    (loop.time() + interval > deadline)):
+                return (None)
+            await asyncio.sleep(interval)
+
+    async def wakeup(self):
+        """ Wakes up cards in the field, including halted ones """
+        return (await self.__run(self.reader.wakeup))
+
+    async def identify(self):
+        """ Receives the serial number of the card """
+        return (await self.__run(self.reader.identify))
+
+    async def anticollision(self):
+        """ Resolves and selects the complete UID of one card """
+        return (await self.__run(self.reader.anticollision))
+
+    async def inventory(self, maxTags=16):
+        """ Enumerates all cards in the field """
+        return (await self.__run(self.reader.inventory, maxTags))
+
+    async def select(self, serialNumber):
+        """ Selects a card with a given serial number """
+        return (await self.__run(self.reader.select, serialNumber))
+
+    async def is_present(self, uid):
+        """ Checks if a card is still in the field """
+        return (await self.__run(self.reader.is_present, uid))
+
+    async def halt(self):
+        """ Puts the selected card into the HALT state """
+        return (await self.__run(self.reader.halt))
+
+    async def authenticate(self, mode, blockAddr, key, serialNumber):
+        """ Authenticates the card """
+        return (await self.__run(self.reader.authenticate, mode, blockAddr,
+                                 key, serialNumber))
+
+    async def deauthenticate(self):
+        """ Deauthenticates the card """
+        return (await self.__run(self.reader.deauthenticate))
+
+    async def antennaOn(self):
+        """ Activates the reader/writer antenna """
+        return (await self.__run(self.reader.antennaOn))
+
+    async def antennaOff(self):
+        """ Deactivates the reader/writer antenna """
+        return (await self.__run(self.reader.antennaOff))
+
+    async def read(self, blockAddr):
+        """ Reads data from the card """
+        return (await self.__run(self.reader.read, blockAddr))
+
+    async def write(self, blockAddr, data):
+        """ Writes data to the card """
+        return (await self.__run(self.reader.write, blockAddr, data))
+
+    async def read_sector(self, sector, key, keyType=MFRC522.MIFARE_AUTHKEY1,
+                          serialNumber=None):
+        """ Reads all blocks of a sector with a single authentication """
+        return (await self.__run(self.reader.read_sector, sector, key,
+                                 keyType, serialNumber))
+
+    async def read_card(self, keys, keyType=MFRC522.MIFARE_AUTHKEY1,
+                        serialNumber=None, sectorCount=None):
+        """ Reads all sectors of the card """
+        return (await self.__run(self.reader.read_card, keys, keyType,
+                                 serialNumber, sectorCount))
+
+    async def write_blocks(self, blocks, key, keyType=MFRC522.MIFARE_AUTHKEY1,
+                           serialNumber=None, allowTrailer=False,
+                           allowManufacturer=False):
+        """ Writes several blocks with a single authentication per sector """
+        return (await self.__run(self.reader.write_blocks, blocks, key,
+                                 keyType, serialNumber, allowTrailer,
+                                 allowManufacturer))
+
+    async def write_sector(self, sector, data, key,
+                           keyType=MFRC522.MIFARE_AUTHKEY1,
+                           serialNumber=None, allowTrailer=False,
+                           allowManufacturer=False):
+        """ Writes contiguous data to the blocks of a sector """
+        return (await self.__run(self.reader.write_sector, sector, data, key,
+                                 keyType, serialNumber, allowTrailer,
+                                 allowManufacturer))
+
+    async def ntag_get_version(self):
+        """ Retrieves product type and memory size of an Ultralight/NTAG """
+        return (await self.__run(self.reader.ntag_get_version))
+
+    async def ntag_read(self, page):
+        """ Reads 4 pages starting at page """
+        return (await self.__run(self.reader.ntag_read, page))
+
+    async def ntag_fast_read(self, startPage=0, endPage=None):
+        """ Reads a range of pages with as few FAST_READs as possible """
+        return (await self.__run(self.reader.ntag_fast_read, startPage,
+                                 endPage))
+
+    async def ntag_write(self, page, data):
+        """ Writes 4 bytes to a page """
+        return (await self.__run(self.reader.ntag_write, page, data))
+
+    async def ntag_compat_write(self, page, data):
+        """ Writes 4 bytes to a page with the MIFARE Classic WRITE frame """
+        return (await self.__run(self.reader.ntag_compat_write, page, data))
+
+    async def ntag_pwd_auth(self, password):
+        """ Authenticates with the 4 byte password """
+        return (await self.__run(self.reader.ntag_pwd_auth, password))
+
+    async def format_value_block(self, blockAddr, value, address=None):
+        """ Writes a value block """
+        return (await self.__run(self.reader.format_value_block, blockAddr,
+                                 value, address))
+
+    async def read_value(self, blockAddr):
+        """ Reads a value block """
+        return (await self.__run(self.reader.read_value, blockAddr))
+
+    async def increment(self, blockAddr, delta):
+        """ Adds delta to a value block """
+        return (await self.__run(self.reader.increment, blockAddr, delta))
+
+    async def decrement(self, blockAddr, delta):
+        """ Subtracts delta from a value block """
+        return (await self.__run(self.reader.decrement, blockAddr, delta))
+
+    async def restore(self, blockAddr):
+        """ Copies a value block """
+        return (await self.__run(self.reader.restore, blockAddr))
+
+    async def transfer(self, blockAddr):
+        """ Writes the result of the last value operation to a block """
+        return (await self.__run(self.reader.transfer, blockAddr))
+
+    async def decrement_transfer(self, blockAddr, delta, targetAddr=None,
+                                 key=None, keyType=MFRC522.MIFARE_AUTHKEY1,
+                                 serialNumber=None):
+        """ Decrements a value block and transfers the result at once """
+        return (await self.__run(self.reader.decrement_transfer, blockAddr,
+                                 delta, targetAddr, key, keyType,
+                                 serialNumber))
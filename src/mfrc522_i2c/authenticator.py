@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+# -*- coding: utf8 -*-
+"""
+MIFARE Classic authentication with a dictionary of candidate keys
+"""
+
+__author__ = "Christoph Pranzl"
+__version__ = "0.0.5"
+__license__ = "GPLv3"
+
+from collections import OrderedDict
+
+from .mfrc522_i2c import MFRC522
+
+
+class KeyAuthenticator:
+    """ Tries a set of keys per sector and remembers the one that worked
+
+    The key that authenticated a sector is kept per UID and per card type
+    in two LRU caches of at most maxEntries entries each. The next
+    authentication of the same card, or of another card of the same type,
+    tries that key first. Failed authentications are rare then and so
+    are the reselects they force.
+    """
+
+    def __init__(self, reader, keysA=(MFRC522.MIFARE_KEY,), keysB=(),
+                 maxEntries=256):
+        self.reader = reader
+        # Candidates in the order they are tried, key A before key B
+        self.candidates = ([(MFRC522.MIFARE_AUTHKEY1, list(key))
+                            for key in keysA] +
+                           [(MFRC522.MIFARE_AUTHKEY2, list(key))
+                            for key in keysB])
+        self.maxEntries = maxEntries
+        # Key type and key by (UID, sector) and by (card type, sector)
+        self.__uidKeys = OrderedDict()
+        self.__typeKeys = OrderedDict()
+        # Successful authentications with a cached key, and failed ones
+        self.hits = 0
+        self.failures = 0
+
+    def __layout(self):
+        return (self.reader.layout())
+
+    def __remember(self, cache, entry, keyType, key):
+        """ Stores a key as most recently used, evicts the oldest """
+        cache[entry] = (keyType, key)
+        cache.move_to_end(entry)
+        while (len(cache) > self.maxEntries):
+            cache.popitem(last=False)
+
+    def __cached(self, serialNumber, sector, keyType):
+        """ Returns the cached keys of a sector, best guess first """
+        cached = []
+        for (cache, entry) in ((self.__uidKeys,
+                                (tuple(serialNumber), sector)),
+                               (self.__typeKeys,
+                                (self.reader.cardType, sector))):
+            if (entry in cache):
+                cache.move_to_end(entry)
+                candidate = cache[entry]
+                if (((keyType is None) or (candidate[0] == keyType)) and
+                        (candidate not in cached)):
+                    cached.append(candidate)
+        return (cached)
+
+    def forget(self, serialNumber=None):
+        """ Discards the cached keys of a card or of all cards """
+        if (serialNumber is None):
+            self.__uidKeys.clear()
+            self.__typeKeys.clear()
+            return
+
+        serialNumber = tuple(serialNumber)
+        for entry in list(self.__uidKeys):
+            if (entry[0] == serialNumber):
+                del self.__uidKeys[entry]
+
+    def keyOf(self, sector, serialNumber=None):
+        """ Returns key type and key known for a sector of a card or None """
+        if (serialNumber is None):
+            serialNumber = self.reader.serialNumber
+        return (self.__uidKeys.get((tuple(serialNumber), sector)))
+
+    def authenticate(self, blockAddr, serialNumber=None, keyType=None):
+        """ Authenticates a block with the first key that works
+
+        Cached keys are tried before the candidates, keyType restricts
+        the candidates to key A or key B. Returns the status, the key type
+        and the key, the card is left authenticated on success.
+        """
+        reader = self.reader
+        if (serialNumber is None):
+            serialNumber = reader.serialNumber
+        sector = self.__layout().sectorOfBlock(blockAddr)
+
+        cached = self.__cached(serialNumber, sector, keyType)
+        candidates = cached + [candidate for candidate in self.candidates
+                               if (((keyType is None) or
+                                    (candidate[0] == keyType)) and
+                                   (candidate not in cached))]
+
+        status = reader.MIFARE_ERR
+        for (candidateType, key) in candidates:
+            (status, backData, backBits) = reader.authenticate(
+                candidateType, blockAddr, key, serialNumber)
+            if (status == reader.MIFARE_OK):
+                if ((candidateType, key) in cached):
+                    self.hits = self.hits + 1
+                self.__remember(self.__uidKeys,
+                                (tuple(serialNumber), sector),
+                                candidateType, key)
+                self.__remember(self.__typeKeys,
+                                (reader.cardType, sector),
+                                candidateType, key)
+                return (status, candidateType, key)
+
+            self.failures = self.failures + 1
+            # A failed authentication halts the card
+            if (not self.__reselect(serialNumber)):
+                break
+
+        # Nothing worked, drop the stale entry of this card
+        self.__uidKeys.pop((tuple(serialNumber), sector), None)
+
+        return (status, None, None)
+
+    def __reselect(self, serialNumber):
+        """ Brings the card back to the selected state """
+        reader = self.reader
+        reader.deauthenticate()
+
+        (status, backData, backBits) = reader.wakeup()
+        if (status == reader.MIFARE_OK):
+            (status, backData, backBits) = reader.select(serialNumber)
+
+        return (status == reader.MIFARE_OK)
+
+    def read_sector(self, sector, serialNumber=None, keyType=None):
+        """ Reads all blocks of a sector with the key that works
+
+        Returns the status, the content of the sector and the status of
+        every block like MFRC522.read_sector()
+        """
+        reader = self.reader
+        if (serialNumber is None):
+            serialNumber = reader.serialNumber
+
+        known = self.keyOf(sector, serialNumber)
+        if ((known is not None) and
+                ((keyType is None) or (known[0] == keyType))):
+            (status, data, blockStatus) = reader.read_sector(
+                sector, known[1], known[0], serialNumber)
+            if (reader.MIFARE_OK in blockStatus.values()):
+                self.hits = self.hits + 1
+                return (status, data, blockStatus)
+            # The key has been changed, do not try it again
+            self.failures = self.failures + 1
+            self.__uidKeys.pop((tuple(serialNumber), sector), None)
+            if (self.__typeKeys.get((reader.cardType, sector)) == known):
+                del self.__typeKeys[(reader.cardType, sector)]
+
+        trailer = self.__layout().sectorTrailer(sector)
+        (status, foundType, key) = self.authenticate(trailer, serialNumber,
+                                                     keyType)
+        if (status != reader.MIFARE_OK):
+            blocks = self.__layout().sectorBlocks(sector)
+            blockStatus = {}
+            for blockAddr in blocks:
+                blockStatus[blockAddr] = status
+            return (reader.MIFARE_ERR,
+                    [0] * (len(blocks) * reader.MIFARE_BLOCKSIZE),
+                    blockStatus)
+
+        return (reader.read_sector(sector, key, foundType, serialNumber))
+
+    def read_card(self, serialNumber=None, sectorCount=None, keyType=None):
+        """ Reads all sectors of the card with the keys that work """
+        reader = self.reader
+        data = []
+        blockStatus = {}
+
+        if (sectorCount is None):
+            if ((reader.cardType is not None) and (reader.cardType.classic)):
+                sectorCount = reader.cardType.layout.sectorCount
+            else:
+                sectorCount = reader.MIFARE_1K_SECTORCOUNT
+
+        for sector in range(sectorCount):
+            (status, backData, backStatus) = self.read_sector(sector,
+                                                              serialNumber,
+                                                              keyType)
+            data.extend(backData)
+            blockStatus.update(backStatus)
+
+        reader.deauthenticate()
+
+        status = reader.MIFARE_OK
+        for blockAddr in blockStatus:
+            if (blockStatus[blockAddr] != reader.MIFARE_OK):
+                status = reader.MIFARE_ERR
+
+        return (status, data, blockStatus)
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf8 -*-
+"""
+Shared, lock protected handles of I2C adapters
+"""
+
+__author__ = "Christoph Pranzl"
+__version__ = "0.0.5"
+__license__ = "GPLv3"
+
+import os
+import threading
+
+from .transport import openAdapter, transportOf
+
+
+# Open handles by device path of the adapter or by the object passed
+_buses = {}
+_busesLock = threading.Lock()
+
+
+class SharedBus:
+    """ Reference counted handle of an I2C adapter
+
+    All readers on the same adapter share one handle. The lock serializes
+    complete commands of the readers, Transport methods are forwarded to
+    the underlying transport. Only an owned transport, opened for the
+    number or path of an adapter, is closed with the last reference,
+    objects of the caller are flushed and left open.
+    """
+
+    def __init__(self, Bus, transport, owned=False):
+        self.bus = Bus
+        self.transport = transport
+        self.owned = owned
+        self.lock = threading.RLock()
+        self.references = 0
+
+    def __getattr__(self, name):
+        return (getattr(self.transport, name))
+
+    def close(self):
+        """ Releases one reference, the adapter is closed with the last """
+        with _busesLock:
+            self.references = self.references - 1
+            if (self.references > 0):
+                return
+            if (_buses.get(self.bus) is self):
+                del _buses[self.bus]
+
+        if (self.owned):
+            self.transport.close()
+        else:
+            self.transport.flush()
+
+    def __enter__(self):
+        return (self)
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def openBus(Bus):
+    """ Returns the shared handle of an adapter, opening it if needed
+
+    Bus is the number or the device path of an adapter, a Transport or an
+    already opened SMBus compatible object, e.g. an smbus2.SMBus or an
+    EmulatedSMBus. The number and the path of an adapter share one handle.
+    """
+    key = _keyOf(Bus)
+    with _busesLock:
+        if (key not in _buses):
+            if (isinstance(Bus, int)):
+                transport = openAdapter(Bus)
+            else:
+                transport = transportOf(Bus)
+            _buses[key] = SharedBus(key, transport,
+                                    owned=isinstance(Bus, (int, str)))
+        sharedBus = _buses[key]
+        sharedBus.references = sharedBus.references + 1
+
+    return (sharedBus)
+
+
+def _keyOf(Bus):
+    """ Returns the key of an adapter in _buses """
+    if (isinstance(Bus, int)):
+        Bus = f'/dev/i2c-{Bus}'
+    if (isinstance(Bus, str)):
+        return (os.path.realpath(Bus))
+    return (Bus)
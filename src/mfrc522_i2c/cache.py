@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf8 -*-
+"""
+Read-through cache of card blocks
+"""
+
+__author__ = "Christoph Pranzl"
+__version__ = "0.0.5"
+__license__ = "GPLv3"
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class BlockCache:
+    """ Content of card blocks by UID and block address
+
+    Holds at most maxEntries blocks, the least recently used block is
+    evicted first. Blocks older than ttl seconds are read from the card
+    again, a ttl of None keeps them until they are evicted or invalidated.
+    Blocks of the verifySectors are never answered without the card: a
+    single read of a block has to go to the card, a cached sector is only
+    returned after one of its blocks has been read and matched.
+    """
+
+    def __init__(self, maxEntries=1024, ttl=60.0, verifySectors=()):
+        self.maxEntries = maxEntries
+        self.ttl = ttl
+        self.verifySectors = set(verifySectors)
+        # Data and time of storage by (UID, block address)
+        self.__blocks = OrderedDict()
+        self.__lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def verifies(self, sector):
+        """ Checks if blocks of a sector have to be verified on the card """
+        return (sector in self.verifySectors)
+
+    def get(self, uid, blockAddr):
+        """ Returns the cached data of a block or None """
+        entry = (tuple(uid), blockAddr)
+        with self.__lock:
+            if (entry not in self.__blocks):
+                self.misses = self.misses + 1
+                return (None)
+
+            (data, stored) = self.__blocks[entry]
+            if ((self.ttl is not None) and
+                    (time.monotonic() - stored > self.ttl)):
+                del self.__blocks[entry]
+                self.expirations = self.expirations + 1
+                self.misses = self.misses + 1
+                return (None)
+
+            self.__blocks.move_to_end(entry)
+            self.hits = self.hits + 1
+            return (list(data))
+
+    def getBlocks(self, uid, blocks):
+        """ Returns the cached data of all blocks or None if one is missing
+
+        Does not count hits unless all blocks are cached
+        """
+        data = []
+        with self.__lock:
+            now = time.monotonic()
+            for blockAddr in blocks:
+                entry = (tuple(uid), blockAddr)
+                if ((entry not in self.__blocks) or
+                        ((self.ttl is not None) and
+                         (now - self.__blocks[entry][1] > self.ttl))):
+                    return (None)
+            for blockAddr in blocks:
+                entry = (tuple(uid), blockAddr)
+                self.__blocks.move_to_end(entry)
+                data.append(list(self.__blocks[entry][0]))
+            self.hits = self.hits + len(data)
+        return (data)
+
+    def put(self, uid, blockAddr, data):
+        """ Stores the data of a block """
+        entry = (tuple(uid), blockAddr)
+        with self.__lock:
+            self.__blocks[entry] = (list(data), time.monotonic())
+            self.__blocks.move_to_end(entry)
+            while (len(self.__blocks) > self.maxEntries):
+                self.__blocks.popitem(last=False)
+                self.evictions = self.evictions + 1
+
+    def invalidate(self, uid=None, blockAddr=None):
+        """ Discards a block, all blocks of a card or everything """
+        with self.__lock:
+            if (uid is None):
+                self.invalidations = (self.invalidations +
+                                      len(self.__blocks))
+                self.__blocks.clear()
+                return
+
+            uid = tuple(uid)
+            if (blockAddr is not None):
+                entries = [(uid, blockAddr)]
+            else:
+                entries = [entry for entry in self.__blocks
+                           if entry[0] == uid]
+            for entry in entries:
+                if (self.__blocks.pop(entry, None) is not None):
+                    self.invalidations = self.invalidations + 1
+
+    def stats(self):
+        """ Returns the counters of the cache as dictionary """
+        with self.__lock:
+            return ({'entries': len(self.__blocks),
+                     'hits': self.hits,
+                     'misses': self.misses,
+                     'evictions': self.evictions,
+                     'expirations': self.expirations,
+                     'invalidations': self.invalidations})
+
+    def __len__(self):
+        return (len(self.__blocks))
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# -*- coding: utf8 -*-
+"""
+Card types and memory layouts of ISO/IEC 14443-A cards
+"""
+
+__author__ = "Christoph Pranzl"
+__version__ = "0.0.5"
+__license__ = "GPLv3"
+
+
+class MemoryLayout:
+    """ Memory organization of a card with precomputed lookup tables """
+
+    def __init__(self, name, sectorSizes, blockSize=16, trailers=True,
+                 reservedBlocks=(0,)):
+        self.name = name
+        self.blockSize = blockSize
+        self.sectorCount = len(sectorSizes)
+
+        # Tables indexed by block address and by sector
+        self.__blockSector = []
+        self.__sectorFirstBlock = []
+        self.__sectorTrailer = []
+        for sector in range(self.sectorCount):
+            self.__sectorFirstBlock.append(len(self.__blockSector))
+            self.__blockSector.extend([sector] * sectorSizes[sector])
+            if (trailers):
+                self.__sectorTrailer.append(len(self.__blockSector) - 1)
+            else:
+                self.__sectorTrailer.append(None)
+        self.blockCount = len(self.__blockSector)
+        self.__sectorFirstBlock.append(self.blockCount)
+
+        self.__trailerBlock = [False] * self.blockCount
+        for trailer in self.__sectorTrailer:
+            if (trailer is not None):
+                self.__trailerBlock[trailer] = True
+
+        self.__dataBlock = [True] * self.blockCount
+        for blockAddr in range(self.blockCount):
+            if ((self.__trailerBlock[blockAddr]) or
+                    (blockAddr in reservedBlocks)):
+                self.__dataBlock[blockAddr] = False
+
+        self.dataBlocks = [blockAddr for blockAddr in range(self.blockCount)
+                           if self.__dataBlock[blockAddr]]
+        self.sectorTrailers = [trailer for trailer in self.__sectorTrailer
+                               if trailer is not None]
+        self.size = self.blockCount * self.blockSize
+
+    def sectorOfBlock(self, blockAddr):
+        """ Returns the sector of a block address """
+        return (self.__blockSector[blockAddr])
+
+    def sectorBlocks(self, sector):
+        """ Returns the block addresses of a sector """
+        return (range(self.__sectorFirstBlock[sector],
+                      self.__sectorFirstBlock[sector + 1]))
+
+    def sectorTrailer(self, sector):
+        """ Returns the trailer block of a sector, None if there is none """
+        return (self.__sectorTrailer[sector])
+
+    def isTrailer(self, blockAddr):
+        """ Checks if a block address is a sector trailer """
+        return (self.__trailerBlock[blockAddr])
+
+    def isDataBlock(self, blockAddr):
+        """ Checks if a block address holds user data """
+        return (self.__dataBlock[blockAddr])
+
+    def __contains__(self, blockAddr):
+        return (0 <= blockAddr < self.blockCount)
+
+    def __repr__(self):
+        return (f'MemoryLayout({self.name!r})')
+
+
+def _ultralightLayout(name, pageCount, userPages):
+    """ Layout of a page based card, pages 0 to 3 hold UID, lock bytes
+    and the capability container, the configuration pages follow the user
+    memory """
+    reservedPages = (list(range(0, 4)) +
+                     list(range(4 + userPages, pageCount)))
+    return (MemoryLayout(name, [pageCount], blockSize=4, trailers=False,
+                         reservedBlocks=set(reservedPages)))
+
+
+MIFARE_MINI_LAYOUT = MemoryLayout('MIFARE Mini', [4] * 5)
+MIFARE_1K_LAYOUT = MemoryLayout('MIFARE Classic 1K', [4] * 16)
+MIFARE_4K_LAYOUT = MemoryLayout('MIFARE Classic 4K', [4] * 32 + [16] * 8)
+ULTRALIGHT_LAYOUT = _ultralightLayout('MIFARE Ultralight', 16, 12)
+ULTRALIGHT_EV1_11_LAYOUT = _ultralightLayout('MIFARE Ultralight EV1 (48)',
+                                             20, 12)
+ULTRALIGHT_EV1_21_LAYOUT = _ultralightLayout('MIFARE Ultralight EV1 (128)',
+                                             41, 32)
+NTAG213_LAYOUT = _ultralightLayout('NTAG213', 45, 36)
+NTAG215_LAYOUT = _ultralightLayout('NTAG215', 135, 126)
+NTAG216_LAYOUT = _ultralightLayout('NTAG216', 231, 222)
+
+
+class CardType:
+    """ Family of a card as reported by ATQA and SAK """
+
+    def __init__(self, name, layout=None, classic=False):
+        self.name = name
+        self.layout = layout
+        # Sector based memory protected by Crypto1 authentication
+        self.classic = classic
+
+    def __repr__(self):
+        return (f'CardType({self.name!r})')
+
+    def __str__(self):
+        return (self.name)
+
+
+MIFARE_MINI = CardType('MIFARE Mini', MIFARE_MINI_LAYOUT, classic=True)
+MIFARE_1K = CardType('MIFARE Classic 1K', MIFARE_1K_LAYOUT, classic=True)
+MIFARE_4K = CardType('MIFARE Classic 4K', MIFARE_4K_LAYOUT, classic=True)
+# Ultralight and NTAG can not be told apart by ATQA and SAK, the layout is
+# the one of the smallest member of the family
+MIFARE_ULTRALIGHT = CardType('MIFARE Ultralight/NTAG', ULTRALIGHT_LAYOUT)
+ULTRALIGHT_EV1_11 = CardType('MIFARE Ultralight EV1 (48)',
+                             ULTRALIGHT_EV1_11_LAYOUT)
+ULTRALIGHT_EV1_21 = CardType('MIFARE Ultralight EV1 (128)',
+                             ULTRALIGHT_EV1_21_LAYOUT)
+NTAG213 = CardType('NTAG213', NTAG213_LAYOUT)
+NTAG215 = CardType('NTAG215', NTAG215_LAYOUT)
+NTAG216 = CardType('NTAG216', NTAG216_LAYOUT)
+ISO_DEP = CardType('ISO/IEC 14443-4')
+UNKNOWN = CardType('Unknown')
+
+# Card type by SAK, see NXP AN10833
+SAK_CARDTYPES = {
+    0x00: MIFARE_ULTRALIGHT,
+    0x08: MIFARE_1K,
+    0x09: MIFARE_MINI,
+    0x18: MIFARE_4K,
+    0x20: ISO_DEP,
+    0x28: MIFARE_1K,
+    0x38: MIFARE_4K,
+    0x88: MIFARE_1K,
+}
+
+
+def classify(atqa, sak):
+    """ Determines the card type from ATQA and SAK """
+    # Cascade bit, the UID is not complete yet
+    CascadeBit = 0x04
+    if (sak & CascadeBit):
+        return (UNKNOWN)
+
+    cardType = SAK_CARDTYPES.get(sak, UNKNOWN)
+
+    # Ultralight and NTAG always have a double size UID
+    UIDSizeDouble = 0x40
+    if ((cardType is MIFARE_ULTRALIGHT) and
+            (atqa is not None) and (len(atqa) > 0) and
+            (not (atqa[0] & UIDSizeDouble))):
+        return (UNKNOWN)
+
+    return (cardType)
+
+
+# Card type by product type and storage size of the GET_VERSION response,
+# see NXP MF0ULX1 and NTAG213/215/216 data sheets
+VERSION_CARDTYPES = {
+    (0x03, 0x0B): ULTRALIGHT_EV1_11,
+    (0x03, 0x0E): ULTRALIGHT_EV1_21,
+    (0x04, 0x0F): NTAG213,
+    (0x04, 0x11): NTAG215,
+    (0x04, 0x13): NTAG216,
+}
+
+
+def classifyVersion(version):
+    """ Determines the card type from a GET_VERSION response """
+    # Header, vendor, product type, subtype, major and minor product
+    # version, storage size and protocol type
+    if (len(version) < 8):
+        return (UNKNOWN)
+
+    return (VERSION_CARDTYPES.get((version[2], version[6]), UNKNOWN))
@@ -0,0 +1,761 @@
+#!/usr/bin/env python3
+# -*- coding: utf8 -*-
+"""
+In-process emulation of the MFRC522 register interface and of MIFARE cards
+
+An EmulatedSMBus stands in for an I2C adapter, so the driver, benchmarks
+and examples run without hardware:
+
+    card = MifareClassic([0xDE, 0xAD, 0xBE, 0xEF])
+    bus = EmulatedSMBus()
+    bus.attach(0x28, EmulatedMFRC522([card]))
+    reader = MFRC522(bus, 0x28)
+
+Cards are modelled on frame level, Crypto1 itself is not emulated. The
+answers of a card are available as soon as a command has been started,
+the timer registers reflect the time the card took to respond.
+"""
+
+__author__ = "Christoph Pranzl"
+__version__ = "0.0.5"
+__license__ = "GPLv3"
+
+from collections import deque
+
+
+def _crcA(data):
+    """ Calculates the ISO/IEC 14443-A CRC, bitwise as in the standard """
+    crc = 0x6363
+    for byte in data:
+        byte = byte ^ (crc & 0xFF)
+        byte = (byte ^ (byte << 4)) & 0xFF
+        crc = (((crc >> 8) ^ (byte << 8) ^ (byte << 3) ^ (byte >> 4)) &
+               0xFFFF)
+    return ([crc & 0xFF, crc >> 8])
+
+
+def _bits(data, count):
+    """ Splits data into a list of count bits, LSB first """
+    return ([(data[i // 8] >> (i % 8)) & 1 for i in range(count)])
+
+
+def _bytes(bits):
+    """ Packs a list of bits, LSB first, into bytes """
+    data = [0] * ((len(bits) + 7) // 8)
+    for i in range(len(bits)):
+        data[i // 8] = data[i // 8] | (bits[i] << (i % 8))
+    return (data)
+
+
+# Answers of 4 bits
+ACK = ([0x0A], 4)
+NAK = ([0x04], 4)
+# Accepted frame without an answer, the card stays ACTIVE
+SILENT = object()
+
+
+class Card:
+    """ ISO/IEC 14443-A state machine shared by all emulated cards """
+
+    IDLE = 'IDLE'
+    READY = 'READY'
+    ACTIVE = 'ACTIVE'
+    HALT = 'HALT'
+
+    ATQA = [0x04, 0x00]
+    SAK = 0x08
+
+    # Response times in microseconds
+    RESPONSE_TIME = 100
+    WRITE_TIME = 4500
+
+    def __init__(self, uid):
+        self.uid = list(uid)
+        self.state = self.IDLE
+        self.halted = False
+        self.level = 0
+        self.reset()
+
+    def reset(self):
+        """ Called when the card leaves the ACTIVE state """
+        self.pending = None
+
+    def powerOff(self):
+        """ Loses power with the RF field, starts over in IDLE """
+        self.halted = False
+        self.state = self.IDLE
+        self.reset()
+
+    def levels(self):
+        """ Returns the cascade levels as list of 5 byte frames with BCC """
+        uid = self.uid
+        if (len(uid) == 4):
+            parts = [uid]
+        elif (len(uid) == 7):
+            parts = [[0x88] + uid[0:3], uid[3:7]]
+        else:
+            parts = [[0x88] + uid[0:3], [0x88] + uid[3:6], uid[6:10]]
+
+        frames = []
+        for part in parts:
+            bcc = 0
+            for byte in part:
+                bcc = bcc ^ byte
+            frames.append(part + [bcc])
+        return (frames)
+
+    def idle(self):
+        """ Falls back to IDLE or HALT after an unexpected frame """
+        if (self.halted):
+            self.state = self.HALT
+        else:
+            self.state = self.IDLE
+        self.reset()
+        return (None)
+
+    def receive(self, data, bits):
+        """ Handles a frame and returns data, bits and time or None """
+        # REQA and WUPA
+        if ((bits == 7) and (data[0] in (0x26, 0x52))):
+            if ((self.state == self.IDLE) or
+                    ((data[0] == 0x52) and (self.state == self.HALT))):
+                self.state = self.READY
+                self.level = 0
+                return ((list(self.ATQA), 16, 90))
+            return (self.idle())
+
+        if (self.state == self.READY):
+            return (self.anticollision(data, bits))
+
+        if (self.state == self.ACTIVE):
+            # HLTA
+            if ((bits == 32) and (data[0:2] == [0x50, 0x00])):
+                if (_crcA(data[0:2]) == data[2:4]):
+                    self.state = self.HALT
+                    self.halted = True
+                    self.reset()
+                return (None)
+
+            if ((bits % 8) or (len(data) < 3) or
+                    (_crcA(data[:-2]) != data[-2:])):
+                return (self.idle())
+
+            response = self.command(data[:-2])
+            if (response is SILENT):
+                return (None)
+            if (response is None):
+                return (self.idle())
+            if (response[0:2] == NAK):
+                # A NAK sends the card back to IDLE or HALT
+                self.idle()
+            return (response)
+
+        return (None)
+
+    def anticollision(self, data, bits):
+        """ Handles ANTICOLLISION and SELECT frames in READY state """
+        frames = self.levels()
+        selects = (0x93, 0x95, 0x97)
+        if ((data[0] not in selects) or
+                (selects.index(data[0]) != self.level)):
+            return (self.idle())
+
+        frame = frames[self.level]
+        nvb = data[1]
+        if ((nvb == 0x70) and (bits == 72)):
+            if ((_crcA(data[0:7]) != data[7:9]) or (data[2:7] != frame)):
+                return (self.idle())
+            self.level = self.level + 1
+            if (self.level < len(frames)):
+                # Cascade bit, the UID continues on the next level
+                sak = [0x04]
+            else:
+                sak = [self.SAK]
+                self.state = self.ACTIVE
+            return ((sak + _crcA(sak), 24, 90))
+
+        # Number of valid bits, only cards matching them answer
+        known = ((nvb >> 4) - 2) * 8 + (nvb & 0x0F)
+        if ((known + 16 != bits) or (known > 40)):
+            return (self.idle())
+        uidBits = _bits(frame, 40)
+        if (_bits(data[2:], known) != uidBits[0:known]):
+            return (None)
+        return ((None, uidBits[known:], 90))
+
+    def command(self, data):
+        """ Handles a CRC checked frame in ACTIVE state """
+        return (NAK + (self.RESPONSE_TIME,))
+
+
+class MifareClassic(Card):
+    """ MIFARE Classic Mini, 1K or 4K card with transport configuration """
+
+    KEY = [0xFF] * 6
+    ACCESS = [0xFF, 0x07, 0x80, 0x69]
+
+    def __init__(self, uid, size=1024):
+        self.size = size
+        if (size == 4096):
+            self.ATQA = [0x02, 0x00]
+            self.SAK = 0x18
+        elif (size == 320):
+            self.SAK = 0x09
+        if (len(uid) != 4):
+            self.ATQA = [self.ATQA[0] | 0x40, 0x00]
+        Card.__init__(self, uid)
+
+        self.memory = [[0] * 16 for i in range(size // 16)]
+        bcc = 0
+        for byte in uid[0:4]:
+            bcc = bcc ^ byte
+        self.memory[0] = (list(uid) + [bcc, self.SAK] + self.ATQA +
+                          [0] * 16)[0:16]
+        for sector in range(self.sectors()):
+            self.memory[self.trailer(sector)] = (self.KEY + self.ACCESS +
+                                                 self.KEY)
+
+    def sectors(self):
+        """ Returns the number of sectors """
+        blocks = self.size // 16
+        if (blocks <= 128):
+            return (blocks // 4)
+        return (32 + (blocks - 128) // 16)
+
+    def sector(self, block):
+        """ Returns the sector of a block """
+        if (block < 128):
+            return (block // 4)
+        return (32 + (block - 128) // 16)
+
+    def trailer(self, sector):
+        """ Returns the trailer block of a sector """
+        if (sector < 32):
+            return (sector * 4 + 3)
+        return (128 + (sector - 32) * 16 + 15)
+
+    def reset(self):
+        Card.reset(self)
+        self.authenticated = None
+        self.transferBuffer = None
+
+    def authenticate(self, mode, block, key, uid):
+        """ Three pass authentication, Crypto1 itself is not modelled """
+        if ((self.state != self.ACTIVE) or (block >= len(self.memory))):
+            return (False)
+        trailer = self.memory[self.trailer(self.sector(block))]
+        if (mode == 0x60):
+            expected = trailer[0:6]
+        else:
+            expected = trailer[10:16]
+        if ((key != expected) or
+                ((uid != self.uid[-4:]) and (uid != self.uid[0:4]))):
+            self.idle()
+            return (False)
+        self.authenticated = self.sector(block)
+        return (True)
+
+    def value(self, block):
+        """ Decodes a value block, None if the format is invalid """
+        content = self.memory[block]
+        for i in range(4):
+            if ((content[i] != content[i + 8]) or
+                    (content[i] != content[i + 4] ^ 0xFF)):
+                return (None)
+        if ((content[12] != content[14]) or
+                (content[12] != content[13] ^ 0xFF) or
+                (content[13] != content[15])):
+            return (None)
+        return (int.from_bytes(bytes(content[0:4]), 'little', signed=True))
+
+    def command(self, data):
+        if (self.pending is not None):
+            # Second part of WRITE, INCREMENT, DECREMENT and RESTORE
+            (command, block) = self.pending
+            self.pending = None
+            if (command == 0xA0):
+                if (len(data) != 16):
+                    return (None)
+                self.memory[block] = list(data)
+                return (ACK + (self.WRITE_TIME,))
+            if (len(data) != 4):
+                return (None)
+            operand = int.from_bytes(bytes(data), 'little', signed=True)
+            value = self.value(block)
+            if (command == 0xC1):
+                value = value + operand
+            elif (command == 0xC0):
+                value = value - operand
+            self.transferBuffer = (value, self.memory[block][12])
+            return (SILENT)
+
+        command = data[0]
+        if ((len(data) < 2) or (self.authenticated is None)):
+            return (NAK + (self.RESPONSE_TIME,))
+        block = data[1]
+        if ((block >= len(self.memory)) or
+                (self.sector(block) != self.authenticated)):
+            return (NAK + (self.RESPONSE_TIME,))
+
+        if (command == 0x30):
+            content = list(self.memory[block])
+            if (block == self.trailer(self.authenticated)):
+                # Key A is never readable
+                content[0:6] = [0] * 6
+            return ((content + _crcA(content), 144, 1000))
+        if (command == 0xA0):
+            if (block == 0):
+                return (NAK + (self.RESPONSE_TIME,))
+            self.pending = (command, block)
+            return (ACK + (self.RESPONSE_TIME,))
+        if (command in (0xC0, 0xC1, 0xC2)):
+            if (self.value(block) is None):
+                return (NAK + (self.RESPONSE_TIME,))
+            self.pending = (command, block)
+            return (ACK + (self.RESPONSE_TIME,))
+        if (command == 0xB0):
+            if (self.transferBuffer is None):
+                return (NAK + (self.RESPONSE_TIME,))
+            (value, address) = self.transferBuffer
+            raw = list((value & 0xFFFFFFFF).to_bytes(4, 'little'))
+            inverted = [byte ^ 0xFF for byte in raw]
+            self.memory[block] = (raw + inverted + raw +
+                                  [address, address ^ 0xFF,
+                                   address, address ^ 0xFF])
+            self.transferBuffer = None
+            return (ACK + (self.WRITE_TIME,))
+
+        return (NAK + (self.RESPONSE_TIME,))
+
+
+class Ultralight(Card):
+    """ MIFARE Ultralight or NTAG21x card """
+
+    ATQA = [0x44, 0x00]
+    SAK = 0x00
+
+    # GET_VERSION answers by number of pages
+    VERSIONS = {
+        20: [0x00, 0x04, 0x03, 0x01, 0x01, 0x00, 0x0B, 0x03],
+        41: [0x00, 0x04, 0x03, 0x01, 0x01, 0x00, 0x0E, 0x03],
+        45: [0x00, 0x04, 0x04, 0x02, 0x01, 0x00, 0x0F, 0x03],
+        135: [0x00, 0x04, 0x04, 0x02, 0x01, 0x00, 0x11, 0x03],
+        231: [0x00, 0x04, 0x04, 0x02, 0x01, 0x00, 0x13, 0x03],
+    }
+
+    def __init__(self, uid, pages=231, password=None):
+        Card.__init__(self, uid)
+        self.pages = [[0] * 4 for i in range(pages)]
+        self.password = password
+        self.pack = [0x80, 0x80]
+        uid = self.uid
+        self.pages[0] = uid[0:3] + [0x88 ^ uid[0] ^ uid[1] ^ uid[2]]
+        self.pages[1] = uid[3:7]
+        self.pages[2] = [uid[3] ^ uid[4] ^ uid[5] ^ uid[6], 0x48, 0, 0]
+        # Capability container, NDEF with the user memory as data area
+        self.pages[3] = [0xE1, 0x10, (pages - 9) * 4 // 8, 0x00]
+
+    def command(self, data):
+        if (self.pending is not None):
+            # Second part of COMPATIBILITY_WRITE
+            page = self.pending
+            self.pending = None
+            if (len(data) != 16):
+                return (None)
+            self.pages[page] = list(data[0:4])
+            return (ACK + (self.WRITE_TIME,))
+
+        command = data[0]
+        count = len(self.pages)
+        if ((command == 0x60) and (len(data) == 1)):
+            if (count not in self.VERSIONS):
+                # The original Ultralight does not know GET_VERSION
+                return (NAK + (self.RESPONSE_TIME,))
+            version = list(self.VERSIONS[count])
+            return ((version + _crcA(version), 80, 100))
+        if ((command == 0x30) and (len(data) == 2) and (data[1] < count)):
+            content = []
+            for i in range(4):
+                content.extend(self.pages[(data[1] + i) % count])
+            return ((content + _crcA(content), 144, 400))
+        if ((command == 0x3A) and (len(data) == 3)):
+            (start, end) = (data[1], data[2])
+            if ((start > end) or (end >= count)):
+                return (NAK + (self.RESPONSE_TIME,))
+            content = []
+            for page in range(start, end + 1):
+                content.extend(self.pages[page])
+            return ((content + _crcA(content), (len(content) + 2) * 8,
+                     100 + 40 * len(content)))
+        if ((command == 0xA2) and (len(data) == 6)):
+            if ((data[1] < 4) or (data[1] >= count)):
+                return (NAK + (self.RESPONSE_TIME,))
+            self.pages[data[1]] = list(data[2:6])
+            return (ACK + (self.WRITE_TIME,))
+        if ((command == 0xA0) and (len(data) == 2)):
+            if ((data[1] < 4) or (data[1] >= count)):
+                return (NAK + (self.RESPONSE_TIME,))
+            self.pending = data[1]
+            return (ACK + (self.RESPONSE_TIME,))
+        if ((command == 0x1B) and (len(data) == 5)):
+            if ((self.password is None) or (data[1:5] != self.password)):
+                return (NAK + (self.RESPONSE_TIME,))
+            pack = list(self.pack)
+            return ((pack + _crcA(pack), 32, 100))
+
+        return (NAK + (self.RESPONSE_TIME,))
+
+
+class EmulatedMFRC522:
+    """ Register level model of the MFRC522
+
+    Models the registers used by the driver: command, interrupt requests,
+    error, status, FIFO, control, bit framing, collision, transmitter
+    control, CRC coprocessor and timer. Answers of the cards in the field
+    are placed into the FIFO when a command starts.
+    """
+
+    COMMANDREG = 0x01
+    COMIRQREG = 0x04
+    DIVIRQREG = 0x05
+    ERRORREG = 0x06
+    STATUS2REG = 0x08
+    FIFODATAREG = 0x09
+    FIFOLEVELREG = 0x0A
+    CONTROLREG = 0x0C
+    BITFRAMINGREG = 0x0D
+    COLLREG = 0x0E
+    MODEREG = 0x11
+    TXCONTROLREG = 0x14
+    CRCRESULTREGMSB = 0x21
+    CRCRESULTREGLSB = 0x22
+    TMODEREG = 0x2A
+    TPRESCALERREG = 0x2B
+    TRELOADREGH = 0x2C
+    TRELOADREGL = 0x2D
+    TCOUNTERVALREGH = 0x2E
+    TCOUNTERVALREGL = 0x2F
+    VERSIONREG = 0x37
+
+    IDLE = 0x00
+    CALCCRC = 0x03
+    TRANSCEIVE = 0x0C
+    MFAUTHENT = 0x0E
+    SOFTRESET = 0x0F
+
+    VERSION = 0x92
+    FIFO_SIZE = 64
+    CLOCK = 13.56e6
+
+    def __init__(self, cards=None):
+        # Cards in the field, add and remove them to move cards in and out
+        self.cards = list(cards or [])
+        self.reads = 0
+        self.writes = 0
+        self.softReset()
+
+    def softReset(self):
+        """ Resets all registers to their power-up values """
+        self.registers = [0] * 0x40
+        self.registers[self.COMMANDREG] = 0x20
+        self.registers[0x02] = 0x80
+        self.registers[self.CONTROLREG] = 0x10
+        self.registers[self.MODEREG] = 0x3F
+        self.registers[self.TXCONTROLREG] = 0x80
+        self.registers[self.VERSIONREG] = self.VERSION
+        self.fifo = deque()
+        self.armed = False
+
+    def antenna(self):
+        """ Returns True if both antenna drivers are on """
+        return ((self.registers[self.TXCONTROLREG] & 0x03) == 0x03)
+
+    def __timer(self):
+        """ Returns prescaler and reload value of the timer """
+        prescaler = (((self.registers[self.TMODEREG] & 0x0F) << 8) |
+                     self.registers[self.TPRESCALERREG])
+        reload = ((self.registers[self.TRELOADREGH] << 8) |
+                  self.registers[self.TRELOADREGL])
+        return ((prescaler, reload))
+
+    def timerPeriod(self):
+        """ Returns the timer period in microseconds """
+        (prescaler, reload) = self.__timer()
+        return ((2 * prescaler + 1) * (reload + 1) / self.CLOCK * 1e6)
+
+    def __setCounter(self, micros):
+        """ Sets the counter as it is micros after the timer started """
+        (prescaler, reload) = self.__timer()
+        ticks = int(micros * self.CLOCK / 1e6 / (2 * prescaler + 1))
+        counter = max(reload - ticks, 0)
+        self.registers[self.TCOUNTERVALREGH] = counter >> 8
+        self.registers[self.TCOUNTERVALREGL] = counter & 0xFF
+
+    def read(self, register):
+        """ Reads a register """
+        self.reads = self.reads + 1
+        if (register == self.FIFODATAREG):
+            if (self.fifo):
+                return (self.fifo.popleft())
+            return (0)
+        if (register == self.FIFOLEVELREG):
+            return (len(self.fifo))
+        return (self.registers[register])
+
+    def write(self, register, value):
+        """ Writes a register """
+        self.writes = self.writes + 1
+        value = value & 0xFF
+        if (register == self.COMMANDREG):
+            self.command(value & 0x0F)
+        elif (register in (self.COMIRQREG, self.DIVIRQREG)):
+            # Set1 and Set2 set the marked bits, otherwise they are cleared
+            mask = value & 0x7F
+            if (value & 0x80):
+                self.registers[register] = self.registers[register] | mask
+            else:
+                self.registers[register] = self.registers[register] & ~mask
+        elif (register == self.FIFODATAREG):
+            if (len(self.fifo) < self.FIFO_SIZE):
+                self.fifo.append(value)
+            else:
+                # BufferOvfl
+                self.registers[self.ERRORREG] |= 0x10
+        elif (register == self.FIFOLEVELREG):
+            if (value & 0x80):
+                # FlushBuffer
+                self.fifo.clear()
+                self.registers[self.ERRORREG] &= ~0x10
+        elif (register == self.STATUS2REG):
+            # MFCrypto1On can only be cleared
+            self.registers[register] = (
+                (self.registers[register] & 0x08 & value) | (value & 0xF0))
+        elif (register == self.BITFRAMINGREG):
+            self.registers[register] = value
+            if ((value & 0x80) and (self.armed)):
+                # StartSend
+                self.transceive()
+        elif (register == self.TXCONTROLREG):
+            antenna = self.antenna()
+            self.registers[register] = value
+            if (antenna and (not self.antenna())):
+                for card in self.cards:
+                    card.powerOff()
+        elif (register in (self.ERRORREG, 0x07, self.VERSIONREG)):
+            # Read only
+            pass
+        else:
+            self.registers[register] = value
+
+    def command(self, command):
+        """ Starts a command """
+        self.registers[self.COMMANDREG] = (
+            (self.registers[self.COMMANDREG] & 0xF0) | command)
+        self.armed = False
+        if (command == self.SOFTRESET):
+            self.softReset()
+        elif (command == self.CALCCRC):
+            crc = _crcA(list(self.fifo))
+            self.fifo.clear()
+            self.registers[self.CRCRESULTREGLSB] = crc[0]
+            self.registers[self.CRCRESULTREGMSB] = crc[1]
+            # CRCIRq
+            self.registers[self.DIVIRQREG] |= 0x04
+        elif (command == self.TRANSCEIVE):
+            self.armed = True
+            if (self.registers[self.BITFRAMINGREG] & 0x80):
+                self.transceive()
+        elif (command == self.MFAUTHENT):
+            self.mfauthent()
+
+    def active(self):
+        """ Returns the cards in the field that are ACTIVE """
+        if (not self.antenna()):
+            return ([])
+        return ([card for card in self.cards if card.state == Card.ACTIVE])
+
+    def mfauthent(self):
+        """ Performs MFAuthent against the active card """
+        data = list(self.fifo)
+        self.fifo.clear()
+        self.registers[self.ERRORREG] = 0
+
+        success = False
+        if (len(data) == 12):
+            for card in self.active():
+                if ((hasattr(card, 'authenticate')) and
+                        (card.authenticate(data[0], data[1], data[2:8],
+                                           data[8:12]))):
+                    success = True
+
+        if (success):
+            # MFCrypto1On, IdleIRq and back to idle
+            self.registers[self.STATUS2REG] |= 0x08
+            self.registers[self.COMIRQREG] |= 0x10
+            self.registers[self.COMMANDREG] &= 0xF0
+            self.__setCounter(1000)
+        else:
+            # Only the timer ends a failed authentication
+            self.registers[self.STATUS2REG] &= ~0x08
+            self.registers[self.COMIRQREG] |= 0x01
+            self.__setCounter(1e9)
+
+    def transceive(self):
+        """ Transmits the FIFO and receives the answers of all cards """
+        data = list(self.fifo)
+        self.fifo.clear()
+        txLastBits = self.registers[self.BITFRAMINGREG] & 0x07
+        rxAlign = (self.registers[self.BITFRAMINGREG] >> 4) & 0x07
+        bits = len(data) * 8
+        if (txLastBits and data):
+            bits = (len(data) - 1) * 8 + txLastBits
+
+        self.registers[self.ERRORREG] = 0
+        # CollPosNotValid
+        self.registers[self.COLLREG] = 0x80
+        # TxIRq
+        self.registers[self.COMIRQREG] |= 0x40
+
+        responses = []
+        if (self.antenna()):
+            for card in self.cards:
+                response = card.receive(data, bits)
+                if (response is not None):
+                    responses.append(response)
+
+        # Answers after the timer expired are lost
+        period = self.timerPeriod()
+        responses = [response for response in responses
+                     if response[2] < period]
+        if (len(responses) == 0):
+            self.__setCounter(1e9)
+            # TimerIRq
+            self.registers[self.COMIRQREG] |= 0x01
+            return
+
+        self.__setCounter(max(response[2] for response in responses))
+        streams = []
+        for (payload, count, time) in responses:
+            if (payload is None):
+                # Already a list of bits
+                streams.append(count)
+            else:
+                streams.append(_bits(payload, count))
+
+        # Overlay the answers, the first differing bit is the collision
+        length = max(len(stream) for stream in streams)
+        received = []
+        collision = None
+        for i in range(length):
+            values = set(stream[i] for stream in streams if i < len(stream))
+            if ((len(values) > 1) and (collision is None)):
+                collision = i
+            received.append(max(values))
+
+        stream = [0] * rxAlign + received
+        if (collision is not None):
+            # ColErr, ErrIRq and the 1-based position in the FIFO bits
+            self.registers[self.ERRORREG] |= 0x08
+            self.registers[self.COMIRQREG] |= 0x02
+            position = rxAlign + collision + 1
+            self.registers[self.COLLREG] = position & 0x1F
+            if (position > 32):
+                self.registers[self.COLLREG] |= 0x20
+
+        content = _bytes(stream)
+        if (len(content) > self.FIFO_SIZE):
+            self.registers[self.ERRORREG] |= 0x10
+            content = content[0:self.FIFO_SIZE]
+        self.fifo.extend(content)
+        # RxLastBits
+        self.registers[self.CONTROLREG] = (
+            (self.registers[self.CONTROLREG] & 0xF8) | (len(stream) % 8))
+        # RxIRq
+        self.registers[self.COMIRQREG] |= 0x20
+
+
+class EmulatedSMBus:
+    """ SMBus compatible adapter with emulated readers attached
+
+    transactions counts every bus transaction for benchmarks
+    """
+
+    def __init__(self, devices=None):
+        self.devices = dict(devices or {})
+        self.transactions = 0
+
+    def attach(self, address, device):
+        """ Attaches an emulated reader at an address """
+        self.devices[address] = device
+        return (device)
+
+    def read_byte_data(self, address, register):
+        self.transactions = self.transactions + 1
+        return (self.devices[address].read(register))
+
+    def write_byte_data(self, address, register, value):
+        self.transactions = self.transactions + 1
+        self.devices[address].write(register, value)
+
+    def read_i2c_block_data(self, address, register, length):
+        self.transactions = self.transactions + 1
+        device = self.devices[address]
+        return ([device.read(register) for i in range(length)])
+
+    def write_i2c_block_data(self, address, register, data):
+        self.transactions = self.transactions + 1
+        device = self.devices[address]
+        for value in data:
+            device.write(register, value)
+
+    def close(self):
+        pass
+
+
+class EmulatedI2CDev:
+    """ Stand-in of /dev/i2c-N for an I2CDevTransport
+
+        device = EmulatedI2CDev()
+        device.attach(0x28, EmulatedMFRC522([card]))
+        reader = MFRC522(I2CDevTransport(fd=0, ioctl=device.ioctl), 0x28)
+
+    transactions counts the system calls, messages the I2C messages
+    """
+
+    I2C_RDWR = 0x0707
+    I2C_M_RD = 0x0001
+
+    def __init__(self, devices=None):
+        self.devices = dict(devices or {})
+        # Register the next read starts at by address
+        self.registers = {}
+        self.transactions = 0
+        self.messages = 0
+
+    def attach(self, address, device):
+        """ Attaches an emulated reader at an address """
+        self.devices[address] = device
+        return (device)
+
+    def ioctl(self, fd, request, transfer):
+        """ Performs the messages of a struct i2c_rdwr_ioctl_data """
+        if (request != self.I2C_RDWR):
+            raise OSError(f'Unsupported ioctl 0x{request:04X}')
+        self.transactions = self.transactions + 1
+        for i in range(transfer.nmsgs):
+            message = transfer.msgs[i]
+            self.messages = self.messages + 1
+            if (message.addr not in self.devices):
+                # No acknowledge of the address
+                raise OSError(f'No device at 0x{message.addr:02X}')
+            device = self.devices[message.addr]
+            if (message.flags & self.I2C_M_RD):
+                register = self.registers[message.addr]
+                for j in range(message.len):
+                    message.buf[j] = device.read(register)
+            elif (message.len > 0):
+                register = message.buf[0]
+                self.registers[message.addr] = register
+                for j in range(1, message.len):
+                    device.write(register, message.buf[j])
+        return (0)
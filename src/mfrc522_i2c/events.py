@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# -*- coding: utf8 -*-
+"""
+Tag arrival and departure events derived from repeated polls
+"""
+
+__author__ = "Christoph Pranzl"
+__version__ = "0.0.5"
+__license__ = "GPLv3"
+
+from collections import namedtuple
+
+
+# A card entered the field and stayed there for the dwell time
+TagArrived = namedtuple('TagArrived', ['uid', 'atqa', 'sak'])
+# A card has not been seen for the debounce time
+TagLeft = namedtuple('TagLeft', ['uid'])
+
+
+class PresenceTracker:
+    """ Tracks the cards in the field and reports changes only
+
+    A card is reported as arrived once it has been seen for dwell seconds
+    and as left once it has not been seen for debounce seconds, so short
+    dropouts and cards passing by do not cause events.
+    """
+
+    def __init__(self, debounce=0.3, dwell=0.0):
+        self.debounce = debounce
+        self.dwell = dwell
+        # First seen, last seen, ATQA, SAK and arrival reported by UID
+        self.__present = {}
+
+    def present(self):
+        """ Returns the UIDs of the cards reported as arrived """
+        return ([list(uid) for uid in self.__present
+                 if self.__present[uid][4]])
+
+    def update(self, tags, now):
+        """ Updates the tracker with the UID, ATQA and SAK of the cards seen
+        at time now and returns the resulting events """
+        events = []
+
+        seen = set()
+        for (uid, atqa, sak) in tags:
+            key = tuple(uid)
+            seen.add(key)
+            if (key not in self.__present):
+                self.__present[key] = [now, now, atqa, sak, False]
+            entry = self.__present[key]
+            entry[1] = now
+            if ((not entry[4]) and (now - entry[0] >= self.dwell)):
+                entry[4] = True
+                events.append(TagArrived(list(uid), entry[2], entry[3]))
+
+        for key in list(self.__present):
+            if (key in seen):
+                continue
+            entry = self.__present[key]
+            if (now - entry[1] >= self.debounce):
+                del self.__present[key]
+                if (entry[4]):
+                    events.append(TagLeft(list(key)))
+
+        return (events)
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf8 -*-
+"""
+Edge events of the MFRC522 IRQ pin through the Linux GPIO character device
+"""
+
+__author__ = "Christoph Pranzl"
+__version__ = "0.0.5"
+__license__ = "GPLv3"
+
+import os
+import select
+import struct
+
+
+class GPIOInterrupt:
+    # GPIO character device ABI, see include/uapi/linux/gpio.h
+    GPIO_GET_LINEEVENT_IOCTL = 0xC030B404
+    GPIOHANDLE_REQUEST_INPUT = 0x01
+    GPIOEVENT_REQUEST_RISING_EDGE = 0x01
+    GPIOEVENT_REQUEST_FALLING_EDGE = 0x02
+
+    # struct gpioevent_request and struct gpioevent_data
+    EVENT_REQUEST = 'III32si'
+    EVENT_SIZE = 16
+
+    def __init__(self, chip=None, line=None, fd=None,
+                 edge=GPIOEVENT_REQUEST_FALLING_EDGE):
+        """ Requests edge events for a line of a GPIO chip
+
+        The IRQ pin of the MFRC522 is active low as the driver sets IRqInv,
+        so falling edges are requested by default. An already opened event
+        file descriptor, e.g. one end of a pipe, can be passed as fd instead
+        of chip and line.
+        """
+        if (fd is None):
+            fd = self.__requestLine(chip, line, edge)
+        self.fd = fd
+
+    def __requestLine(self, chip, line, edge):
+        """ Requests a line event file descriptor from the GPIO chip """
+        import fcntl
+
+        if isinstance(chip, int):
+            chip = f'/dev/gpiochip{chip}'
+
+        request = struct.pack(self.EVENT_REQUEST,
+                              line,
+                              self.GPIOHANDLE_REQUEST_INPUT,
+                              edge,
+                              b'mfrc522_i2c',
+                              0)
+        chipFd = os.open(chip, os.O_RDONLY)
+        try:
+            request = fcntl.ioctl(chipFd, self.GPIO_GET_LINEEVENT_IOCTL,
+                                  request)
+        finally:
+            os.close(chipFd)
+
+        return (struct.unpack(self.EVENT_REQUEST, request)[4])
+
+    def fileno(self):
+        """ Returns the event file descriptor """
+        return (self.fd)
+
+    def clear(self):
+        """ Discards all pending edge events """
+        while (self.wait(0)):
+            pass
+
+    def wait(self, timeout):
+        """ Waits up to timeout seconds for an edge event """
+        (readable, writable, exceptional) = select.select([self.fd], [], [],
+                                                          timeout)
+        if (not readable):
+            return False
+
+        event = os.read(self.fd, self.EVENT_SIZE)
+
+        return (len(event) > 0)
+
+    def close(self):
+        """ Releases the line """
+        if (self.fd is not None):
+            os.close(self.fd)
+            self.fd = None
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf8 -*-
+"""
+Concurrent polling of many MFRC522 readers spread over several I2C buses
+"""
+
+__author__ = "Christoph Pranzl"
+__version__ = "0.0.5"
+__license__ = "GPLv3"
+
+import queue
+import threading
+import time
+from collections import namedtuple
+
+from .mfrc522_i2c import MFRC522
+
+
+# A card seen by one of the readers of a group
+TagRead = namedtuple('TagRead', ['bus', 'address', 'uid', 'atqa', 'sak',
+                                 'timestamp'])
+
+
+class ReaderGroup:
+    """ Polls readers with one worker thread per I2C bus
+
+    Transactions on a bus are serialized by its worker, the readers of a
+    bus are polled in turn. Buses are polled in parallel and all cards seen
+    are delivered through the results queue.
+    """
+
+    def __init__(self, interval=0.0, inventory=False):
+        # Pause in seconds after every round over the readers of a bus
+        self.interval = interval
+        # Enumerate all cards in the field of a reader instead of one
+        self.inventory = inventory
+        self.results = queue.Queue()
+        # Number of bus errors per (bus, address)
+        self.errors = {}
+        self.__buses = {}
+        self.__threads = []
+        self.__stopped = threading.Event()
+
+    def add(self, Bus, Address, reader=None, **kwargs):
+        """ Adds a reader, creates it if no reader is passed """
+        if (reader is None):
+            reader = MFRC522(Bus, Address, **kwargs)
+        self.__buses.setdefault(Bus, []).append((Address, reader))
+        return (reader)
+
+    def readers(self):
+        """ Returns all readers of the group """
+        readers = []
+        for Bus in self.__buses:
+            for (Address, reader) in self.__buses[Bus]:
+                readers.append(reader)
+        return (readers)
+
+    def start(self):
+        """ Starts one polling worker per bus """
+        self.__stopped.clear()
+        for Bus in self.__buses:
+            thread = threading.Thread(target=self.__poll,
+                                      args=(Bus, self.__buses[Bus]),
+                                      name=f'mfrc522_i2c-group-{Bus}',
+                                      daemon=True)
+            thread.start()
+            self.__threads.append(thread)
+
+    def stop(self):
+        """ Stops the workers and waits for them to finish """
+        self.__stopped.set()
+        for thread in self.__threads:
+            thread.join()
+        self.__threads = []
+
+    def __enter__(self):
+        self.start()
+        return (self)
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def __poll(self, Bus, readers):
+        """ Polls the readers of a bus in turn until stopped """
+        while (not self.__stopped.is_set()):
+            for (Address, reader) in readers:
+                if (self.__stopped.is_set()):
+                    break
+                try:
+                    tags = self.__pollReader(reader)
+                except OSError:
+                    # Reader not responding on the bus
+                    key = (Bus, Address)
+                    self.errors[key] = self.errors.get(key, 0) + 1
+                    continue
+
+                timestamp = time.monotonic()
+                for (uid, atqa, sak) in tags:
+                    self.results.put(TagRead(Bus, Address, uid, atqa, sak,
+                                             timestamp))
+
+            if (self.interval > 0):
+                self.__stopped.wait(self.interval)
+
+    def __pollReader(self, reader):
+        """ Returns UID, ATQA and SAK of the cards in the field """
+        if (self.inventory):
+            (status, tags) = reader.inventory()
+            return (tags)
+
+        # Wake up the card halted in the last round as well
+        (status, backData, backBits) = reader.wakeup()
+        if (status != reader.MIFARE_OK):
+            return ([])
+
+        atqa = list(backData)
+        (status, uid, sak) = reader.anticollision()
+        if (status != reader.MIFARE_OK):
+            return ([])
+
+        reader.halt()
+        return ([(uid, atqa, sak)])
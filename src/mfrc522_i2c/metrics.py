@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# -*- coding: utf8 -*-
+"""
+Counters and latency histograms of the MFRC522 driver
+"""
+
+__author__ = "Christoph Pranzl"
+__version__ = "0.0.5"
+__license__ = "GPLv3"
+
+import threading
+
+
+class Metrics:
+    """ Labelled counters and histograms, exported as dict or Prometheus
+
+    Passed to an MFRC522 as metrics, the reader counts I2C reads and writes
+    per register and command, polls of the interrupt request bits and the
+    results of card exchanges, and records the latency of every command.
+    One instance can be shared by several readers.
+    """
+
+    # Upper bounds of the latency histogram buckets in seconds
+    BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25,
+               0.5, 1.0, 2.5, 5.0)
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        # Value by name and sorted label items
+        self.__counters = {}
+        # Bucket counts, sum and count by name and sorted label items
+        self.__histograms = {}
+        self.__lock = threading.Lock()
+
+    def count(self, name, value=1, **labels):
+        """ Adds value to a counter """
+        key = (name, tuple(sorted(labels.items())))
+        with self.__lock:
+            self.__counters[key] = self.__counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        """ Records a value in a histogram """
+        key = (name, tuple(sorted(labels.items())))
+        with self.__lock:
+            histogram = self.__histograms.get(key)
+            if (histogram is None):
+                histogram = [[0] * len(self.buckets), 0.0, 0]
+                self.__histograms[key] = histogram
+            for i in range(len(self.buckets)):
+                if (value <= self.buckets[i]):
+                    histogram[0][i] = histogram[0][i] + 1
+                    break
+            histogram[1] = histogram[1] + value
+            histogram[2] = histogram[2] + 1
+
+    def reset(self):
+        """ Discards all values """
+        with self.__lock:
+            self.__counters.clear()
+            self.__histograms.clear()
+
+    def snapshot(self):
+        """ Returns a copy of all values as dictionary
+
+        Counters map to a list of labels and value, histograms to a list of
+        labels, count, sum and the cumulative count per bucket bound
+        """
+        with self.__lock:
+            counters = {}
+            for ((name, labels), value) in sorted(self.__counters.items()):
+                counters.setdefault(name, []).append({'labels': dict(labels),
+                                                      'value': value})
+
+            histograms = {}
+            for ((name, labels), histogram) in sorted(
+                    self.__histograms.items()):
+                buckets = {}
+                cumulative = 0
+                for i in range(len(self.buckets)):
+                    cumulative = cumulative + histogram[0][i]
+                    buckets[self.buckets[i]] = cumulative
+                histograms.setdefault(name, []).append({
+                    'labels': dict(labels),
+                    'count': histogram[2],
+                    'sum': histogram[1],
+                    'buckets': buckets})
+
+        return ({'counters': counters, 'histograms': histograms})
+
+    def prometheus(self, prefix='mfrc522'):
+        """ Returns all values in the Prometheus text exposition format """
+        snapshot = self.snapshot()
+        lines = []
+
+        for name in snapshot['counters']:
+            metric = f'{prefix}_{name}_total'
+            lines.append(f'# TYPE {metric} counter')
+            for sample in snapshot['counters'][name]:
+                lines.append(f'{metric}{_labels(sample["labels"])} '
+                             f'{sample["value"]}')
+
+        for name in snapshot['histograms']:
+            metric = f'{prefix}_{name}'
+            lines.append(f'# TYPE {metric} histogram')
+            for sample in snapshot['histograms'][name]:
+                labels = sample['labels']
+                for bound in sample['buckets']:
+                    bucketLabels = dict(labels)
+                    bucketLabels['le'] = repr(float(bound))
+                    lines.append(f'{metric}_bucket{_labels(bucketLabels)} '
+                                 f'{sample["buckets"][bound]}')
+                bucketLabels = dict(labels)
+                bucketLabels['le'] = '+Inf'
+                lines.append(f'{metric}_bucket{_labels(bucketLabels)} '
+                             f'{sample["count"]}')
+                lines.append(f'{metric}_sum{_labels(labels)} '
+                             f'{sample["sum"]!r}')
+                lines.append(f'{metric}_count{_labels(labels)} '
+                             f'{sample["count"]}')
+
+        return ('\n'.join(lines) + '\n')
+
+
+def _labels(labels):
+    """ Formats labels for the Prometheus text format """
+    if (len(labels) == 0):
+        return ('')
+    items = []
+    for name in labels:
+        value = str(labels[name]).replace('\\', '\\\\').replace('"', '\\"')
+        items.append(f'{name}="{value}"')
+    return ('{' + ','.join(items) + '}')
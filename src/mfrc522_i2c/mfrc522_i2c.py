@@ -8,13 +8,76 @@ __author__ = "Christoph Pranzl"
 __version__ = "0.0.5"
 __license__ = "GPLv3"
 
-from smbus import SMBus
+import functools
+import time
+
+from .bus import openBus
+from .cardtypes import MIFARE_4K_LAYOUT, UNKNOWN
+from .cardtypes import ULTRALIGHT_LAYOUT, classify, classifyVersion
+from .events import PresenceTracker, TagLeft
+
+
+def _crcTable():
+    """ Precomputes the lookup table for the ISO/IEC 14443-A CRC """
+    table = []
+    for i in range(256):
+        crc = i
+        for j in range(8):
+            if (crc & 0x01):
+                # Polynomial x^16 + x^12 + x^5 + 1, bit reversed
+                crc = (crc >> 1) ^ 0x8408
+            else:
+                crc = crc >> 1
+        table.append(crc)
+    return table
+
+
+def _exclusive(method=None, name=None):
+    """ Runs a command of the reader with exclusive access to the bus
+
+    Records the latency of the command if metrics are enabled, writes
+    queued by the transport are performed before the bus is released. The
+    command is named after the method unless a name is given with
+    @_exclusive(name=...).
+    """
+    if (method is None):
+        return (functools.partial(_exclusive, name=name))
+    if (name is None):
+        name = method.__name__
+
+    @functools.wraps(method)
+    def exclusive(self, *args, **kwargs):
+        with self.i2cBus.lock:
+            if (self.metrics is None):
+                return (flushed(self, *args, **kwargs))
+
+            # Bus transactions are attributed to the outermost command
+            outerCommand = self.activeCommand
+            if (outerCommand is None):
+                self.activeCommand = name
+            start = time.perf_counter()
+            try:
+                return (flushed(self, *args, **kwargs))
+            finally:
+                self.metrics.observe('command_seconds',
+                                     time.perf_counter() - start,
+                                     command=name)
+                self.activeCommand = outerCommand
+
+    def flushed(self, *args, **kwargs):
+        try:
+            return (method(self, *args, **kwargs))
+        finally:
+            self.transport.flush()
+
+    return (exclusive)
 
 
 class MFRC522:
     # Define register values from datasheet
     COMMANDREG = 0x01  # Start and stops command execution
     COMIENREG = 0x02  # Enable and disable interrupt request control bits
+    DIVIENREG = 0x03  # Enable and disable interrupt request control bits
     COMIRQREG = 0x04  # Interrupt request bits
     DIVIRQREG = 0x05  # Interrupt request bits
     ERRORREG = 0x06  # Error bits showing the error status of the last command
@@ -23,6 +86,7 @@ class MFRC522:
     FIFOLEVELREG = 0x0A  # Number of bytes stored in the FIFO buffer
     CONTROLREG = 0x0C  # Miscellaneous control register
     BITFRAMINGREG = 0x0D  # Adjustments for bit-oriented frames
+    COLLREG = 0x0E  # Bit position of the first bit-collision detected
     MODEREG = 0x11  # Defines general modes for transmitting and receiving
     TXCONTROLREG = 0x14  # Controls the logical behavior of the antenna pins
     TXASKREG = 0x15  # Controls the setting of the transmission modulation
@@ -32,8 +96,16 @@ class MFRC522:
     TPRESCALERREG = 0x2B  # Defines settings for internal timer
     TRELOADREGH = 0x2C  # Defines 16-bit timer reload value
     TRELOADREGL = 0x2D  # Defines 16-bit timer reload value
+    TCOUNTERVALREGH = 0x2E  # Shows the 16-bit timer value
+    TCOUNTERVALREGL = 0x2F  # Shows the 16-bit timer value
     VERSIONREG = 0x37  # Shows the software version
 
+    # Configuration registers only changed by the driver, their values can
+    # be kept in a shadow copy on the host
+    CACHED_REGISTERS = [COMIENREG, DIVIENREG, BITFRAMINGREG, MODEREG,
+                        TXCONTROLREG, TXASKREG, TMODEREG, TPRESCALERREG,
+                        TRELOADREGH, TRELOADREGL]
+
     # MFRC522 Commands
     MFRC522_IDLE = 0x00  # No actions, cancels current command execution
     MFRC522_CALCCRC = 0x03  # Activates the CRC coprocessor and performs
@@ -52,6 +124,8 @@ class MFRC522:
     MIFARE_SELECTCL1 = [0x93, 0x70]
     MIFARE_ANTICOLCL2 = [0x95, 0x20]
     MIFARE_SELECTCL2 = [0x95, 0x70]
+    MIFARE_ANTICOLCL3 = [0x97, 0x20]
+    MIFARE_SELECTCL3 = [0x97, 0x70]
     MIFARE_HALT = [0x50, 0x00]
     MIFARE_AUTHKEY1 = [0x60]
     MIFARE_AUTHKEY2 = [0x61]
@@ -62,6 +136,19 @@ class MFRC522:
     MIFARE_RESTORE = [0xC2]
     MIFARE_TRANSFER = [0xB0]
 
+    # MIFARE Ultralight and NTAG Commands
+    NTAG_GETVERSION = [0x60]
+    NTAG_READ = [0x30]
+    NTAG_FASTREAD = [0x3A]
+    NTAG_WRITE = [0xA2]
+    NTAG_COMPATWRITE = [0xA0]
+    NTAG_PWDAUTH = [0x1B]
+
+    # Ultralight and NTAG memory is organized in pages of 4 bytes, READ
+    # returns 4 pages at once
+    NTAG_PAGESIZE = 4
+    NTAG_READPAGES = 4
+
     # Mifare 1K EEPROM is arranged of 16 sectors. Each sector has 4 blocks and
     # each block has 16-byte. Block 0 is a special read-only data block that
     # keeps the manufacturer data and the UID of the tag. The sector trailer
@@ -108,19 +195,149 @@ class MFRC522:
                            240, 241, 242, 243, 244, 245, 246, 247, 248, 249,
                            250, 251, 252, 253, 254]
 
+    MIFARE_1K_SECTORCOUNT = 16
+    MIFARE_4K_SECTORCOUNT = 40
+
+    MIFARE_BLOCKSIZE = 16
+
     MIFARE_KEY = [0xFF, 0xFF, 0xFF, 0xFF, 0xFF, 0xFF]
 
+    # Acknowledge of the card, transmitted as 4 bit frame
+    MIFARE_ACK = 0x0A
+
+    # Indicates that the UID continues in the next cascade level
+    MIFARE_CASCADETAG = 0x88
+    MIFARE_ANTICOL = [MIFARE_ANTICOLCL1, MIFARE_ANTICOLCL2, MIFARE_ANTICOLCL3]
+    MIFARE_SELECT = [MIFARE_SELECTCL1, MIFARE_SELECTCL2, MIFARE_SELECTCL3]
+
     MIFARE_OK = 0
     MIFARE_NOTAGERR = 1
     MIFARE_ERR = 2
+    MIFARE_COLLISION = 3
 
     MAX_LEN = 16
 
-    def __init__(self, Bus, Address):
-        self.i2cBus = SMBus(Bus)
+    # Size of the FIFO buffer of the reader/writer
+    FIFO_SIZE = 64
+    # Pages per FAST_READ, the answer and its CRC have to fit into the FIFO
+    NTAG_FASTREAD_PAGES = (FIFO_SIZE - 2) // NTAG_PAGESIZE
+
+    # CRC calculation modes
+    CRC_SOFTWARE = 0  # Calculate the CRC on the host
+    CRC_COPROCESSOR = 1  # Use the CalcCRC command of the reader/writer
+    CRC_CROSSCHECK = 2  # Calculate on both and compare the results
+
+    # Preset value of the CRC_A as defined in ISO/IEC 14443-3
+    CRC_A_PRESET = 0x6363
+    CRC_A_TABLE = _crcTable()
+
+    # Clock of the reader/writer in Hz
+    CLOCK = 13.56e6
+    # Duration of one bit at 106 kBd and minimum frame delay time of the
+    # card in seconds
+    BIT_DURATION = 128 / CLOCK
+    FRAME_DELAY = 1172 / CLOCK
+    # Allowance in seconds for bus and scheduling latency on top of the
+    # timer period
+    TIMEOUT_MARGIN = 0.01
+    # The CRC coprocessor needs a few microseconds for the whole FIFO
+    CRC_TIMEOUT = 0.005
+    # Bounds of the interval in seconds between polls of the interrupt
+    # request bits once the expected frame time has passed
+    POLL_INTERVAL_MIN = 0.00005
+    POLL_INTERVAL_MAX = 0.002
+
+    # Prescaler of the timer, one tick takes (2 * 0xA9 + 1) / CLOCK = 25 us
+    TIMER_PRESCALER = 0xA9
+    # Timeout profiles, time in seconds the timer waits for the answer of
+    # the card after the end of the transmission
+    TIMEOUTS = {
+        'request': 0.001,  # REQA and WUPA, also on an empty field
+        'anticollision': 0.001,  # Anticollision and SELECT
+        'halt': 0.001,  # HLTA, the card must not answer within 1 ms
+        'authenticate': 0.005,  # Each exchange of MIFARE authentication
+        'command': 0.005,  # Reads and the first frame of two-step commands
+        'write': 0.025,  # Programming of the card memory
+        'value': 0.005,  # Value operand, the card only answers on errors
+    }
+    # Profiles whose success is an answer of the card, calibrate() tightens
+    # them to a multiple of the slowest answer, never below the minimum
+    CALIBRATED_TIMEOUTS = ('request', 'anticollision', 'command')
+    CALIBRATION_FACTOR = 4
+    # Four times the frame delay time of the card, about 350 us
+    CALIBRATION_MIN = 4 * FRAME_DELAY
+
+    def __init__(self, Bus, Address, blockTransfer=True,
+                 crcMode=CRC_SOFTWARE, registerCache=False, irq=None,
+                 blockCache=None, metrics=None, timeouts=None,
+                 calibrating=False):
+        # Handle shared with all readers on the same adapter, Bus is the
+        # number of an adapter, a Transport or an SMBus compatible object
+        self.i2cBus = openBus(Bus)
+        self.transport = self.i2cBus.transport
         self.i2cAddress = Address
-        self.__MFRC522_init()
-
+        # Move FIFO data with block transfers of the transport, falls back
+        # to one transaction per byte if the adapter does not support them
+        self.blockTransfer = blockTransfer
+        self.crcMode = crcMode
+        # Number of differences detected in CRC_CROSSCHECK mode
+        self.crcMismatches = 0
+        # Keep a shadow copy of the CACHED_REGISTERS to skip redundant
+        # reads and writes
+        self.registerCache = registerCache
+        self.__registerShadow = {}
+        # Optional GPIOInterrupt of the IRQ pin, replaces busy-polling of
+        # the interrupt request bits
+        self.irq = irq
+        # Optional BlockCache that answers reads of blocks already known
+        self.blockCache = blockCache
+        # Optional Metrics, counts bus transactions and records latencies
+        self.metrics = metrics
+        self.activeCommand = None
+        # Timeout profiles of this reader, overrides by profile name
+        self.timeouts = dict(self.TIMEOUTS)
+        if (timeouts is not None):
+            self.timeouts.update(timeouts)
+        # Profiles as configured, the upper bounds of the calibration
+        self.__configuredTimeouts = dict(self.timeouts)
+        # Record the response time of the cards per profile for calibrate()
+        self.calibrating = calibrating
+        self.responseTimes = {}
+        # Prescaler and reload value programmed into the timer
+        self.__timer = None
+        # Serial number, ATQA, SAK and type of the last selected card
+        self.serialNumber = None
+        self.atqa = None
+        self.sak = None
+        self.cardType = None
+        # The last selected card is in the ACTIVE state and the block, key
+        # type and key of its current authentication
+        self.__selected = False
+        self.__authenticatedBlock = None
+        self.__authenticatedKey = None
+        with self.i2cBus.lock:
+            # Bus transactions of the initialization are attributed to init
+            self.activeCommand = 'init'
+            try:
+                self.__MFRC522_init()
+                self.transport.flush()
+            finally:
+                self.activeCommand = None
+
+    def close(self):
+        """ Releases the bus, closes it if no other reader uses it """
+        if (self.i2cBus is not None):
+            self.i2cBus.close()
+            self.i2cBus = None
+            self.transport = None
+
+    def __enter__(self):
+        return (self)
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @_exclusive
     def getReaderVersion(self):
         version = None
 
@@ -133,22 +350,63 @@ class MFRC522:
 
         return (version)
 
+    @_exclusive
     def scan(self):
         """ Scans for a card and returns the UID"""
         status = None
         backData = []
         backBits = None
 
+        # A card in the ACTIVE state does not answer but falls back to IDLE
+        self.__selected = False
+
         # None bits of the last byte
         self.__MFRC522_write(self.BITFRAMINGREG, 0x07)
 
         buffer = []
         buffer.extend(self.MIFARE_REQUEST)
 
-        (status, backData, backBits) = self.__transceiveCard(buffer)
+        (status, backData, backBits) = self.__transceiveCard(
+            buffer, profile='request')
+
+        # Cards of different types answer with colliding ATQAs
+        if (status == self.MIFARE_COLLISION):
+            status = self.MIFARE_OK
 
         if ((status != self.MIFARE_OK) | (backBits != 0x10)):
             status = self.MIFARE_ERR
+        else:
+            self.atqa = list(backData)
+
+        return (status, backData, backBits)
+
+    @_exclusive
+    def wakeup(self):
+        """ Wakes up cards in the field, including halted ones """
+        status = None
+        backData = []
+        backBits = None
+
+        # A card in the ACTIVE state does not answer but falls back to IDLE
+        self.__selected = False
+
+        # None bits of the last byte
+        self.__MFRC522_write(self.BITFRAMINGREG, 0x07)
+
+        buffer = []
+        buffer.extend(self.MIFARE_WAKEUP)
+
+        (status, backData, backBits) = self.__transceiveCard(
+            buffer, profile='request')
+
+        # Cards of different types answer with colliding ATQAs
+        if (status == self.MIFARE_COLLISION):
+            status = self.MIFARE_OK
+
+        if ((status != self.MIFARE_OK) | (backBits != 0x10)):
+            status = self.MIFARE_ERR
+        else:
+            self.atqa = list(backData)
 
         return (status, backData, backBits)
 
@@ -165,34 +423,296 @@ class MFRC522:
         else:
             return True
 
+    @_exclusive
     def identify(self):
         """ Receives the serial number of the card"""
         status = None
         backData = []
         backBits = None
 
+        (status, backData) = self.__anticollision(0)
+        if (status == self.MIFARE_OK):
+            backBits = len(backData) * 8
+
+        return (status, backData, backBits)
+
+    def __anticollision(self, level, serialNumber=None, knownBits=0,
+                        branches=None):
+        """ Runs the anticollision loop of a cascade level
+
+        Collisions are resolved bit by bit, the branch with the bit set is
+        followed. The loop starts with the knownBits of serialNumber, only
+        cards with these bits answer. The branches with the bit cleared are
+        appended to branches as UID part and number of known bits. Returns
+        the status and the UID part with BCC.
+        """
+        status = None
+        if (serialNumber is None):
+            serialNumber = [0, 0, 0, 0, 0]
+        else:
+            serialNumber = list(serialNumber)
+
+        # All received bits will be cleared after a collision
+        ValuesAfterColl = 0x80
+        self.__MFRC522_clearBitMask(self.COLLREG, ValuesAfterColl)
+
+        while (knownBits <= 32):
+            knownBytes = knownBits // 8
+            txLastBits = knownBits % 8
+
+            # Number of valid bytes and bits sent in this frame
+            nvb = ((2 + knownBytes) << 4) | txLastBits
+
+            buffer = []
+            buffer.extend(self.MIFARE_ANTICOL[level][0:1])
+            buffer.append(nvb)
+            if (txLastBits):
+                buffer.extend(serialNumber[0:knownBytes + 1])
+            else:
+                buffer.extend(serialNumber[0:knownBytes])
+
+            # The first received bit is stored right after the sent bits
+            rxAlign = txLastBits
+            self.__MFRC522_write(self.BITFRAMINGREG,
+                                 (rxAlign << 4) | txLastBits)
+
+            (status, backData, backBits) = self.__transceiveCard(
+                buffer, profile='anticollision')
+            if ((status != self.MIFARE_OK) and
+                    (status != self.MIFARE_COLLISION)):
+                break
+
+            # Merge the received bits with the known bits
+            for i in range(0, len(backData)):
+                index = knownBytes + i
+                if (index >= len(serialNumber)):
+                    break
+                if ((i == 0) and (rxAlign)):
+                    mask = (0xFF << rxAlign) & 0xFF
+                    serialNumber[index] = ((serialNumber[index] & ~mask) |
+                                           (backData[i] & mask))
+                else:
+                    serialNumber[index] = backData[i]
+
+            if (status == self.MIFARE_OK):
+                break
+
+            # Position of the first collision in the received bits
+            collReg = self.__MFRC522_read(self.COLLREG)
+            CollPosNotValid = 0x20
+            if (collReg & CollPosNotValid):
+                status = self.MIFARE_ERR
+                break
+            collPos = collReg & 0x1F
+            if (collPos == 0):
+                collPos = 32
+
+            collisionBit = knownBytes * 8 + collPos - 1
+            if ((collisionBit < knownBits) or (collisionBit >= 32)):
+                status = self.MIFARE_ERR
+                break
+
+            if (branches is not None):
+                branch = list(serialNumber)
+                branch[collisionBit // 8] &= ~(1 << (collisionBit % 8))
+                branches.append((branch, collisionBit + 1))
+
+            # Continue with the cards that have a one at this position
+            serialNumber[collisionBit // 8] |= 1 << (collisionBit % 8)
+            knownBits = collisionBit + 1
+
+        # Restore full byte frames
+        self.__MFRC522_write(self.BITFRAMINGREG, 0x00)
+
+        if (status == self.MIFARE_OK):
+            if (not self.__serialNumberValid(serialNumber)):
+                status = self.MIFARE_ERR
+
+        return (status, serialNumber)
+
+    @_exclusive
+    def anticollision(self):
+        """ Resolves and selects the complete UID of one card
+
+        Runs anticollision and select on all cascade levels. Returns the
+        status, the UID with 4, 7 or 10 bytes and the SAK.
+        """
+        status = None
+        serialNumber = []
+        sak = None
+
+        # Indicates that the UID is not complete yet
+        CascadeBit = 0x04
+
+        for level in range(0, len(self.MIFARE_SELECT)):
+            (status, frame) = self.__anticollision(level)
+            if (status != self.MIFARE_OK):
+                break
+
+            (status, backData, backBits) = self.__selectLevel(level, frame)
+            if (status != self.MIFARE_OK):
+                break
+
+            sak = backData[0]
+            if (sak & CascadeBit):
+                serialNumber.extend(frame[1:4])
+            else:
+                serialNumber.extend(frame[0:4])
+                break
+
+        if (status == self.MIFARE_OK):
+            self.serialNumber = list(serialNumber)
+            self.sak = sak
+            self.cardType = classify(self.atqa, self.sak)
+            self.__selected = True
+
+        return (status, serialNumber, sak)
+
+    @_exclusive
+    def inventory(self, maxTags=16):
+        """ Enumerates all cards in the field
+
+        Searches the tree of UID bits. Every collision leaves the branch
+        with the bit cleared for a later pass, which wakes up all cards,
+        selects the UID parts of the lower cascade levels and resumes the
+        anticollision at the branch. A card is selected and halted when its
+        UID is complete, as the WUPA of every pass wakes up halted cards as
+        well, cards found in earlier rounds are enumerated again. Returns
+        the status and a list of UID, ATQA and SAK of each card. All cards
+        are left in the HALT state.
+        """
+        tags = []
+        uids = []
+
+        # Indicates that the UID is not complete yet
+        CascadeBit = 0x04
+
+        # Branches to search as frames of the lower cascade levels, UID
+        # part and number of known bits of the current level
+        branches = [([], None, 0)]
+        passes = 4 * maxTags
+        while ((len(branches) > 0) and (len(tags) < maxTags) and
+               (passes > 0)):
+            passes = passes - 1
+            (frames, serialNumber, knownBits) = branches.pop()
+
+            (status, backData, backBits) = self.wakeup()
+            if (status != self.MIFARE_OK):
+                continue
+            atqa = list(backData)
+
+            # All bits of the last byte
+            self.__MFRC522_write(self.BITFRAMINGREG, 0x00)
+            for level in range(0, len(frames)):
+                (status, backData, backBits) = self.__selectLevel(
+                    level, frames[level])
+                if (status != self.MIFARE_OK):
+                    break
+
+            level = len(frames)
+            while ((status == self.MIFARE_OK) and
+                   (level < len(self.MIFARE_SELECT))):
+                found = []
+                (status, frame) = self.__anticollision(level, serialNumber,
+                                                       knownBits, found)
+                for (branch, branchBits) in found:
+                    branches.append((list(frames), branch, branchBits))
+                if (status != self.MIFARE_OK):
+                    break
+
+                (status, backData, backBits) = self.__selectLevel(level,
+                                                                  frame)
+                if (status != self.MIFARE_OK):
+                    break
+
+                sak = backData[0]
+                frames = frames + [frame]
+                if (sak & CascadeBit):
+                    # Continue with the next cascade level
+                    level = level + 1
+                    serialNumber = None
+                    knownBits = 0
+                    continue
+
+                uid = []
+                for part in frames[:-1]:
+                    uid.extend(part[1:4])
+                uid.extend(frame[0:4])
+                if (uid not in uids):
+                    uids.append(uid)
+                    tags.append((uid, atqa, sak))
+                self.serialNumber = list(uid)
+                self.sak = sak
+                self.cardType = classify(atqa, sak)
+                self.halt()
+                break
+
+        if (len(tags) > 0):
+            status = self.MIFARE_OK
+        else:
+            status = self.MIFARE_NOTAGERR
+
+        return (status, tags)
+
+    def events(self, interval=0.1, debounce=0.3, dwell=0.0):
+        """ Yields TagArrived and TagLeft events until closed
+
+        The field is enumerated every interval seconds. A card has to be
+        seen for dwell seconds to arrive and has to be missing for debounce
+        seconds to leave, a card lying on the reader causes no events.
+        """
+        tracker = PresenceTracker(debounce, dwell)
+        while True:
+            (status, tags) = self.inventory()
+            for event in tracker.update(tags, time.monotonic()):
+                if ((self.blockCache is not None) and
+                        (isinstance(event, TagLeft))):
+                    self.blockCache.invalidate(event.uid)
+                yield event
+            time.sleep(interval)
+
+    @_exclusive
+    def halt(self):
+        """ Puts the selected card into the HALT state """
+        status = None
+        backData = []
+        backBits = None
+
         # All bits of the last byte
         self.__MFRC522_write(self.BITFRAMINGREG, 0x00)
 
         buffer = []
-        buffer.extend(self.MIFARE_ANTICOLCL1)
+        buffer.extend(self.MIFARE_HALT)
 
-        (status, backData, backBits) = self.__transceiveCard(buffer)
+        crc = self.__calculateCRC(buffer)
+        buffer.extend(crc)
 
-        if (status == self.MIFARE_OK):
-            if (self.__serialNumberValid(backData)):
-                status = self.MIFARE_OK
-            else:
-                status = self.MIFARE_ERR
+        (status, backData, backBits) = self.__transceiveCard(
+            buffer, profile='halt')
+
+        # The card does not answer a HLTA, any answer is an error
+        if (status == self.MIFARE_NOTAGERR):
+            status = self.MIFARE_OK
+        else:
+            status = self.MIFARE_ERR
+        self.__selected = False
+
+        # Following requests have to be sent unencrypted
+        self.deauthenticate()
 
         return (status, backData, backBits)
 
-    def __transceiveCard(self, data):
-        """ Transceives data trough the reader/writer from and to the card """
+    def __transceiveCard(self, data, maxLen=None, profile='command'):
+        """ Transceives data trough the reader/writer from and to the card
+
+        The timer is programmed for the timeout profile of the command
+        """
         status = None
         backData = []
         backBits = None
 
+        self.__useTimeout(profile)
+
         IRqInv = 0x80  # Signal on pin IRQ is inverted
         TxIEn = 0x40  # Allow the transmitter to interrupt requests
         RxIEn = 0x20  # Allow the receiver to interrupt requests
@@ -200,29 +720,43 @@ class MFRC522:
         LoAlertIEn = 0x04  # Allow the low Alert interrupt request
         ErrIEn = 0x02  # Allow the error interrupt request
         TimerIEn = 0x01  # Allow the timer interrupt request
-        self.__MFRC522_write(self.COMIENREG, (IRqInv |
-                                              TxIEn |
-                                              RxIEn |
-                                              IdleIEn |
-                                              LoAlertIEn |
-                                              ErrIEn |
-                                              TimerIEn))
-
-        # Indicates that the bits in the ComIrqReg register are set
+        if (self.irq is not None):
+            # Only the interrupts that terminate the command may drive the
+            # IRQ pin
+            self.__MFRC522_write(self.COMIENREG, (IRqInv |
+                                                  RxIEn |
+                                                  IdleIEn |
+                                                  TimerIEn))
+        else:
+            self.__MFRC522_write(self.COMIENREG, (IRqInv |
+                                                  TxIEn |
+                                                  RxIEn |
+                                                  IdleIEn |
+                                                  LoAlertIEn |
+                                                  ErrIEn |
+                                                  TimerIEn))
+
+        # Indicates that the bits in the ComIrqReg register are set, writing
+        # the interrupt request bits without Set1 clears all of them
         Set1 = 0x80
-        self.__MFRC522_clearBitMask(self.COMIRQREG, Set1)
+        self.__MFRC522_write(self.COMIRQREG, (~Set1) & 0xFF)
+        if (self.irq is not None):
+            # Edges up to the clearing of the interrupt request bits are
+            # stale
+            self.transport.flush()
+            self.irq.clear()
 
         # Immediatly clears the internal FIFO buffer's read and write pointer
-        # and ErrorReg register's BufferOvfl bit
+        # and ErrorReg register's BufferOvfl bit, the remaining bits are read
+        # only
         FlushBuffer = 0x80
-        self.__MFRC522_setBitMask(self.FIFOLEVELREG, FlushBuffer)
+        self.__MFRC522_write(self.FIFOLEVELREG, FlushBuffer)
 
         # Cancel running commands
         self.__MFRC522_write(self.COMMANDREG, self.MFRC522_IDLE)
 
         # Write data in FIFO register
-        for i in range(0, len(data)):
-            self.__MFRC522_write(self.FIFODATAREG, data[i])
+        self.__MFRC522_writeBlock(self.FIFODATAREG, data)
 
         # Countinously repeat the transmission of data from the FIFO buffer and
         # the reception of data from the RF field.
@@ -240,29 +774,17 @@ class MFRC522:
         # A command was terminated or unknown command is started
         IdleIRq = 0x10
 
-        # Wait for an interrupt
-        i = 2000
-        while True:
-            comIRqReg = self.__MFRC522_read(self.COMIRQREG)
-            if (comIRqReg & TimerIRq):
-                # Timeout
-                break
-            if (comIRqReg & RxIRq):
-                # Valid data available in FIFO
-                break
-            if (comIRqReg & IdleIRq):
-                # Command terminate
-                break
-            if (i == 0):
-                # Watchdog expired
-                break
-            i -= 1
+        # Wait for a timeout, valid data in the FIFO or command termination
+        comIRqReg = self.__waitForInterrupt(self.COMIRQREG,
+                                            TimerIRq | RxIRq | IdleIRq,
+                                            self.__commandTimeout(),
+                                            self.__frameTime(len(data)))
 
         # Clear the StartSend bit in BitFramingReg register
         self.__MFRC522_clearBitMask(self.BITFRAMINGREG, StartSend)
 
         # Retrieve data from FIFODATAREG
-        if (i != 0):
+        if (comIRqReg is not None):
             # The host or a MFRC522's internal state machine tries to write
             # data to the FIFO buffer even though it is already full
             BufferOvfl = 0x10
@@ -273,32 +795,56 @@ class MFRC522:
             # Set to logic 1 if the SOF is incorrect
             ProtocolErr = 0x01
 
-            errorTest = (BufferOvfl | ColErr | ParityErr | ProtocolErr)
-            errorReg = self.__MFRC522_read(self.ERRORREG)
+            errorTest = (BufferOvfl | ParityErr | ProtocolErr)
+            if (comIRqReg & RxIRq):
+                # Level and last bits of the received data are needed as
+                # well, read together where the transport combines them
+                registers = [self.ERRORREG, self.FIFOLEVELREG,
+                             self.CONTROLREG]
+                if (self.calibrating):
+                    registers.extend([self.TCOUNTERVALREGH,
+                                      self.TCOUNTERVALREGL])
+                values = self.__MFRC522_readRegisters(registers)
+                (errorReg, fifoLevelReg, controlReg) = values[0:3]
+                if (self.calibrating):
+                    self.__recordResponse(profile, values[3:5])
+            else:
+                errorReg = self.__MFRC522_read(self.ERRORREG)
+                fifoLevelReg = None
 
             # Test if any of the errors above happend
-            if (~(errorReg & errorTest)):
+            if (not (errorReg & errorTest)):
                 status = self.MIFARE_OK
 
-                # Indicates any error bit in thr ErrorReg register is set
-                ErrIRq = 0x02
-
-                # Test if the timer expired and an error occured
-                if (comIRqReg & TimerIRq & ErrIRq):
+                # Test if the timer expired without a response of the card
+                if ((comIRqReg & TimerIRq) and (not (comIRqReg & RxIRq))):
                     status = self.MIFARE_NOTAGERR
+                elif (errorReg & ColErr):
+                    # Several cards answered at the same time, the bits up
+                    # to the collision are valid
+                    status = self.MIFARE_COLLISION
 
-                fifoLevelReg = self.__MFRC522_read(self.FIFOLEVELREG)
+            else:
+                status = self.MIFARE_ERR
+
+            if ((status == self.MIFARE_OK) or
+                    (status == self.MIFARE_COLLISION)):
+                if (fifoLevelReg is None):
+                    fifoLevelReg = self.__MFRC522_read(self.FIFOLEVELREG)
+                    controlReg = self.__MFRC522_read(self.CONTROLREG)
 
                 # Edge cases
                 if fifoLevelReg == 0:
                     fifoLevelReg = 1
-                if fifoLevelReg > self.MAX_LEN:
-                    fifoLevelReg = self.MAX_LEN
+                if (maxLen is None):
+                    maxLen = self.MAX_LEN
+                if fifoLevelReg > maxLen:
+                    fifoLevelReg = maxLen
 
                 # Indicates the number of valid bits in the last received byte
-                RxLastBits = 0x08
+                RxLastBits = 0x07
 
-                lastBits = self.__MFRC522_read(self.CONTROLREG) & RxLastBits
+                lastBits = controlReg & RxLastBits
 
                 if (lastBits != 0):
                     backBits = (fifoLevelReg - 1) * 8 + lastBits
@@ -306,73 +852,286 @@ class MFRC522:
                     backBits = fifoLevelReg * 8
 
                 # Read data from FIFO register
-                for i in range(0, fifoLevelReg):
-                    backData.append(self.__MFRC522_read(self.FIFODATAREG))
+                backData.extend(self.__MFRC522_readBlock(self.FIFODATAREG,
+                                                         fifoLevelReg))
 
-            else:
-                status.MIFARE_ERR
+        else:
+            # Deadline passed without an interrupt of the reader/writer
+            status = self.MIFARE_ERR
+
+        if (self.metrics is not None):
+            self.__countResult(status, comIRqReg)
 
         return (status, backData, backBits)
 
+    def __countResult(self, status, irqReg):
+        """ Counts the outcome of an exchange with the card """
+        if (irqReg is None):
+            result = 'deadline'
+        elif (status == self.MIFARE_NOTAGERR):
+            result = 'timeout'
+        elif (status == self.MIFARE_COLLISION):
+            result = 'collision'
+        elif (status == self.MIFARE_OK):
+            result = 'ok'
+        else:
+            result = 'error'
+        self.metrics.count('card_results', command=str(self.activeCommand),
+                           result=result)
+
+    def __countTransaction(self, name, address):
+        """ Counts a bus transaction per register and command """
+        self.metrics.count(name, register=f'0x{address:02X}',
+                           command=str(self.activeCommand))
+
+    def __waitForInterrupt(self, address, waitIRq, timeout, frameTime=0):
+        """ Waits until one of the interrupt request bits is set
+
+        Returns the interrupt request register or None if the deadline
+        expired first
+        """
+        # Queued writes start the command
+        self.transport.flush()
+        deadline = time.monotonic() + timeout
+
+        if ((self.irq is not None) and (address == self.COMIRQREG)):
+            # Block on the IRQ pin and read the interrupt request bits once
+            # per edge
+            while True:
+                edge = self.irq.wait(max(deadline - time.monotonic(), 0))
+                irqReg = self.__MFRC522_read(address)
+                if (self.metrics is not None):
+                    self.__countTransaction('wait_polls', address)
+                if (irqReg & waitIRq):
+                    return (irqReg)
+                if (not edge):
+                    # Deadline expired
+                    return (None)
+
+        # A response can not arrive before the frame has been sent
+        if (frameTime > 0):
+            time.sleep(frameTime)
+
+        delay = 0
+        while True:
+            irqReg = self.__MFRC522_read(address)
+            if (self.metrics is not None):
+                self.__countTransaction('wait_polls', address)
+            if (irqReg & waitIRq):
+                return (irqReg)
+            now = time.monotonic()
+            if (now >= deadline):
+                # Deadline expired
+                return (None)
+            # Back off while the card is taking longer
+            if (delay > 0):
+                time.sleep(min(delay, deadline - now))
+            delay = min(max(2 * delay, self.POLL_INTERVAL_MIN),
+                        self.POLL_INTERVAL_MAX)
+
+    def __frameTime(self, length):
+        """ Time to transmit length bytes until the card may respond """
+        # Start bit, eight data bits plus parity per byte and end of
+        # communication
+        return ((length * 9 + 2) * self.BIT_DURATION + self.FRAME_DELAY)
+
+    def __commandTimeout(self):
+        """ Deadline of a command derived from the timer settings """
+        return (self.timerPeriod + self.TIMEOUT_MARGIN)
+
     def __calculateCRC(self, data):
+        """ Calculates the CRC according to the selected mode """
+        if (self.crcMode == self.CRC_SOFTWARE):
+            return (self.calculateCRC(data))
+
+        crc = self.__calculateCoprocessorCRC(data)
+        if (self.crcMode == self.CRC_CROSSCHECK):
+            if (crc != self.calculateCRC(data)):
+                self.crcMismatches = self.crcMismatches + 1
+
+        return (crc)
+
+    def calculateCRC(self, data):
+        """ Calculates the ISO/IEC 14443-A CRC on the host """
+        crc = self.CRC_A_PRESET
+        for byte in data:
+            crc = (crc >> 8) ^ self.CRC_A_TABLE[(crc ^ byte) & 0xFF]
+
+        return ([crc & 0xFF, crc >> 8])
+
+    def __calculateCoprocessorCRC(self, data):
         """ Uses the reader/writer to calculate CRC """
         # Clear the bit that indicates taht the CalcCRC command is active
-        # and all data is processed
+        # and all data is processed, writing the bit without Set2 clears it
         CRCIRq = 0x04
-        self.__MFRC522_clearBitMask(self.DIVIRQREG, CRCIRq)
+        self.__MFRC522_write(self.DIVIRQREG, CRCIRq)
 
         # Immedialty clears the internal FIFO buffer's read and write pointer
-        # and ErrorReg register's BufferOvfl bit
+        # and ErrorReg register's BufferOvfl bit, the remaining bits are read
+        # only
         FlushBuffer = 0x80
-        self.__MFRC522_setBitMask(self.FIFOLEVELREG, FlushBuffer)
+        self.__MFRC522_write(self.FIFOLEVELREG, FlushBuffer)
 
         # Write data to FIFO
-        i = 0
-        while (i < len(data)):
-            self.__MFRC522_write(self.FIFODATAREG, data[i])
-            i = i + 1
+        self.__MFRC522_writeBlock(self.FIFODATAREG, data)
 
         # Execute CRC calculation
         self.__MFRC522_write(self.COMMANDREG, self.MFRC522_CALCCRC)
-        i = 255
-        while True:
-            divirqreg = self.__MFRC522_read(self.DIVIRQREG)
-            i = i - 1
-            if (i == 0):
-                # Watchdog expired
-                break
-            if (divirqreg & CRCIRq):
-                # CRC is calculated
-                break
+        self.__waitForInterrupt(self.DIVIRQREG, CRCIRq, self.CRC_TIMEOUT)
 
         # Retrieve CRC from CRCRESULTREG
-        crc = []
-        crc.append(self.__MFRC522_read(self.CRCRESULTREGLSB))
-        crc.append(self.__MFRC522_read(self.CRCRESULTREGMSB))
+        crc = self.__MFRC522_readRegisters([self.CRCRESULTREGLSB,
+                                            self.CRCRESULTREGMSB])
 
         return (crc)
 
+    @_exclusive
     def select(self, serialNumber):
-        """ Selects a card with a given serial number """
+        """ Selects a card with a given serial number
+
+        The serial number is either the UID with BCC as returned by
+        identify() or a complete UID with 4, 7 or 10 bytes. A card that
+        indicates a longer UID than the serial number is not selected, the
+        status is MIFARE_ERR then. anticollision() selects cards with UIDs
+        of any length. serialNumber is set to the UID without BCC.
+        """
         status = None
         backData = []
         backBits = None
 
-        buffer = []
-        buffer.extend(self.MIFARE_SELECTCL1)
+        # Indicates that the UID is not complete yet
+        CascadeBit = 0x04
 
-        i = 0
-        while (i < 5):
-            buffer.append(serialNumber[i])
-            i = i + 1
+        # All bits of the last byte
+        self.__MFRC522_write(self.BITFRAMINGREG, 0x00)
+
+        frames = self.__cascadeFrames(serialNumber)
+        for level in range(0, len(frames)):
+            (status, backData, backBits) = self.__selectLevel(level,
+                                                              frames[level])
+            if (status != self.MIFARE_OK):
+                break
+
+        if ((status == self.MIFARE_OK) and (backData[0] & CascadeBit)):
+            # Only a part of the UID of the card was selected
+            status = self.MIFARE_ERR
+
+        if (status == self.MIFARE_OK):
+            self.serialNumber = self.__uidOf(serialNumber)
+            # Select acknowledge, determines the type of the card
+            self.sak = backData[0]
+            self.cardType = classify(self.atqa, self.sak)
+            self.__selected = True
+
+        return (status, backData, backBits)
+
+    def __uidOf(self, serialNumber):
+        """ Returns the UID of a serial number without the BCC of a frame """
+        if (len(serialNumber) == 5):
+            return (list(serialNumber[0:4]))
+        return (list(serialNumber))
+
+    def __cascadeFrames(self, serialNumber):
+        """ Splits a serial number into the frames of the cascade levels """
+        if (len(serialNumber) == 5):
+            return ([list(serialNumber)])
+
+        if (len(serialNumber) == 4):
+            parts = [list(serialNumber)]
+        elif (len(serialNumber) == 7):
+            parts = [[self.MIFARE_CASCADETAG] + list(serialNumber[0:3]),
+                     list(serialNumber[3:7])]
+        else:
+            parts = [[self.MIFARE_CASCADETAG] + list(serialNumber[0:3]),
+                     [self.MIFARE_CASCADETAG] + list(serialNumber[3:6]),
+                     list(serialNumber[6:10])]
+
+        frames = []
+        for part in parts:
+            # Block check character
+            bcc = 0
+            for byte in part:
+                bcc = bcc ^ byte
+            frames.append(part + [bcc])
+
+        return (frames)
+
+    def __selectLevel(self, level, frame):
+        """ Selects the UID part with BCC of a cascade level """
+        buffer = []
+        buffer.extend(self.MIFARE_SELECT[level])
+        buffer.extend(frame)
 
         crc = self.__calculateCRC(buffer)
         buffer.extend(crc)
 
-        (status, backData, backBits) = self.__transceiveCard(buffer)
+        (status, backData, backBits) = self.__transceiveCard(
+            buffer, profile='anticollision')
+
+        # Select acknowledge followed by its CRC
+        if (status == self.MIFARE_OK):
+            if ((len(backData) != 3) or
+                    (self.calculateCRC(backData[0:1]) != backData[1:3])):
+                status = self.MIFARE_ERR
 
         return (status, backData, backBits)
 
+    @_exclusive
+    def is_present(self, uid):
+        """ Checks if a card is still in the field
+
+        A card that is still selected is probed with a single read that
+        keeps it selected: a block of the authenticated sector on MIFARE
+        Classic, page 0 on Ultralight and NTAG. Otherwise the card is woken
+        up and selected by its UID, a previous authentication is lost then.
+        """
+        uid = self.__uidOf(uid)
+
+        if ((self.__selected) and (self.serialNumber == uid)):
+            blockAddr = None
+            if (self.__authenticatedBlock is not None):
+                blockAddr = self.__authenticatedBlock
+            elif ((self.cardType is not None) and
+                  (self.cardType.layout is not None) and
+                  (self.cardType.layout.blockSize == self.NTAG_PAGESIZE)):
+                # Ultralight and NTAG, also once the exact type is known
+                blockAddr = 0
+
+            if (blockAddr is not None):
+                (status, backData, backBits) = self.__readCard(blockAddr)
+                if ((status == self.MIFARE_OK) and
+                        (len(backData) == self.MIFARE_BLOCKSIZE)):
+                    return (True)
+                # The card falls back to IDLE after a failed read
+                self.__selected = False
+
+        selected = self.__selected
+        self.deauthenticate()
+
+        (status, backData, backBits) = self.wakeup()
+        if ((status != self.MIFARE_OK) and (selected)):
+            # The first request only moved the ACTIVE card back to IDLE
+            (status, backData, backBits) = self.wakeup()
+        if (status == self.MIFARE_OK):
+            (status, backData, backBits) = self.select(uid)
+
+        if ((status != self.MIFARE_OK) and (self.blockCache is not None)):
+            # The card left the field, its content may change meanwhile
+            self.blockCache.invalidate(uid)
+
+        return (status == self.MIFARE_OK)
+
+    def __reselect(self, serialNumber):
+        """ Brings a card back to the selected state after an error """
+        self.deauthenticate()
+
+        (status, backData, backBits) = self.wakeup()
+        if (status == self.MIFARE_OK):
+            (status, backData, backBits) = self.select(serialNumber)
+
+        return (status)
+
+    @_exclusive
     def authenticate(self, mode, blockAddr, key, serialNumber):
         """ Authenticates the card """
         status = None
@@ -384,6 +1143,10 @@ class MFRC522:
         buffer.append(blockAddr)
         buffer.extend(key)
 
+        # Cards with double or triple size UID use the last four bytes
+        if (len(serialNumber) in (7, 10)):
+            serialNumber = serialNumber[-4:]
+
         i = 0
         while (i < 4):
             buffer.append(serialNumber[i])
@@ -391,8 +1154,17 @@ class MFRC522:
 
         (status, backData, backBits) = self.__authenticateCard(buffer)
 
+        if (status == self.MIFARE_OK):
+            self.__authenticatedBlock = blockAddr
+            self.__authenticatedKey = (list(mode), list(key))
+        else:
+            # The card falls back to IDLE after a failed authentication
+            self.__authenticatedBlock = None
+            self.__selected = False
+
         return (status, backData, backBits)
 
+    @_exclusive
     def deauthenticate(self):
         """ Deauthenticates the card """
         # Indicates that the MIFARE Crypto1 unit is switched on and
@@ -401,34 +1173,48 @@ class MFRC522:
         # the MFAuthent command
         MFCrypto1On = 0x08
         self.__MFRC522_clearBitMask(self.STATUS2REG, MFCrypto1On)
+        self.__authenticatedBlock = None
 
     def __authenticateCard(self, data):
         status = None
         backData = []
         backBits = None
 
+        self.__useTimeout('authenticate')
+
         IRqInv = 0x80  # Signal on pin IRQ is inverted
         IdleIEn = 0x10  # Allow the idle interrupt request
         ErrIEn = 0x02  # Allow the error interrupt request
-        self.__MFRC522_write(self.COMIENREG, (IRqInv | IdleIEn | ErrIEn))
+        TimerIEn = 0x01  # Allow the timer interrupt request
+        if (self.irq is not None):
+            # A failed authentication is only terminated by the timer
+            self.__MFRC522_write(self.COMIENREG, (IRqInv |
+                                                  IdleIEn |
+                                                  TimerIEn))
+        else:
+            self.__MFRC522_write(self.COMIENREG, (IRqInv | IdleIEn | ErrIEn))
 
-        # Indicates that the bits in the ComIrqReg register are set
+        # Indicates that the bits in the ComIrqReg register are set, writing
+        # the interrupt request bits without Set1 clears all of them
         Set1 = 0x80
-        self.__MFRC522_clearBitMask(self.COMIRQREG, Set1)
+        self.__MFRC522_write(self.COMIRQREG, (~Set1) & 0xFF)
+        if (self.irq is not None):
+            # Edges up to the clearing of the interrupt request bits are
+            # stale
+            self.transport.flush()
+            self.irq.clear()
 
         # Immedialty clears the interl FIFO buffer's read and write pointer
-        # and ErrorReg register's BufferOvfl bit
+        # and ErrorReg register's BufferOvfl bit, the remaining bits are read
+        # only
         FlushBuffer = 0x80
-        self.__MFRC522_setBitMask(self.FIFOLEVELREG, FlushBuffer)
+        self.__MFRC522_write(self.FIFOLEVELREG, FlushBuffer)
 
         # Cancel running commands
         self.__MFRC522_write(self.COMMANDREG, self.MFRC522_IDLE)
 
         # Write data in FIFO register
-        i = 0
-        while (i < len(data)):
-            self.__MFRC522_write(self.FIFODATAREG, data[i])
-            i = i + 1
+        self.__MFRC522_writeBlock(self.FIFODATAREG, data)
 
         # This command manages MIFARE authentication to anable a secure
         # communication to any MIFARE card
@@ -441,30 +1227,18 @@ class MFRC522:
         # A command was terminated or unknown command is started
         IdleIRq = 0x10
 
-        # Wait for an interrupt
-        i = 2000
-        while True:
-            comIRqReg = self.__MFRC522_read(self.COMIRQREG)
-            if (comIRqReg & TimerIRq):
-                # Timeout
-                break
-            if (comIRqReg & RxIRq):
-                # Valid data available in FIFO
-                break
-            if (comIRqReg & IdleIRq):
-                # Command terminate
-                break
-            if (i == 0):
-                # Watchdog expired
-                break
-            i -= 1
+        # Wait for a timeout, valid data in the FIFO or command termination
+        comIRqReg = self.__waitForInterrupt(self.COMIRQREG,
+                                            TimerIRq | RxIRq | IdleIRq,
+                                            self.__commandTimeout(),
+                                            self.__frameTime(len(data)))
 
         # Clear the StartSend bit in BitFramingReg register
         StartSend = 0x80
         self.__MFRC522_clearBitMask(self.BITFRAMINGREG, StartSend)
 
         # Retrieve data from FIFODATAREG
-        if (i != 0):
+        if (comIRqReg is not None):
             # The host or a MFRC522's internal state machine tries to write
             # data to the FIFO buffer even though it is already full
             BufferOvfl = 0x10
@@ -479,27 +1253,77 @@ class MFRC522:
             errorReg = self.__MFRC522_read(self.ERRORREG)
 
             # Test if any of the errors above happend
-            if (~(errorReg & errorTest)):
+            if (not (errorReg & errorTest)):
                 status = self.MIFARE_OK
 
-                # Indicates any error bit in thr ErrorReg register is set
-                ErrIRq = 0x02
-
-                # Test if the timer expired and an error occured
-                if (comIRqReg & TimerIRq & ErrIRq):
+                # Test if the timer expired without a response of the card
+                if ((comIRqReg & TimerIRq) and (not (comIRqReg & IdleIRq))):
                     status = self.MIFARE_NOTAGERR
 
             else:
                 status = self.MIFARE_ERR
 
+        else:
+            # Deadline passed without an interrupt of the reader/writer
+            status = self.MIFARE_ERR
+
+        if (self.metrics is not None):
+            self.__countResult(status, comIRqReg)
+
         return (status, backData, backBits)
 
+    @_exclusive
     def read(self, blockAddr):
-        """ Reads data from the card """
+        """ Reads data from the card
+
+        Blocks held by the block cache are returned without accessing the
+        card while it is selected, except for the sectors that have to be
+        verified
+        """
         status = None
         backData = []
         backBits = None
 
+        cache = self.blockCache
+        if (self.__cacheAnswers(blockAddr)):
+            backData = cache.get(self.serialNumber, blockAddr)
+            if (backData is not None):
+                return (self.MIFARE_OK, backData, len(backData) * 8)
+            backData = []
+
+        (status, backData, backBits) = self.__readCard(blockAddr)
+
+        if ((status == self.MIFARE_OK) and (cache is not None) and
+                (self.serialNumber is not None) and
+                (len(backData) == self.MIFARE_BLOCKSIZE)):
+            cache.put(self.serialNumber, blockAddr, backData)
+
+        return (status, backData, backBits)
+
+    def __cacheAnswers(self, blockAddr):
+        """ Checks if the block cache may answer a read of a block
+
+        Only blocks of the selected card are answered, blocks of a MIFARE
+        Classic card only while their sector is authenticated
+        """
+        if ((self.blockCache is None) or (self.serialNumber is None) or
+                (not self.__selected)):
+            return (False)
+
+        sector = self.sectorOfBlock(blockAddr)
+        if (self.blockCache.verifies(sector)):
+            return (False)
+        if ((self.cardType is not None) and (not self.cardType.classic)):
+            return (True)
+        return ((self.__authenticatedBlock is not None) and
+                (self.sectorOfBlock(self.__authenticatedBlock) == sector))
+
+    def __readCard(self, blockAddr):
+        """ Reads a block from the card, bypassing the block cache
+
+        Only an answer of 16 bytes with a valid CRC is a success, a NAK of
+        the card is an error
+        """
         buffer = []
         buffer.extend(self.MIFARE_READ)
         buffer.append(blockAddr)
@@ -507,16 +1331,24 @@ class MFRC522:
         crc = self.__calculateCRC(buffer)
         buffer.extend(crc)
 
-        (status, backData, backBits) = self.__transceiveCard(buffer)
+        (status, backData, backBits) = self.__transceiveCard(
+            buffer, self.MIFARE_BLOCKSIZE + 2)
+        (status, backData) = self.__checkedResponse(status, backData,
+                                                    self.MIFARE_BLOCKSIZE)
 
-        return (status, backData, backBits)
+        return (status, backData, len(backData) * 8)
 
+    @_exclusive
     def write(self, blockAddr, data):
         """ Writes data to the card """
         status = None
         backData = []
         backBits = None
 
+        if ((self.blockCache is not None) and
+                (self.serialNumber is not None)):
+            self.blockCache.invalidate(self.serialNumber, blockAddr)
+
         buffer = []
         buffer.extend(self.MIFARE_WRITE)
         buffer.append(blockAddr)
@@ -525,6 +1357,7 @@ class MFRC522:
         buffer.extend(crc)
 
         (status, backData, backBits) = self.__transceiveCard(buffer)
+        status = self.__acknowledged(status, backData)
 
         if (status == self.MIFARE_OK):
 
@@ -534,44 +1367,692 @@ class MFRC522:
             crc = self.__calculateCRC(buffer)
             buffer.extend(crc)
 
-            (status, backData, backBits) = self.__transceiveCard(buffer)
+            (status, backData, backBits) = self.__transceiveCard(
+                buffer, profile='write')
+            status = self.__acknowledged(status, backData)
 
         return (status, backData, backBits)
 
-    def __MFRC522_antennaOn(self):
-        """ Activates the reader/writer antenna """
-        value = self.__MFRC522_read(self.TXCONTROLREG)
-        if (~(value & 0x03)):
-            self.__MFRC522_setBitMask(self.TXCONTROLREG, 0x03)
+    def __acknowledged(self, status, backData):
+        """ Checks that the card answered with an ACK """
+        if (status == self.MIFARE_OK):
+            if ((len(backData) == 0) or
+                    ((backData[0] & 0x0F) != self.MIFARE_ACK)):
+                # A NAK sends the card back to IDLE
+                self.__selected = False
+                status = self.MIFARE_ERR
+
+        return (status)
+
+    def __encodeValue(self, value, address):
+        """ Returns a value block with its redundant copies """
+        raw = list((value & 0xFFFFFFFF).to_bytes(4, 'little'))
+        inverted = [byte ^ 0xFF for byte in raw]
+        return (raw + inverted + raw +
+                [address, address ^ 0xFF, address, address ^ 0xFF])
+
+    def __decodeValue(self, data):
+        """ Returns value and address of a value block or None """
+        if (len(data) != self.MIFARE_BLOCKSIZE):
+            return (None)
+        for i in range(4):
+            if ((data[i] != data[i + 8]) or
+                    (data[i] != data[i + 4] ^ 0xFF)):
+                return (None)
+        if ((data[12] != data[14]) or (data[13] != data[15]) or
+                (data[12] != data[13] ^ 0xFF)):
+            return (None)
+        value = int.from_bytes(bytes(data[0:4]), 'little', signed=True)
+        return ((value, data[12]))
+
+    @_exclusive
+    def format_value_block(self, blockAddr, value, address=None):
+        """ Writes a value block, the card has to be authenticated
+
+        address is stored along with the value for backup management and
+        defaults to the block address
+        """
+        if (address is None):
+            address = blockAddr
+        if ((blockAddr == 0) or (blockAddr not in self.layout()) or
+                (self.layout().isTrailer(blockAddr)) or
+                (not (-0x80000000 <= value <= 0x7FFFFFFF))):
+            return (self.MIFARE_ERR, [], None)
+
+        return (self.write(blockAddr, self.__encodeValue(value, address)))
+
+    @_exclusive
+    def read_value(self, blockAddr):
+        """ Reads a value block, the card has to be authenticated
+
+        Returns the status, the value and the address stored with it. The
+        status is MIFARE_ERR if the block is not in value block format.
+        """
+        (status, backData, backBits) = self.read(blockAddr)
+        if (status != self.MIFARE_OK):
+            return (status, None, None)
+
+        decoded = self.__decodeValue(backData)
+        if (decoded is None):
+            return (self.MIFARE_ERR, None, None)
+
+        return (status, decoded[0], decoded[1])
+
+    def __valueOperation(self, command, blockAddr, operand):
+        """ Loads a value block into the transfer buffer of the card
+
+        The card acknowledges the command, the operand is not answered
+        """
+        if (not (0 <= operand <= 0x7FFFFFFF)):
+            return (self.MIFARE_ERR, [], None)
+
+        buffer = []
+        buffer.extend(command)
+        buffer.append(blockAddr)
+
+        crc = self.__calculateCRC(buffer)
+        buffer.extend(crc)
+
+        (status, backData, backBits) = self.__transceiveCard(buffer)
+        status = self.__acknowledged(status, backData)
+
+        if (status == self.MIFARE_OK):
+            buffer.clear()
+            buffer.extend(operand.to_bytes(4, 'little'))
+
+            crc = self.__calculateCRC(buffer)
+            buffer.extend(crc)
+
+            (status, backData, backBits) = self.__transceiveCard(
+                buffer, profile='value')
+
+            # Only a failed operation is answered, with a NAK
+            if (status == self.MIFARE_NOTAGERR):
+                status = self.MIFARE_OK
+            elif (status == self.MIFARE_OK):
+                self.__selected = False
+                status = self.MIFARE_ERR
+
+        return (status, backData, backBits)
+
+    @_exclusive
+    def increment(self, blockAddr, delta):
+        """ Adds delta to a value block, kept until transfer() """
+        return (self.__valueOperation(self.MIFARE_INCREMENT, blockAddr,
+                                      delta))
+
+    @_exclusive
+    def decrement(self, blockAddr, delta):
+        """ Subtracts delta from a value block, kept until transfer() """
+        return (self.__valueOperation(self.MIFARE_DECREMENT, blockAddr,
+                                      delta))
+
+    @_exclusive
+    def restore(self, blockAddr):
+        """ Copies a value block, kept until transfer() """
+        return (self.__valueOperation(self.MIFARE_RESTORE, blockAddr, 0))
+
+    @_exclusive
+    def transfer(self, blockAddr):
+        """ Writes the result of the last value operation to a block """
+        if ((self.blockCache is not None) and
+                (self.serialNumber is not None)):
+            self.blockCache.invalidate(self.serialNumber, blockAddr)
+
+        buffer = []
+        buffer.extend(self.MIFARE_TRANSFER)
+        buffer.append(blockAddr)
+
+        crc = self.__calculateCRC(buffer)
+        buffer.extend(crc)
+
+        (status, backData, backBits) = self.__transceiveCard(
+            buffer, profile='write')
+        status = self.__acknowledged(status, backData)
+
+        return (status, backData, backBits)
+
+    @_exclusive
+    def decrement_transfer(self, blockAddr, delta, targetAddr=None, key=None,
+                           keyType=MIFARE_AUTHKEY1, serialNumber=None):
+        """ Decrements a value block and transfers the result at once
+
+        Authenticates the sector first if a key is given. The result is
+        written back to the block itself unless a target block of the same
+        sector is given. No other command of the bus gets in between.
+        """
+        if (targetAddr is None):
+            targetAddr = blockAddr
+        layout = self.layout()
+        if ((targetAddr == 0) or (targetAddr not in layout) or
+                (blockAddr not in layout) or
+                (layout.isTrailer(targetAddr)) or
+                (layout.sectorOfBlock(targetAddr) !=
+                 layout.sectorOfBlock(blockAddr))):
+            # The transfer would be refused after the value was changed
+            return (self.MIFARE_ERR, [], None)
+
+        if (key is not None):
+            if (serialNumber is None):
+                serialNumber = self.serialNumber
+            trailer = self.layout().sectorTrailer(
+                self.sectorOfBlock(blockAddr))
+            (status, backData, backBits) = self.authenticate(keyType,
+                                                             trailer,
+                                                             key,
+                                                             serialNumber)
+            if (status != self.MIFARE_OK):
+                return (status, backData, backBits)
+
+        (status, backData, backBits) = self.decrement(blockAddr, delta)
+        if (status == self.MIFARE_OK):
+            (status, backData, backBits) = self.transfer(targetAddr)
+
+        return (status, backData, backBits)
+
+    def layout(self):
+        """ Returns the memory layout of the selected card
+
+        Mini, 1K and 4K share their block numbering, the 4K layout is used
+        as long as the type of the card is not known
+        """
+        if ((self.cardType is not None) and (self.cardType.classic)):
+            return (self.cardType.layout)
+
+        return (MIFARE_4K_LAYOUT)
+
+    def sectorBlocks(self, sector):
+        """ Returns the block addresses of a sector """
+        return (self.layout().sectorBlocks(sector))
+
+    def sectorOfBlock(self, blockAddr):
+        """ Returns the sector of a block address """
+        return (self.layout().sectorOfBlock(blockAddr))
+
+    @_exclusive
+    def read_sector(self, sector, key, keyType=MIFARE_AUTHKEY1,
+                    serialNumber=None):
+        """ Reads all blocks of a sector with a single authentication
+
+        Returns the status, the content of the sector as one contiguous
+        list and a dictionary with the status of every block. Blocks that
+        could not be read are filled with zeros.
+        """
+        if (serialNumber is None):
+            serialNumber = self.serialNumber
+
+        data = []
+        blockStatus = {}
+
+        blocks = self.sectorBlocks(sector)
+
+        if (self.blockCache is not None):
+            data = self.__cachedSector(sector, blocks, key, keyType,
+                                       serialNumber)
+            if (data is not None):
+                for blockAddr in blocks:
+                    blockStatus[blockAddr] = self.MIFARE_OK
+                return (self.MIFARE_OK, data, blockStatus)
+            data = []
+
+        (status, backData, backBits) = self.authenticate(keyType,
+                                                         blocks[-1],
+                                                         key,
+                                                         serialNumber)
+        for blockAddr in blocks:
+            if (status == self.MIFARE_OK):
+                (status, backData, backBits) = self.read(blockAddr)
+                if (status != self.MIFARE_OK):
+                    # A failed read halts the card, reselect and
+                    # authenticate again for the remaining blocks
+                    self.__reselect(serialNumber)
+                    blockStatus[blockAddr] = status
+                    (status, backData, backBits) = self.authenticate(
+                        keyType, blockAddr, key, serialNumber)
+                    data.extend([0] * self.MIFARE_BLOCKSIZE)
+                    continue
+
+                data.extend(backData)
+
+            else:
+                data.extend([0] * self.MIFARE_BLOCKSIZE)
+
+            blockStatus[blockAddr] = status
+
+        if (status != self.MIFARE_OK):
+            # Leave the card selected for the next sector
+            self.__reselect(serialNumber)
+
+        status = self.MIFARE_OK
+        for blockAddr in blocks:
+            if (blockStatus[blockAddr] != self.MIFARE_OK):
+                status = self.MIFARE_ERR
+
+        return (status, data, blockStatus)
+
+    def __cachedSector(self, sector, blocks, key, keyType, serialNumber):
+        """ Returns the content of a sector from the block cache or None
+
+        The sector is authenticated with the key first unless it already
+        is with the same key. Sectors to be verified are only returned if
+        the first block read from the card matches the cached one.
+        """
+        cache = self.blockCache
+        if ((not self.__selected) or (serialNumber is None) or
+                (self.serialNumber != self.__uidOf(serialNumber))):
+            # The card is gone or another card is selected
+            return (None)
+        serialNumber = self.serialNumber
+        cached = cache.getBlocks(serialNumber, blocks)
+        if (cached is None):
+            return (None)
+
+        if ((self.__authenticatedBlock is None) or
+                (self.sectorOfBlock(self.__authenticatedBlock) != sector) or
+                (self.__authenticatedKey != (list(keyType), list(key)))):
+            (status, backData, backBits) = self.authenticate(keyType,
+                                                             blocks[-1],
+                                                             key,
+                                                             serialNumber)
+            if (status != self.MIFARE_OK):
+                # Wrong key, the card has to be selected again
+                self.__reselect(serialNumber)
+                return (None)
+
+        if (cache.verifies(sector)):
+            (status, backData, backBits) = self.read(blocks[0])
+            if ((status != self.MIFARE_OK) or (backData != cached[0])):
+                # Changed behind our back, read the sector again
+                cache.invalidate(serialNumber)
+                if (status != self.MIFARE_OK):
+                    self.__reselect(serialNumber)
+                return (None)
+
+        data = []
+        for blockData in cached:
+            data.extend(blockData)
+        return (data)
+
+    @_exclusive
+    def read_card(self, keys, keyType=MIFARE_AUTHKEY1, serialNumber=None,
+                  sectorCount=None):
+        """ Reads all sectors of the card
+
+        keys is either one key for all sectors or a dictionary with the key
+        of each sector, the blocks of sectors without a key are not read and
+        marked as failed. The number of sectors defaults to the one of the
+        selected card type. Returns the status, the content of the card as
+        one contiguous list and a dictionary with the status of every block.
+        """
+        data = []
+        blockStatus = {}
+
+        if (sectorCount is None):
+            if ((self.cardType is not None) and (self.cardType.classic)):
+                sectorCount = self.cardType.layout.sectorCount
+            else:
+                sectorCount = self.MIFARE_1K_SECTORCOUNT
+
+        for sector in range(sectorCount):
+            if isinstance(keys, dict):
+                key = keys.get(sector)
+            else:
+                key = keys
+
+            if (key is None):
+                # Filled with zeros like the blocks that could not be read
+                for blockAddr in self.sectorBlocks(sector):
+                    data.extend([0] * self.MIFARE_BLOCKSIZE)
+                    blockStatus[blockAddr] = self.MIFARE_ERR
+                continue
+
+            (status, backData, backStatus) = self.read_sector(sector,
+                                                              key,
+                                                              keyType,
+                                                              serialNumber)
+            data.extend(backData)
+            blockStatus.update(backStatus)
+
+        self.deauthenticate()
+
+        status = self.MIFARE_OK
+        for blockAddr in blockStatus:
+            if (blockStatus[blockAddr] != self.MIFARE_OK):
+                status = self.MIFARE_ERR
+
+        return (status, data, blockStatus)
+
+    @_exclusive
+    def write_blocks(self, blocks, key, keyType=MIFARE_AUTHKEY1,
+                     serialNumber=None, allowTrailer=False,
+                     allowManufacturer=False):
+        """ Writes several blocks with a single authentication per sector
+
+        blocks is a dictionary of block addresses and 16 bytes of data.
+        Sector trailers and the manufacturer block are refused unless
+        explicitly allowed. Returns the status and a dictionary with the
+        status of every block.
+        """
+        if (serialNumber is None):
+            serialNumber = self.serialNumber
+
+        blockStatus = {}
+
+        # Group the blocks by sector
+        layout = self.layout()
+        sectors = {}
+        for blockAddr in sorted(blocks):
+            if ((blockAddr not in layout) or
+                    ((blockAddr == 0) and (not allowManufacturer)) or
+                    ((layout.isTrailer(blockAddr)) and (not allowTrailer)) or
+                    (len(blocks[blockAddr]) != self.MIFARE_BLOCKSIZE)):
+                blockStatus[blockAddr] = self.MIFARE_ERR
+                continue
+            sector = layout.sectorOfBlock(blockAddr)
+            sectors.setdefault(sector, []).append(blockAddr)
+
+        for sector in sorted(sectors):
+            trailer = layout.sectorTrailer(sector)
+            (status, backData, backBits) = self.authenticate(keyType,
+                                                             trailer,
+                                                             key,
+                                                             serialNumber)
+            for blockAddr in sectors[sector]:
+                if (status == self.MIFARE_OK):
+                    (status, backData, backBits) = self.write(
+                        blockAddr, blocks[blockAddr])
+                    blockStatus[blockAddr] = status
+                    if (status != self.MIFARE_OK):
+                        # A refused write halts the card, reselect and
+                        # authenticate again for the remaining blocks
+                        self.__reselect(serialNumber)
+                        (status, backData, backBits) = self.authenticate(
+                            keyType, trailer, key, serialNumber)
+
+                else:
+                    blockStatus[blockAddr] = status
 
-    def __MFRC522_antennaOff(self):
-        """ Deactivates the reader/writer antenna """
+            if (status != self.MIFARE_OK):
+                # Leave the card selected for the next sector
+                self.__reselect(serialNumber)
+
+        status = self.MIFARE_OK
+        for blockAddr in blockStatus:
+            if (blockStatus[blockAddr] != self.MIFARE_OK):
+                status = self.MIFARE_ERR
+
+        return (status, blockStatus)
+
+    @_exclusive
+    def write_sector(self, sector, data, key, keyType=MIFARE_AUTHKEY1,
+                     serialNumber=None, allowTrailer=False,
+                     allowManufacturer=False):
+        """ Writes contiguous data to the blocks of a sector
+
+        data starts at the first block of the sector, its length must be a
+        multiple of the block size. Returns the status and a dictionary
+        with the status of every block.
+        """
+        blocks = {}
+        offset = 0
+        for blockAddr in self.sectorBlocks(sector):
+            if (offset >= len(data)):
+                break
+            blocks[blockAddr] = data[offset:offset + self.MIFARE_BLOCKSIZE]
+            offset = offset + self.MIFARE_BLOCKSIZE
+
+        return (self.write_blocks(blocks, key, keyType, serialNumber,
+                                  allowTrailer, allowManufacturer))
+
+    def __checkedResponse(self, status, backData, length):
+        """ Checks length and CRC of an answer and strips the CRC """
+        if (status == self.MIFARE_OK):
+            if ((len(backData) == length + 2) and
+                    (self.calculateCRC(backData[0:length]) ==
+                     backData[length:length + 2])):
+                return (status, backData[0:length])
+            # A NAK sends the card back to IDLE
+            self.__selected = False
+            status = self.MIFARE_ERR
+
+        return (status, [])
+
+    def pageLayout(self):
+        """ Returns the memory layout of the selected Ultralight or NTAG
+
+        The layout of the smallest Ultralight is used as long as the exact
+        type is not known from ntag_get_version()
+        """
+        if ((self.cardType is not None) and
+                (self.cardType.layout is not None) and
+                (self.cardType.layout.blockSize == self.NTAG_PAGESIZE)):
+            return (self.cardType.layout)
+
+        return (ULTRALIGHT_LAYOUT)
+
+    @_exclusive
+    def ntag_get_version(self):
+        """ Retrieves product type and memory size of an Ultralight/NTAG
+
+        Refines the card type on success. Cards without GET_VERSION answer
+        with a NAK and have to be selected again.
+        """
+        buffer = []
+        buffer.extend(self.NTAG_GETVERSION)
+
+        crc = self.__calculateCRC(buffer)
+        buffer.extend(crc)
+
+        (status, backData, backBits) = self.__transceiveCard(buffer, 10)
+        (status, backData) = self.__checkedResponse(status, backData, 8)
+
+        if (status == self.MIFARE_OK):
+            cardType = classifyVersion(backData)
+            if (cardType is not UNKNOWN):
+                self.cardType = cardType
+
+        return (status, backData, len(backData) * 8)
+
+    @_exclusive
+    def ntag_read(self, page):
+        """ Reads 4 pages starting at page, wrapping around at the end """
+        buffer = []
+        buffer.extend(self.NTAG_READ)
+        buffer.append(page)
+
+        crc = self.__calculateCRC(buffer)
+        buffer.extend(crc)
+
+        length = self.NTAG_READPAGES * self.NTAG_PAGESIZE
+        (status, backData, backBits) = self.__transceiveCard(buffer,
+                                                             length + 2)
+        (status, backData) = self.__checkedResponse(status, backData, length)
+
+        return (status, backData, len(backData) * 8)
+
+    def ntag_stream(self, startPage=0, endPage=None):
+        """ Reads a range of pages with FAST_READ in FIFO sized chunks
+
+        Yields the status, the first page and the data of every chunk as
+        soon as it has been received and stops after the first error. The
+        range ends with the last page of the card by default.
+        """
+        if (endPage is None):
+            endPage = self.pageLayout().blockCount - 1
+
+        page = startPage
+        while (page <= endPage):
+            lastPage = min(page + self.NTAG_FASTREAD_PAGES - 1, endPage)
+            (status, backData) = self.__ntagFastRead(page, lastPage)
+            yield (status, page, backData)
+            if (status != self.MIFARE_OK):
+                return
+            page = lastPage + 1
+
+    @_exclusive(name='ntag_stream')
+    def __ntagFastRead(self, page, lastPage):
+        """ Reads the pages from page to lastPage with one FAST_READ """
+        buffer = []
+        buffer.extend(self.NTAG_FASTREAD)
+        buffer.append(page)
+        buffer.append(lastPage)
+
+        crc = self.__calculateCRC(buffer)
+        buffer.extend(crc)
+
+        length = (lastPage - page + 1) * self.NTAG_PAGESIZE
+        (status, backData, backBits) = self.__transceiveCard(buffer,
+                                                             length + 2)
+
+        return (self.__checkedResponse(status, backData, length))
+
+    @_exclusive
+    def ntag_fast_read(self, startPage=0, endPage=None):
+        """ Reads a range of pages with as few FAST_READs as possible
+
+        Returns the status and the content of the pages, the range ends
+        with the last page of the card by default
+        """
+        status = self.MIFARE_OK
+        data = []
+
+        for (status, page, backData) in self.ntag_stream(startPage,
+                                                         endPage):
+            data.extend(backData)
+
+        return (status, data)
+
+    def __invalidatePages(self, page):
+        """ Drops the cached reads that contain a page """
+        if ((self.blockCache is not None) and
+                (self.serialNumber is not None)):
+            for first in range(max(page - self.NTAG_READPAGES + 1, 0),
+                               page + 1):
+                self.blockCache.invalidate(self.serialNumber, first)
+
+    @_exclusive
+    def ntag_write(self, page, data):
+        """ Writes 4 bytes to a page """
+        self.__invalidatePages(page)
+
+        buffer = []
+        buffer.extend(self.NTAG_WRITE)
+        buffer.append(page)
+        buffer.extend(data[0:self.NTAG_PAGESIZE])
+
+        crc = self.__calculateCRC(buffer)
+        buffer.extend(crc)
+
+        (status, backData, backBits) = self.__transceiveCard(
+            buffer, profile='write')
+        status = self.__acknowledged(status, backData)
+
+        return (status, backData, backBits)
+
+    @_exclusive
+    def ntag_compat_write(self, page, data):
+        """ Writes 4 bytes to a page with the MIFARE Classic WRITE frame
+
+        Only the first 4 of the 16 bytes sent are written
+        """
+        self.__invalidatePages(page)
+
+        buffer = []
+        buffer.extend(self.NTAG_COMPATWRITE)
+        buffer.append(page)
+
+        crc = self.__calculateCRC(buffer)
+        buffer.extend(crc)
+
+        (status, backData, backBits) = self.__transceiveCard(buffer)
+        status = self.__acknowledged(status, backData)
+
+        if (status == self.MIFARE_OK):
+            buffer.clear()
+            buffer.extend(data[0:self.NTAG_PAGESIZE])
+            buffer.extend([0] * (self.MIFARE_BLOCKSIZE - len(buffer)))
+
+            crc = self.__calculateCRC(buffer)
+            buffer.extend(crc)
+
+            (status, backData, backBits) = self.__transceiveCard(
+                buffer, profile='write')
+            status = self.__acknowledged(status, backData)
+
+        return (status, backData, backBits)
+
+    @_exclusive
+    def ntag_pwd_auth(self, password):
+        """ Authenticates with the 4 byte password
+
+        Returns the status and the 2 byte password acknowledge of the card
+        """
+        buffer = []
+        buffer.extend(self.NTAG_PWDAUTH)
+        buffer.extend(password)
+
+        crc = self.__calculateCRC(buffer)
+        buffer.extend(crc)
+
+        (status, backData, backBits) = self.__transceiveCard(buffer)
+        (status, backData) = self.__checkedResponse(status, backData, 2)
+
+        return (status, backData, len(backData) * 8)
+
+    @_exclusive
+    def antennaOn(self):
+        """ Activates the reader/writer antenna
+
+        Cards need up to 5 ms after the field is switched on until they
+        accept commands
+        """
+        # Output signal on pin TX1 and TX2 delivers the 13.56 MHz energy
+        # carrier
+        Tx1RFEn = 0x01
+        Tx2RFEn = 0x02
+        value = self.__MFRC522_read(self.TXCONTROLREG)
+        if ((value & (Tx1RFEn | Tx2RFEn)) != (Tx1RFEn | Tx2RFEn)):
+            self.__MFRC522_write(self.TXCONTROLREG,
+                                 value | Tx1RFEn | Tx2RFEn)
+
+    @_exclusive
+    def antennaOff(self):
+        """ Deactivates the reader/writer antenna
+
+        Cards in the field lose their power and state, halted cards answer
+        REQA again once the antenna is activated
+        """
+        self.deauthenticate()
         self.__MFRC522_clearBitMask(self.TXCONTROLREG, 0x03)
+        self.__selected = False
 
     def __MFRC522_reset(self):
         """ Resets the reader/writer """
         self.__MFRC522_write(self.COMMANDREG, self.MFRC522_SOFTRESET)
+        # The oscillator restarts before further registers are written
+        self.transport.flush()
+        # All registers are back to their reset values
+        self.invalidateRegisterCache()
+        self.__timer = None
+
+    def invalidateRegisterCache(self):
+        """ Discards the shadow copy of the configuration registers """
+        self.__registerShadow.clear()
+
+    @_exclusive
+    def resyncRegisterCache(self):
+        """ Reloads the shadow copy of the configuration registers """
+        self.invalidateRegisterCache()
+        if (self.registerCache):
+            for address in self.CACHED_REGISTERS:
+                self.__MFRC522_read(address)
 
     def __MFRC522_init(self):
         """ Initialization sequence"""
         self.__MFRC522_reset()
 
-        # Timer starts automatically at the end of the transmission in all
-        # communication modes and speeds
-        TAuto = 0x80
-        # Defines the higher 4 bits of the TPrescaler value
-        TPrescaler_Hi = 0x0D
-        # Defines the lower 4 bits of the TPrescaler value
-        TPrescaler_Lo = 0x3E
-        self.__MFRC522_write(self.TMODEREG, (TAuto | TPrescaler_Hi))
-        self.__MFRC522_write(self.TPRESCALERREG, TPrescaler_Lo)
-
-        # Defines the higher 8 bits of the timer reload value
-        TReloadVal_Hi = 0x1E
-        # Defines the lower 8 bits of the timer reload value
-        TReloadVal_Lo = 0x00
-        self.__MFRC522_write(self.TRELOADREGH, TReloadVal_Hi)
-        self.__MFRC522_write(self.TRELOADREGL, TReloadVal_Lo)
+        # Prescaler and reload value of the timer
+        self.__useTimeout('request')
 
         Force100ASK = 0x40  # Forces a 100% ASK modulation
         self.__MFRC522_write(self.TXASKREG, Force100ASK)
@@ -593,17 +2074,158 @@ class MFRC522:
                                             PolMFin |
                                             CRCPreset))
 
+        if (self.irq is not None):
+            # Drive the IRQ pin actively instead of as open drain output
+            IRQPushPull = 0x80
+            self.__MFRC522_write(self.DIVIENREG, IRQPushPull)
+
         # Activate antenna
-        self.__MFRC522_antennaOn()
+        self.antennaOn()
+
+    def __MFRC522_setTimer(self, prescaler, reload):
+        """ Programs the timer that terminates commands without response
+
+        Only registers that differ from the current setting are written
+        """
+        if ((self.__timer is None) or (self.__timer[0] != prescaler)):
+            # Timer starts automatically at the end of the transmission in
+            # all communication modes and speeds
+            TAuto = 0x80
+            # Defines the higher 4 bits of the TPrescaler value
+            TPrescaler_Hi = (prescaler >> 8) & 0x0F
+            # Defines the lower 8 bits of the TPrescaler value
+            TPrescaler_Lo = prescaler & 0xFF
+            self.__MFRC522_write(self.TMODEREG, (TAuto | TPrescaler_Hi))
+            self.__MFRC522_write(self.TPRESCALERREG, TPrescaler_Lo)
+
+        if ((self.__timer is None) or (self.__timer[1] != reload)):
+            # Defines the higher 8 bits of the timer reload value
+            TReloadVal_Hi = (reload >> 8) & 0xFF
+            # Defines the lower 8 bits of the timer reload value
+            TReloadVal_Lo = reload & 0xFF
+            self.__MFRC522_write(self.TRELOADREGH, TReloadVal_Hi)
+            self.__MFRC522_write(self.TRELOADREGL, TReloadVal_Lo)
+
+        self.__timer = (prescaler, reload)
+        # Time in seconds until the timer interrupt request is raised
+        self.timerPeriod = (2 * prescaler + 1) * (reload + 1) / self.CLOCK
+
+    def __useTimeout(self, profile):
+        """ Programs the timer for a timeout profile if it is not yet """
+        tick = (2 * self.TIMER_PRESCALER + 1) / self.CLOCK
+        reload = round(self.timeouts[profile] / tick) - 1
+        reload = min(max(reload, 1), 0xFFFF)
+        if (self.__timer != (self.TIMER_PRESCALER, reload)):
+            self.__MFRC522_setTimer(self.TIMER_PRESCALER, reload)
+
+    def __recordResponse(self, profile, counter):
+        """ Records the time the card took to answer from the timer value
+
+        The timer starts at the end of the transmission and stops with the
+        first bits of the answer
+        """
+        (prescaler, reload) = self.__timer
+        counter = (counter[0] << 8) | counter[1]
+        elapsed = (reload - counter) * (2 * prescaler + 1) / self.CLOCK
+        if (elapsed > self.responseTimes.get(profile, 0.0)):
+            self.responseTimes[profile] = elapsed
+
+    def calibrate(self, factor=CALIBRATION_FACTOR):
+        """ Tightens the timeouts to the response times of the cards seen
+
+        Needs calibrating to be enabled while the cards are used. Each of
+        the CALIBRATED_TIMEOUTS with recorded answers is set to factor times
+        the slowest answer, not below CALIBRATION_MIN and not above the
+        profile configured for the reader. Returns the timeouts of the
+        reader.
+        """
+        for profile in self.CALIBRATED_TIMEOUTS:
+            if (profile not in self.responseTimes):
+                continue
+            timeout = max(self.responseTimes[profile] * factor,
+                          self.CALIBRATION_MIN)
+            self.timeouts[profile] = min(timeout,
+                                         self.__configuredTimeouts[profile])
+
+        return (dict(self.timeouts))
 
     def __MFRC522_read(self, address):
         """ Read data from an address on the i2c bus """
-        value = self.i2cBus.read_byte_data(self.i2cAddress, address)
+        if (self.registerCache):
+            if (address in self.__registerShadow):
+                if (self.metrics is not None):
+                    self.__countTransaction('register_cache_hits', address)
+                return self.__registerShadow[address]
+
+        if (self.metrics is not None):
+            self.__countTransaction('i2c_reads', address)
+        value = self.transport.read(self.i2cAddress, address)
+        if (self.registerCache and (address in self.CACHED_REGISTERS)):
+            self.__registerShadow[address] = value
         return value
 
     def __MFRC522_write(self, address, value):
         """ Write data on an address on the i2c bus """
-        self.i2cBus.write_byte_data(self.i2cAddress, address, value)
+        if (self.registerCache and (address in self.CACHED_REGISTERS)):
+            if (self.__registerShadow.get(address) == value):
+                # Register already holds the value
+                if (self.metrics is not None):
+                    self.__countTransaction('register_cache_hits', address)
+                return
+            self.__registerShadow[address] = value
+
+        if (self.metrics is not None):
+            self.__countTransaction('i2c_writes', address)
+        self.transport.write(self.i2cAddress, address, value)
+
+    def __MFRC522_readRegisters(self, addresses):
+        """ Read several registers with as few transactions as possible
+
+        Not for the CACHED_REGISTERS, the shadow copy is bypassed
+        """
+        if (self.metrics is not None):
+            for address in addresses:
+                self.__countTransaction('i2c_reads', address)
+        return (self.transport.readRegisters(self.i2cAddress, addresses))
+
+    def __MFRC522_readBlock(self, address, length):
+        """ Read length bytes from an address on the i2c bus """
+        values = []
+        blockMax = self.transport.blockMax
+        while (self.blockTransfer and (blockMax > 0) and
+               (len(values) < length)):
+            count = min(length - len(values), blockMax)
+            if (self.metrics is not None):
+                self.__countTransaction('i2c_reads', address)
+            try:
+                values.extend(self.transport.readBlock(
+                    self.i2cAddress, address, count))
+            except NotImplementedError:
+                # Adapter is not capable of I2C block transfers
+                self.blockTransfer = False
+        while (len(values) < length):
+            values.append(self.__MFRC522_read(address))
+        return values
+
+    def __MFRC522_writeBlock(self, address, values):
+        """ Write a sequence of bytes to an address on the i2c bus """
+        i = 0
+        blockMax = self.transport.blockMax
+        while (self.blockTransfer and (blockMax > 0) and
+               (i < len(values))):
+            chunk = list(values[i:i + blockMax])
+            if (self.metrics is not None):
+                self.__countTransaction('i2c_writes', address)
+            try:
+                self.transport.writeBlock(
+                    self.i2cAddress, address, chunk)
+                i = i + len(chunk)
+            except NotImplementedError:
+                # Adapter is not capable of I2C block transfers
+                self.blockTransfer = False
+        while (i < len(values)):
+            self.__MFRC522_write(address, values[i])
+            i = i + 1
 
     def __MFRC522_setBitMask(self, address, mask):
         """ Set bits according to a mask on a address on the i2c bus """
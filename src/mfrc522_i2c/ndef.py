@@ -0,0 +1,429 @@
+#!/usr/bin/env python3
+# -*- coding: utf8 -*-
+"""
+Lazy NDEF parser on top of the block and page reads of the driver
+"""
+
+__author__ = "Christoph Pranzl"
+__version__ = "0.0.5"
+__license__ = "GPLv3"
+
+from .cardtypes import MIFARE_4K, MIFARE_ULTRALIGHT
+
+
+# Type name formats
+TNF_EMPTY = 0x00
+TNF_WELL_KNOWN = 0x01
+TNF_MEDIA = 0x02
+TNF_ABSOLUTE_URI = 0x03
+TNF_EXTERNAL = 0x04
+TNF_UNKNOWN = 0x05
+TNF_UNCHANGED = 0x06
+
+# URI identifier codes, see NFC Forum URI Record Type Definition
+URI_PREFIXES = [
+    '', 'http://www.', 'https://www.', 'http://', 'https://', 'tel:',
+    'mailto:', 'ftp://anonymous:anonymous@', 'ftp://ftp.', 'ftps://',
+    'sftp://', 'smb://', 'nfs://', 'ftp://', 'dav://', 'news:',
+    'telnet://', 'imap:', 'rtsp://', 'urn:', 'pop:', 'sip:', 'sips:',
+    'tftp:', 'btspp://', 'btl2cap://', 'btgoep://', 'tcpobex://',
+    'irdaobex://', 'file://', 'urn:epc:id:', 'urn:epc:tag:',
+    'urn:epc:pat:', 'urn:epc:raw:', 'urn:epc:', 'urn:nfc:',
+]
+
+# Keys A of the MIFARE Application Directory and of the NDEF sectors, see
+# NXP AN1304 and AN1305
+MAD_KEY = [0xA0, 0xA1, 0xA2, 0xA3, 0xA4, 0xA5]
+NFC_KEY = [0xD3, 0xF7, 0xD3, 0xF7, 0xD3, 0xF7]
+# Application identifier of NDEF sectors in the MAD
+NDEF_AID = 0x03E1
+
+# Magic number of the capability container of NFC Forum Type 2 tags
+CC_MAGIC = 0xE1
+
+TLV_NULL = 0x00
+TLV_NDEF = 0x03
+TLV_TERMINATOR = 0xFE
+
+
+class NdefRecord:
+    """ A record of an NDEF message """
+
+    def __init__(self, tnf, recordType, recordId, payload):
+        self.tnf = tnf
+        self.type = recordType
+        self.id = recordId
+        self.payload = payload
+
+    def uri(self):
+        """ Returns the URI of a URI record or None """
+        if ((self.tnf == TNF_WELL_KNOWN) and (self.type == b'U') and
+                (len(self.payload) > 0)):
+            prefix = ''
+            if (self.payload[0] < len(URI_PREFIXES)):
+                prefix = URI_PREFIXES[self.payload[0]]
+            return (prefix + self.payload[1:].decode('utf-8', 'replace'))
+        if (self.tnf == TNF_ABSOLUTE_URI):
+            return (self.type.decode('utf-8', 'replace'))
+        return (None)
+
+    def language(self):
+        """ Returns the language code of a text record or None """
+        if ((self.tnf != TNF_WELL_KNOWN) or (self.type != b'T') or
+                (len(self.payload) == 0)):
+            return (None)
+        length = self.payload[0] & 0x3F
+        return (self.payload[1:1 + length].decode('ascii', 'replace'))
+
+    def text(self):
+        """ Returns the text of a text record or None """
+        if ((self.tnf != TNF_WELL_KNOWN) or (self.type != b'T') or
+                (len(self.payload) == 0)):
+            return (None)
+        # Status byte with encoding and length of the language code
+        UTF16 = 0x80
+        encoding = 'utf-16' if (self.payload[0] & UTF16) else 'utf-8'
+        length = self.payload[0] & 0x3F
+        return (self.payload[1 + length:].decode(encoding, 'replace'))
+
+    def __repr__(self):
+        return (f'NdefRecord(tnf={self.tnf}, type={self.type!r}, '
+                f'id={self.id!r}, payload={self.payload!r})')
+
+
+class _EndOfMemory(Exception):
+    """ The data area ended or could not be read """
+
+
+class _Memory:
+    """ Data area of a tag fetched on demand
+
+    Bytes are only fetched when the parser accesses them and never beyond
+    the limit, which is narrowed to the end of the NDEF TLV once its length
+    is known.
+    """
+
+    def __init__(self, reader, size):
+        self.reader = reader
+        self.data = bytearray()
+        self.limit = size
+
+    def byte(self, offset):
+        self.__ensure(offset + 1)
+        return (self.data[offset])
+
+    def bytes(self, offset, length):
+        self.__ensure(offset + length)
+        return (bytes(self.data[offset:offset + length]))
+
+    def __ensure(self, end):
+        if (end > self.limit):
+            raise _EndOfMemory()
+        while (len(self.data) < end):
+            if (not self.fetch(end)):
+                raise _EndOfMemory()
+
+    def fetch(self, end):
+        """ Appends at least one more byte, returns False on failure """
+        raise NotImplementedError()
+
+
+class _PageMemory(_Memory):
+    """ Data area of an Ultralight or NTAG, starting at page 4 """
+
+    FIRST_PAGE = 4
+
+    def __init__(self, reader, size, data):
+        _Memory.__init__(self, reader, size)
+        self.data.extend(data[0:size])
+
+    def fetch(self, end):
+        reader = self.reader
+        pageSize = reader.NTAG_PAGESIZE
+        page = self.FIRST_PAGE + len(self.data) // pageSize
+
+        if (reader.cardType is MIFARE_ULTRALIGHT):
+            # Type not known, FAST_READ may not be supported
+            (status, backData, backBits) = reader.ntag_read(page)
+        else:
+            # Read ahead within the limit to save exchanges
+            lastPage = (self.FIRST_PAGE +
+                        (min(self.limit, len(self.data) + pageSize *
+                             reader.NTAG_FASTREAD_PAGES) - 1) // pageSize)
+            lastPage = max(lastPage, self.FIRST_PAGE +
+                           (end - 1) // pageSize)
+            (status, backData) = reader.ntag_fast_read(page, lastPage)
+
+        if ((status != reader.MIFARE_OK) or (len(backData) == 0)):
+            return (False)
+        self.data.extend(backData[0:self.limit - len(self.data)])
+        return (True)
+
+
+class _ClassicMemory(_Memory):
+    """ Data blocks of the NDEF sectors of a MIFARE Classic in order """
+
+    def __init__(self, reader, sectors, key, serialNumber, moreSectors):
+        # The end is known once the sectors are exhausted
+        _Memory.__init__(self, reader, reader.layout().size)
+        self.sectors = list(sectors)
+        self.key = key
+        self.serialNumber = serialNumber
+        # Called once to extend the sectors if the data area is exhausted
+        self.moreSectors = moreSectors
+        self.__blocks = []
+        self.__authenticated = None
+
+    def __ensureBlocks(self):
+        """ Returns the next block to read, extends the sector list """
+        if (len(self.__blocks) == 0):
+            if ((len(self.sectors) == 0) and (self.moreSectors is not None)):
+                moreSectors = self.moreSectors
+                self.moreSectors = None
+                self.sectors.extend(moreSectors())
+            if (len(self.sectors) == 0):
+                return (None)
+            sector = self.sectors.pop(0)
+            self.__blocks = list(self.reader.sectorBlocks(sector))[:-1]
+        return (self.__blocks[0])
+
+    def fetch(self, end):
+        reader = self.reader
+        blockAddr = self.__ensureBlocks()
+        if (blockAddr is None):
+            return (False)
+
+        sector = reader.sectorOfBlock(blockAddr)
+        if (self.__authenticated != sector):
+            trailer = reader.layout().sectorTrailer(sector)
+            (status, backData, backBits) = reader.authenticate(
+                reader.MIFARE_AUTHKEY1, trailer, self.key, self.serialNumber)
+            if (status != reader.MIFARE_OK):
+                return (False)
+            self.__authenticated = sector
+
+        (status, backData, backBits) = reader.read(blockAddr)
+        if (status != reader.MIFARE_OK):
+            return (False)
+        self.__blocks.pop(0)
+        self.data.extend(backData)
+        return (True)
+
+
+def _madCRC(data):
+    """ CRC-8 of the MIFARE Application Directory """
+    crc = 0xC7
+    for byte in data:
+        crc = crc ^ byte
+        for i in range(8):
+            if (crc & 0x80):
+                # Polynomial x^8 + x^4 + x^3 + x^2 + 1
+                crc = ((crc << 1) ^ 0x1D) & 0xFF
+            else:
+                crc = (crc << 1) & 0xFF
+    return (crc)
+
+
+class Ndef:
+    """ Reads NDEF records from the selected card on demand
+
+    MIFARE Classic cards are located through the MIFARE Application
+    Directory, Ultralight and NTAG through the capability container. The
+    data area is only read as far as the records iterated require. Call
+    MFRC522.ntag_get_version() before to enable FAST_READ on NTAG.
+    """
+
+    def __init__(self, reader, key=NFC_KEY, madKey=MAD_KEY,
+                 serialNumber=None):
+        self.reader = reader
+        self.key = key
+        self.madKey = madKey
+        self.serialNumber = serialNumber
+        # Status of the last iteration, MIFARE_ERR if the card could not
+        # be read or holds no valid NDEF message
+        self.status = None
+
+    def records(self):
+        """ Yields the records of the first NDEF message one by one """
+        reader = self.reader
+        self.status = reader.MIFARE_OK
+
+        try:
+            memory = self.__memory()
+            (offset, end) = self.__message(memory)
+            memory.limit = end
+
+            while (offset < end):
+                (record, offset, last) = self.__record(memory, offset)
+                yield record
+                if (last):
+                    break
+
+        except _EndOfMemory:
+            self.status = reader.MIFARE_ERR
+
+    def find(self, recordType, tnf=TNF_WELL_KNOWN):
+        """ Returns the first record of a type or None, stops reading there
+
+        recordType is the type as bytes, e.g. b'U' for URI records
+        """
+        records = self.records()
+        for record in records:
+            if ((record.tnf == tnf) and (record.type == recordType)):
+                records.close()
+                return (record)
+        return (None)
+
+    def uri(self):
+        """ Returns the URI of the first URI record or None """
+        record = self.find(b'U')
+        if (record is None):
+            return (None)
+        return (record.uri())
+
+    def text(self):
+        """ Returns the text of the first text record or None """
+        record = self.find(b'T')
+        if (record is None):
+            return (None)
+        return (record.text())
+
+    def __memory(self):
+        """ Returns the data area of the selected card """
+        reader = self.reader
+        cardType = reader.cardType
+        if ((cardType is not None) and (cardType.classic)):
+            return (self.__classicMemory())
+
+        # Capability container in page 3, followed by the data area
+        (status, backData, backBits) = reader.ntag_read(3)
+        if ((status != reader.MIFARE_OK) or (backData[0] != CC_MAGIC)):
+            raise _EndOfMemory()
+        size = backData[2] * 8
+        return (_PageMemory(reader, size, backData[reader.NTAG_PAGESIZE:]))
+
+    def __classicMemory(self):
+        """ Returns the NDEF sectors listed in the MAD """
+        reader = self.reader
+        serialNumber = self.serialNumber
+        if (serialNumber is None):
+            serialNumber = reader.serialNumber
+
+        # MAD1 in blocks 1 and 2 of sector 0
+        mad = self.__readMAD(0, [1, 2], serialNumber)
+        if (mad is None):
+            raise _EndOfMemory()
+        sectors = self.__ndefSectors(mad, 1)
+
+        moreSectors = None
+        if (reader.cardType is MIFARE_4K):
+            def moreSectors():
+                # MAD2 in blocks 64 to 66 of sector 16, read only when the
+                # message continues beyond sector 15
+                mad2 = self.__readMAD(16, [64, 65, 66], serialNumber)
+                if (mad2 is None):
+                    return ([])
+                return (self.__ndefSectors(mad2, 17))
+
+        return (_ClassicMemory(reader, sectors, self.key, serialNumber,
+                               moreSectors))
+
+    def __readMAD(self, sector, blocks, serialNumber):
+        """ Reads and checks a MAD, returns its bytes or None """
+        reader = self.reader
+        trailer = reader.layout().sectorTrailer(sector)
+        (status, backData, backBits) = reader.authenticate(
+            reader.MIFARE_AUTHKEY1, trailer, self.madKey, serialNumber)
+        if (status != reader.MIFARE_OK):
+            return (None)
+
+        mad = []
+        for blockAddr in blocks:
+            (status, backData, backBits) = reader.read(blockAddr)
+            if (status != reader.MIFARE_OK):
+                return (None)
+            mad.extend(backData)
+
+        if (_madCRC(mad[1:]) != mad[0]):
+            return (None)
+        return (mad)
+
+    def __ndefSectors(self, mad, firstSector):
+        """ Returns the sectors with the NDEF application in a MAD """
+        sectors = []
+        # CRC and info byte, followed by the little-endian application
+        # identifiers of the sectors
+        for i in range(2, len(mad) - 1, 2):
+            if ((mad[i] | (mad[i + 1] << 8)) == NDEF_AID):
+                sectors.append(firstSector + (i - 2) // 2)
+        return (sectors)
+
+    def __message(self, memory):
+        """ Returns start and end of the value of the first NDEF TLV """
+        offset = 0
+        while True:
+            tag = memory.byte(offset)
+            if (tag == TLV_NULL):
+                offset = offset + 1
+                continue
+            if (tag == TLV_TERMINATOR):
+                raise _EndOfMemory()
+
+            length = memory.byte(offset + 1)
+            offset = offset + 2
+            if (length == 0xFF):
+                # Three byte format
+                length = int.from_bytes(memory.bytes(offset, 2), 'big')
+                offset = offset + 2
+
+            if (tag == TLV_NDEF):
+                return ((offset, offset + length))
+            offset = offset + length
+
+    def __record(self, memory, offset):
+        """ Parses a record, chunked payloads are joined
+
+        Returns the record, the offset of the next record and whether the
+        record is the last of the message
+        """
+        # Message begin, message end, chunk flag, short record, ID length
+        # present and type name format
+        ME = 0x40
+        CF = 0x20
+        SR = 0x10
+        IL = 0x08
+        TNF = 0x07
+
+        record = None
+        while True:
+            header = memory.byte(offset)
+            typeLength = memory.byte(offset + 1)
+            offset = offset + 2
+            if (header & SR):
+                payloadLength = memory.byte(offset)
+                offset = offset + 1
+            else:
+                payloadLength = int.from_bytes(memory.bytes(offset, 4),
+                                               'big')
+                offset = offset + 4
+            idLength = 0
+            if (header & IL):
+                idLength = memory.byte(offset)
+                offset = offset + 1
+
+            recordType = memory.bytes(offset, typeLength)
+            offset = offset + typeLength
+            recordId = memory.bytes(offset, idLength)
+            offset = offset + idLength
+            payload = memory.bytes(offset, payloadLength)
+            offset = offset + payloadLength
+
+            if (record is None):
+                record = NdefRecord(header & TNF, recordType, recordId,
+                                    payload)
+            else:
+                # Following chunks only carry payload
+                record.payload = record.payload + payload
+
+            if (not (header & CF)):
+                return ((record, offset, bool(header & ME)))
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf8 -*-
+"""
+Adaptive pacing of the polls of a reader for cards
+"""
+
+__author__ = "Christoph Pranzl"
+__version__ = "0.0.5"
+__license__ = "GPLv3"
+
+import time
+
+
+class PollScheduler:
+    """ Paces scan() of a reader between an idle and an active poll rate
+
+    After a card answered, the reader is polled every activeInterval
+    seconds. Every empty poll stretches the interval by decay until it
+    reaches idleInterval. budget limits the share of the time the polls
+    occupy the bus and the CPU, a slow poll delays the next one
+    accordingly. With antennaOff the RF field is switched off between idle
+    polls and on again settle seconds before the next one, the time cards
+    need to power up.
+    """
+
+    def __init__(self, reader, idleInterval=0.25, activeInterval=0.02,
+                 decay=1.5, budget=0.05, antennaOff=False, settle=0.005):
+        self.reader = reader
+        self.idleInterval = idleInterval
+        self.activeInterval = activeInterval
+        self.decay = decay
+        self.budget = budget
+        self.antennaOff = antennaOff
+        self.settle = settle
+        # Current interval and time of the next poll
+        self.interval = idleInterval
+        self.next = time.monotonic()
+        self.antenna = True
+        # Statistics since the creation of the scheduler
+        self.started = time.monotonic()
+        self.busyTime = 0.0
+        self.polls = 0
+        self.detections = 0
+
+    def scan(self):
+        """ Waits until the next poll is due and scans for a card
+
+        Returns the result of MFRC522.scan()
+        """
+        if (not self.antenna):
+            self.__sleepUntil(self.next - self.settle)
+            self.reader.antennaOn()
+            self.antenna = True
+            self.__sleepUntil(max(self.next,
+                                  time.monotonic() + self.settle))
+        else:
+            self.__sleepUntil(self.next)
+
+        start = time.monotonic()
+        result = self.reader.scan()
+        duration = time.monotonic() - start
+        self.busyTime = self.busyTime + duration
+        self.polls = self.polls + 1
+
+        if (result[0] == self.reader.MIFARE_OK):
+            # Ramp up at once, the card is likely to be read now
+            self.detections = self.detections + 1
+            self.interval = self.activeInterval
+        else:
+            self.interval = min(self.interval * self.decay,
+                                self.idleInterval)
+
+        # Keep the share of the polls within the budget
+        interval = max(self.interval, duration / self.budget)
+        self.next = start + interval
+
+        if (self.antennaOff and (result[0] != self.reader.MIFARE_OK) and
+                (self.interval >= self.idleInterval) and
+                (interval > 2 * self.settle)):
+            self.reader.antennaOff()
+            self.antenna = False
+
+        return (result)
+
+    def wake(self):
+        """ Polls at the active rate again, e.g. after an external trigger """
+        self.interval = self.activeInterval
+        self.next = time.monotonic()
+
+    def dutyCycle(self):
+        """ Returns the share of the time spent polling so far """
+        elapsed = time.monotonic() - self.started
+        if (elapsed <= 0):
+            return (0.0)
+        return (self.busyTime / elapsed)
+
+    def close(self):
+        """ Leaves the antenna of the reader activated """
+        if (not self.antenna):
+            self.reader.antennaOn()
+            self.antenna = True
+
+    def __enter__(self):
+        return (self)
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __sleepUntil(self, deadline):
+        delay = deadline - time.monotonic()
+        if (delay > 0):
+            time.sleep(delay)
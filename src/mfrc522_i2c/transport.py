@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+# -*- coding: utf8 -*-
+"""
+Transports between the driver and the registers of devices on an I2C bus
+"""
+
+__author__ = "Christoph Pranzl"
+__version__ = "0.0.5"
+__license__ = "GPLv3"
+
+import ctypes
+import os
+
+
+class Transport:
+    """ Register access of devices on an I2C bus
+
+    Subclasses implement read and write of single registers and writeRead,
+    a write followed by a read with repeated start. blockMax is the largest
+    number of bytes moved by one readBlock or writeBlock, 0 for adapters
+    without block transfers, the reader then moves FIFO data byte by byte.
+    Transports may queue writes until the next read or flush, the reader
+    flushes before it waits for the reader/writer and after each command.
+    Errors of the bus are raised as OSError.
+    """
+
+    blockMax = 0
+
+    def read(self, address, register):
+        """ Returns the value of a register """
+        return (self.writeRead(address, [register], 1)[0])
+
+    def write(self, address, register, value):
+        """ Writes a value to a register """
+        raise NotImplementedError
+
+    def readBlock(self, address, register, length):
+        """ Returns length bytes read from a register """
+        return (self.writeRead(address, [register], length))
+
+    def writeBlock(self, address, register, values):
+        """ Writes a sequence of bytes to a register """
+        for value in values:
+            self.write(address, register, value)
+
+    def readRegisters(self, address, registers):
+        """ Returns the values of several registers """
+        return ([self.read(address, register) for register in registers])
+
+    def writeRead(self, address, data, length):
+        """ Writes data and reads length bytes in one combined transaction
+
+        The first byte of data is the register the device reads from, any
+        further bytes are written to that register first
+        """
+        raise NotImplementedError
+
+    def flush(self):
+        """ Performs all queued writes """
+        pass
+
+    def close(self):
+        """ Releases the adapter """
+        pass
+
+
+class SMBusTransport(Transport):
+    """ Transport over an smbus.SMBus compatible object
+
+    Block transfers are limited to the 32 bytes of an SMBus I2C block,
+    objects without I2C block transfers are accessed byte by byte
+    """
+
+    blockMax = 32
+
+    def __init__(self, bus):
+        self.bus = bus
+        if (not hasattr(bus, 'read_i2c_block_data')):
+            self.blockMax = 0
+
+    def read(self, address, register):
+        return (self.bus.read_byte_data(address, register))
+
+    def write(self, address, register, value):
+        self.bus.write_byte_data(address, register, value)
+
+    def readBlock(self, address, register, length):
+        return (list(self.bus.read_i2c_block_data(address, register,
+                                                  length)))
+
+    def writeBlock(self, address, register, values):
+        self.bus.write_i2c_block_data(address, register, list(values))
+
+    def writeRead(self, address, data, length):
+        if ((len(data) != 1) or (length > self.blockMax)):
+            # SMBus has no combined transaction with a longer write
+            raise NotImplementedError
+        return (self.readBlock(address, data[0], length))
+
+    def close(self):
+        self.bus.close()
+
+
+class SMBus2Transport(SMBusTransport):
+    """ Transport over an smbus2.SMBus using combined I2C_RDWR messages
+
+    Block transfers are not limited to the SMBus block size, the whole
+    FIFO is moved with one transaction
+    """
+
+    # Largest I2C_RDWR message accepted by the i2c-dev driver
+    blockMax = 8192
+
+    def __init__(self, bus):
+        # Only needed for smbus2 adapters
+        from smbus2 import i2c_msg
+        self.bus = bus
+        self.__message = i2c_msg
+
+    def readBlock(self, address, register, length):
+        return (self.writeRead(address, [register], length))
+
+    def writeBlock(self, address, register, values):
+        self.bus.i2c_rdwr(self.__message.write(address,
+                                               [register] + list(values)))
+
+    def writeRead(self, address, data, length):
+        request = self.__message.write(address, list(data))
+        response = self.__message.read(address, length)
+        self.bus.i2c_rdwr(request, response)
+        return (list(response))
+
+
+class FakeTransport(Transport):
+    """ In-memory transport for tests and development without a bus
+
+    Devices by address implement read(register) and write(register, value),
+    e.g. an EmulatedMFRC522. Addresses without a device behave as plain
+    register memory, registers not written before read as 0. transactions
+    counts the bus transactions, log records every register access as
+    ('read' or 'write', address, register, value).
+    """
+
+    def __init__(self, devices=None, blockMax=32):
+        self.devices = dict(devices or {})
+        self.blockMax = blockMax
+        self.registers = {}
+        self.transactions = 0
+        self.log = []
+
+    def attach(self, address, device):
+        """ Attaches a device at an address """
+        self.devices[address] = device
+        return (device)
+
+    def __read(self, address, register):
+        if (address in self.devices):
+            value = self.devices[address].read(register)
+        else:
+            value = self.registers.get((address, register), 0)
+        self.log.append(('read', address, register, value))
+        return (value)
+
+    def __write(self, address, register, value):
+        if (address in self.devices):
+            self.devices[address].write(register, value)
+        else:
+            self.registers[(address, register)] = value
+        self.log.append(('write', address, register, value))
+
+    def __block(self, length):
+        if (length > self.blockMax):
+            raise OSError(f'Block of {length} bytes exceeds {self.blockMax}')
+
+    def read(self, address, register):
+        self.transactions = self.transactions + 1
+        return (self.__read(address, register))
+
+    def write(self, address, register, value):
+        self.transactions = self.transactions + 1
+        self.__write(address, register, value)
+
+    def readBlock(self, address, register, length):
+        return (self.writeRead(address, [register], length))
+
+    def writeBlock(self, address, register, values):
+        self.__block(len(values))
+        self.transactions = self.transactions + 1
+        for value in values:
+            self.__write(address, register, value)
+
+    def writeRead(self, address, data, length):
+        self.__block(max(len(data) - 1, length))
+        self.transactions = self.transactions + 1
+        for value in data[1:]:
+            self.__write(address, data[0], value)
+        return ([self.__read(address, data[0]) for i in range(length)])
+
+
+class _Message(ctypes.Structure):
+    """ struct i2c_msg, see include/uapi/linux/i2c.h """
+    _fields_ = [('addr', ctypes.c_uint16),
+                ('flags', ctypes.c_uint16),
+                ('len', ctypes.c_uint16),
+                ('buf', ctypes.POINTER(ctypes.c_uint8))]
+
+
+class _Transfer(ctypes.Structure):
+    """ struct i2c_rdwr_ioctl_data, see include/uapi/linux/i2c-dev.h """
+    _fields_ = [('msgs', ctypes.POINTER(_Message)),
+                ('nmsgs', ctypes.c_uint32)]
+
+
+class I2CDevTransport(Transport):
+    """ Transport through /dev/i2c-N with combined I2C_RDWR messages
+
+    Needs no package beyond the standard library. Writes are queued and
+    sent together with the next read as one ioctl, the messages are
+    separated by repeated starts. An error of a queued write is raised by
+    the ioctl that carries it, the write stays queued until an ioctl
+    performs it. device is the number or the path of an adapter, an
+    already opened file descriptor can be passed as fd instead. ioctl
+    defaults to fcntl.ioctl, a stand-in with the same signature receives
+    the struct i2c_rdwr_ioctl_data, e.g. the ioctl of an EmulatedI2CDev.
+    """
+
+    I2C_RDWR = 0x0707
+    I2C_M_RD = 0x0001
+    # Messages per I2C_RDWR accepted by the i2c-dev driver
+    I2C_RDWR_IOCTL_MAX_MSGS = 42
+    # Largest message accepted by the i2c-dev driver
+    blockMax = 8192
+
+    def __init__(self, device=None, fd=None, ioctl=None, batch=True):
+        if (fd is None):
+            if (isinstance(device, int)):
+                device = f'/dev/i2c-{device}'
+            fd = os.open(device, os.O_RDWR)
+            self.__owned = True
+        else:
+            self.__owned = False
+        if (ioctl is None):
+            import fcntl
+            ioctl = fcntl.ioctl
+        self.fd = fd
+        self.ioctl = ioctl
+        # Queue writes until the next read, else write immediately
+        self.batch = batch
+        # Queued write messages as (address, bytes)
+        self.__pending = []
+        # Number of ioctl system calls
+        self.transactions = 0
+
+    def write(self, address, register, value):
+        self.__queue(address, [register, value])
+
+    def readBlock(self, address, register, length):
+        return (self.writeRead(address, [register], length))
+
+    def writeBlock(self, address, register, values):
+        self.__queue(address, [register] + list(values))
+
+    def readRegisters(self, address, registers):
+        values = []
+        # Every register takes a write and a read message
+        count = self.I2C_RDWR_IOCTL_MAX_MSGS // 2
+        for i in range(0, len(registers), count):
+            messages = []
+            responses = []
+            for register in registers[i:i + count]:
+                response = (ctypes.c_uint8 * 1)()
+                messages.append((address, [register]))
+                messages.append((address, response))
+                responses.append(response)
+            self.__combine(messages)
+            values.extend(response[0] for response in responses)
+        return (values)
+
+    def writeRead(self, address, data, length):
+        response = (ctypes.c_uint8 * length)()
+        self.__combine([(address, list(data)), (address, response)])
+        return (list(response))
+
+    def flush(self):
+        # Queued writes are only dropped once they have been performed
+        while (len(self.__pending) > 0):
+            count = min(len(self.__pending), self.I2C_RDWR_IOCTL_MAX_MSGS)
+            self.__transfer(self.__pending[0:count])
+            self.__pending = self.__pending[count:]
+
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            if (self.__owned and (self.fd is not None)):
+                os.close(self.fd)
+            self.fd = None
+
+    def __combine(self, messages):
+        """ Performs messages together with the queued writes """
+        if (len(self.__pending) + len(messages) >
+                self.I2C_RDWR_IOCTL_MAX_MSGS):
+            self.flush()
+        self.__transfer(self.__pending + messages)
+        self.__pending = []
+
+    def __queue(self, address, data):
+        self.__pending.append((address, data))
+        # Leave room for the write and read message of a register read
+        if ((not self.batch) or (len(self.__pending) >=
+                                 self.I2C_RDWR_IOCTL_MAX_MSGS - 2)):
+            self.flush()
+
+    def __transfer(self, messages):
+        """ Performs write and read messages with one ioctl
+
+        Lists of bytes are written, ctypes arrays are filled by reads
+        """
+        structs = (_Message * len(messages))()
+        for i in range(len(messages)):
+            (address, data) = messages[i]
+            if (isinstance(data, list)):
+                # Referenced by structs until the ioctl returns
+                data = (ctypes.c_uint8 * len(data))(*data)
+                messages[i] = (address, data)
+                flags = 0
+            else:
+                flags = self.I2C_M_RD
+            structs[i].addr = address
+            structs[i].flags = flags
+            structs[i].len = len(data)
+            structs[i].buf = ctypes.cast(data, ctypes.POINTER(ctypes.c_uint8))
+
+        transfer = _Transfer(structs, len(messages))
+        self.transactions = self.transactions + 1
+        self.ioctl(self.fd, self.I2C_RDWR, transfer)
+
+
+def transportOf(Bus):
+    """ Returns a transport for an SMBus compatible object
+
+    Objects with i2c_rdwr, e.g. an smbus2.SMBus, use combined messages.
+    The path of an adapter, e.g. /dev/i2c-1, opens an I2CDevTransport.
+    """
+    if (isinstance(Bus, Transport)):
+        return (Bus)
+    if (isinstance(Bus, str)):
+        return (I2CDevTransport(Bus))
+    if (hasattr(Bus, 'i2c_rdwr')):
+        return (SMBus2Transport(Bus))
+    return (SMBusTransport(Bus))
+
+
+def openAdapter(number):
+    """ Opens /dev/i2c-<number>, with smbus2 if available, else smbus """
+    try:
+        from smbus2 import SMBus
+    except ImportError:
+        from smbus import SMBus
+    return (transportOf(SMBus(number)))
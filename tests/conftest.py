@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+# -*- coding: utf8 -*-
+"""
+Fixtures of the tests, readers on an emulated bus
+"""
+
+__author__ = "Christoph Pranzl"
+__version__ = "0.0.5"
+__license__ = "GPLv3"
+
+import pytest
+
+from mfrc522_i2c import MFRC522, FakeTransport
+from mfrc522_i2c.emulator import EmulatedMFRC522
+
+ADDRESS = 0x28
+
+
+@pytest.fixture
+def emulated():
+    """ Returns a factory of a reader and its emulated MFRC522 """
+    readers = []
+
+    def create(cards, **kwargs):
+        transport = FakeTransport()
+        device = transport.attach(ADDRESS, EmulatedMFRC522(cards))
+        reader = MFRC522(transport, ADDRESS, **kwargs)
+        readers.append(reader)
+        return ((reader, device))
+
+    yield create
+    for reader in readers:
+        reader.close()
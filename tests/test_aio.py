@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# -*- coding: utf8 -*-
+"""
+asyncio front-end and the workers of the I2C buses
+"""
+
+__author__ = "Christoph Pranzl"
+__version__ = "0.0.5"
+__license__ = "GPLv3"
+
+import asyncio
+
+from mfrc522_i2c import AsyncMFRC522, FakeTransport, busExecutor, \
+    closeBusExecutor
+from mfrc522_i2c.emulator import EmulatedMFRC522, MifareClassic
+
+ADDRESS = 0x28
+UID = [0xDE, 0xAD, 0xBE, 0xEF]
+
+
+def _run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return (loop.run_until_complete(coroutine))
+    finally:
+        loop.close()
+
+
+def test_number_and_path_share_a_worker():
+    executor = busExecutor(1)
+    assert busExecutor('/dev/i2c-1') is executor
+    assert busExecutor(2) is not executor
+
+    closeBusExecutor(1)
+    assert busExecutor('/dev/i2c-1') is not executor
+    closeBusExecutor()
+
+
+def test_worker_ends_with_the_last_reader():
+    transport = FakeTransport()
+    transport.attach(ADDRESS, EmulatedMFRC522([MifareClassic(UID)]))
+
+    async def session():
+        first = await AsyncMFRC522.open(transport, ADDRESS)
+        second = await AsyncMFRC522.open(transport, ADDRESS)
+        assert first.executor is second.executor
+        assert (await first.scan())[0] == first.reader.MIFARE_OK
+
+        await first.close()
+        assert busExecutor(transport) is second.executor
+        async with second:
+            (status, uid, sak) = await second.anticollision()
+            assert uid == UID
+        return (second.executor)
+
+    executor = _run(session())
+    assert busExecutor(transport) is not executor
+    closeBusExecutor()
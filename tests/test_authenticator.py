@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf8 -*-
+"""
+Authentication with a dictionary of keys and the cache of working keys
+"""
+
+__author__ = "Christoph Pranzl"
+__version__ = "0.0.5"
+__license__ = "GPLv3"
+
+from mfrc522_i2c import MFRC522, KeyAuthenticator
+from mfrc522_i2c.emulator import MifareClassic
+
+UID = [0xDE, 0xAD, 0xBE, 0xEF]
+OTHER_UID = [0x01, 0x02, 0x03, 0x04]
+KEY = [0xA0, 0xA1, 0xA2, 0xA3, 0xA4, 0xA5]
+
+
+def _card(uid):
+    """ Returns a card that needs KEY for sector 2 """
+    card = MifareClassic(uid)
+    card.memory[11][0:6] = KEY
+    return (card)
+
+
+def _selected(reader):
+    reader.halt()
+    assert reader.wakeup()[0] == reader.MIFARE_OK
+    assert reader.anticollision()[0] == reader.MIFARE_OK
+
+
+def test_miss_then_hit(emulated):
+    (reader, device) = emulated([_card(UID)])
+    _selected(reader)
+    authenticator = KeyAuthenticator(reader,
+                                     keysA=[MFRC522.MIFARE_KEY, KEY])
+
+    # The default key is tried first and fails
+    assert authenticator.authenticate(9) == (reader.MIFARE_OK,
+                                             MFRC522.MIFARE_AUTHKEY1, KEY)
+    assert (authenticator.hits, authenticator.failures) == (0, 1)
+    assert authenticator.keyOf(2) == (MFRC522.MIFARE_AUTHKEY1, KEY)
+    assert reader.read(9)[0] == reader.MIFARE_OK
+
+    # The remembered key works at once
+    _selected(reader)
+    assert authenticator.authenticate(8)[0] == reader.MIFARE_OK
+    assert (authenticator.hits, authenticator.failures) == (1, 1)
+
+    authenticator.forget(UID)
+    assert authenticator.keyOf(2) is None
+
+
+def test_hit_for_card_of_same_type(emulated):
+    (reader, device) = emulated([_card(UID)])
+    _selected(reader)
+    authenticator = KeyAuthenticator(reader,
+                                     keysA=[MFRC522.MIFARE_KEY, KEY])
+    assert authenticator.authenticate(9)[0] == reader.MIFARE_OK
+
+    device.cards[:] = [_card(OTHER_UID)]
+    _selected(reader)
+    assert authenticator.keyOf(2) is None
+    assert authenticator.authenticate(9)[0] == reader.MIFARE_OK
+    assert (authenticator.hits, authenticator.failures) == (1, 1)
+
+
+def test_no_key_works(emulated):
+    (reader, device) = emulated([_card(UID)])
+    _selected(reader)
+    authenticator = KeyAuthenticator(reader, keysA=[MFRC522.MIFARE_KEY],
+                                     keysB=[[0x00] * 6])
+
+    (status, keyType, key) = authenticator.authenticate(9)
+    assert status != reader.MIFARE_OK
+    assert (keyType, key) == (None, None)
+    assert authenticator.failures == 2
+    assert authenticator.keyOf(2) is None
+    # The card was selected again for the next command
+    assert authenticator.authenticate(4)[0] == reader.MIFARE_OK
+
+
+def test_read_card_with_changed_key(emulated):
+    card = _card(UID)
+    (reader, device) = emulated([card])
+    _selected(reader)
+    authenticator = KeyAuthenticator(reader,
+                                     keysA=[MFRC522.MIFARE_KEY, KEY])
+    card.memory[9] = list(range(16))
+
+    (status, data, blockStatus) = authenticator.read_card()
+    assert status == reader.MIFARE_OK
+    assert data[9 * 16:10 * 16] == list(range(16))
+
+    # A key that no longer works is dropped and the candidates are tried
+    card.memory[11][0:6] = MFRC522.MIFARE_KEY
+    _selected(reader)
+    (status, data, blockStatus) = authenticator.read_sector(2)
+    assert status == reader.MIFARE_OK
+    assert data[16:32] == list(range(16))
+    assert authenticator.keyOf(2) == (MFRC522.MIFARE_AUTHKEY1,
+                                      MFRC522.MIFARE_KEY)
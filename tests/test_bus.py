@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf8 -*-
+"""
+Shared handles of I2C adapters
+"""
+
+__author__ = "Christoph Pranzl"
+__version__ = "0.0.5"
+__license__ = "GPLv3"
+
+from mfrc522_i2c import MFRC522, FakeTransport, bus, openBus
+from mfrc522_i2c.emulator import EmulatedMFRC522, EmulatedSMBus
+
+ADDRESS = 0x28
+
+
+class _Adapter(FakeTransport):
+    """ Transport that records how often it was closed """
+
+    def __init__(self):
+        super().__init__()
+        self.closed = 0
+
+    def close(self):
+        self.closed = self.closed + 1
+
+
+class _SMBus(EmulatedSMBus):
+    """ SMBus of the caller that records how often it was closed """
+
+    def __init__(self):
+        super().__init__()
+        self.closed = 0
+
+    def close(self):
+        self.closed = self.closed + 1
+
+
+def test_caller_bus_is_left_open():
+    Bus = _SMBus()
+    Bus.attach(ADDRESS, EmulatedMFRC522())
+
+    reader = MFRC522(Bus, ADDRESS)
+    reader.close()
+    assert Bus.closed == 0
+
+    # The bus is still usable by another reader
+    reader = MFRC522(Bus, ADDRESS)
+    assert reader.getReaderVersion() is not None
+    reader.close()
+    assert Bus.closed == 0
+
+
+def test_number_and_path_share_a_handle(monkeypatch):
+    adapters = []
+
+    def opened(Bus):
+        adapters.append(_Adapter())
+        return (adapters[-1])
+
+    monkeypatch.setattr(bus, 'openAdapter', opened)
+    monkeypatch.setattr(bus, 'transportOf', opened)
+
+    first = openBus(1)
+    second = openBus('/dev/i2c-1')
+    assert second is first
+    assert second.lock is first.lock
+    assert len(adapters) == 1
+    other = openBus(2)
+    assert other is not first
+    other.close()
+
+    # The owned adapter is closed with the last reference
+    first.close()
+    assert adapters[0].closed == 0
+    second.close()
+    assert adapters[0].closed == 1
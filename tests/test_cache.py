@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf8 -*-
+"""
+Reads answered by the block cache
+"""
+
+__author__ = "Christoph Pranzl"
+__version__ = "0.0.5"
+__license__ = "GPLv3"
+
+from mfrc522_i2c import MFRC522, BlockCache
+from mfrc522_i2c.emulator import MifareClassic
+
+UID = [0xDE, 0xAD, 0xBE, 0xEF]
+
+
+def _authenticated(reader, blockAddr):
+    reader.halt()
+    reader.wakeup()
+    reader.anticollision()
+    (status, backData, backBits) = reader.authenticate(
+        MFRC522.MIFARE_AUTHKEY1, blockAddr, MFRC522.MIFARE_KEY, UID)
+    assert status == MFRC522.MIFARE_OK
+
+
+def test_hits_of_the_authenticated_card(emulated):
+    (reader, device) = emulated([MifareClassic(UID)],
+                                blockCache=BlockCache())
+    _authenticated(reader, 9)
+    assert reader.read(9)[0] == reader.MIFARE_OK
+
+    transactions = reader.transport.transactions
+    assert reader.read(9)[0] == reader.MIFARE_OK
+    assert reader.transport.transactions == transactions
+
+
+def test_no_hits_after_the_card_left(emulated):
+    card = MifareClassic(UID)
+    (reader, device) = emulated([card], blockCache=BlockCache())
+    _authenticated(reader, 9)
+    assert reader.read(9)[0] == reader.MIFARE_OK
+
+    device.cards.remove(card)
+    assert reader.scan()[0] != reader.MIFARE_OK
+    assert reader.read(9)[0] != reader.MIFARE_OK
+    assert reader.read_sector(2, MFRC522.MIFARE_KEY)[0] != reader.MIFARE_OK
+
+
+def test_no_hits_of_other_sectors(emulated):
+    (reader, device) = emulated([MifareClassic(UID)],
+                                blockCache=BlockCache())
+    _authenticated(reader, 9)
+    assert reader.read(9)[0] == reader.MIFARE_OK
+
+    _authenticated(reader, 4)
+    transactions = reader.transport.transactions
+    reader.read(9)
+    assert reader.transport.transactions > transactions
+
+
+def test_sector_hits_need_the_key(emulated):
+    (reader, device) = emulated([MifareClassic(UID)],
+                                blockCache=BlockCache())
+    _authenticated(reader, 4)
+    (status, data, blockStatus) = reader.read_sector(1, MFRC522.MIFARE_KEY)
+    assert status == reader.MIFARE_OK
+
+    # Same sector and key, answered by the cache
+    transactions = reader.transport.transactions
+    assert reader.read_sector(1, MFRC522.MIFARE_KEY) == (
+        reader.MIFARE_OK, data, blockStatus)
+    assert reader.transport.transactions == transactions
+
+    (status, backData, backStatus) = reader.read_sector(1, [0x00] * 6)
+    assert status == reader.MIFARE_ERR
+    assert backData == [0] * 64
+
+    assert reader.read_sector(1, MFRC522.MIFARE_KEY)[0] == reader.MIFARE_OK
+
+
+def test_selected_frame_is_invalidated(emulated):
+    card = MifareClassic(UID)
+    cache = BlockCache()
+    (reader, device) = emulated([card], blockCache=cache)
+
+    assert reader.scan()[0] == reader.MIFARE_OK
+    (status, frame, backBits) = reader.identify()
+    assert len(frame) == 5
+    assert reader.select(frame)[0] == reader.MIFARE_OK
+    assert reader.serialNumber == UID
+    assert reader.authenticate(MFRC522.MIFARE_AUTHKEY1, 9,
+                               MFRC522.MIFARE_KEY, frame)[0] == \
+        reader.MIFARE_OK
+    assert reader.read(9)[0] == reader.MIFARE_OK
+    assert cache.get(UID, 9) is not None
+
+    device.cards.remove(card)
+    assert not reader.is_present(UID)
+    assert cache.get(UID, 9) is None
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf8 -*-
+"""
+Arrival and departure events of cards
+"""
+
+__author__ = "Christoph Pranzl"
+__version__ = "0.0.5"
+__license__ = "GPLv3"
+
+import time
+
+import pytest
+
+import mfrc522_i2c.mfrc522_i2c
+from mfrc522_i2c import TagArrived, TagLeft
+from mfrc522_i2c.emulator import MifareClassic
+
+INTERVAL = 0.25
+
+
+class _Rounds(Exception):
+    pass
+
+
+class _Clock:
+    """ Time of the driver, advanced by the pauses of events() """
+
+    def __init__(self, rounds):
+        self.offset = 0.0
+        self.rounds = rounds
+        # Changes of the field by number of remaining rounds
+        self.actions = {}
+
+    def monotonic(self):
+        return (time.monotonic() + self.offset)
+
+    def perf_counter(self):
+        return (time.perf_counter())
+
+    def sleep(self, delay):
+        if (delay != INTERVAL):
+            return
+        self.offset = self.offset + delay
+        self.rounds = self.rounds - 1
+        if (self.rounds == 0):
+            raise _Rounds
+        if (self.rounds in self.actions):
+            self.actions[self.rounds]()
+
+
+def _events(reader, clock):
+    events = []
+    try:
+        for event in reader.events(interval=INTERVAL):
+            events.append(event)
+    except _Rounds:
+        pass
+    return (events)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock(0)
+    monkeypatch.setattr(mfrc522_i2c.mfrc522_i2c, 'time', clock)
+    return (clock)
+
+
+def test_stationary_cards_cause_no_events(emulated, clock):
+    uids = [[0x01, 0x02, 0x03, 0x04], [0x05, 0x06, 0x07, 0x08]]
+    (reader, device) = emulated([MifareClassic(uid) for uid in uids])
+
+    clock.rounds = 12
+    events = _events(reader, clock)
+    assert sorted(events) == sorted(TagArrived(uid, [0x04, 0x00], 0x08)
+                                    for uid in uids)
+
+
+def test_removed_card_leaves(emulated, clock):
+    uids = [[0x01, 0x02, 0x03, 0x04], [0x05, 0x06, 0x07, 0x08]]
+    cards = [MifareClassic(uid) for uid in uids]
+    (reader, device) = emulated(cards)
+
+    clock.rounds = 12
+    clock.actions[10] = lambda: device.cards.remove(cards[1])
+    events = _events(reader, clock)
+    assert events[2:] == [TagLeft(uids[1])]
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf8 -*-
+"""
+Waiting for the IRQ pin through the edge events of a GPIOInterrupt
+"""
+
+__author__ = "Christoph Pranzl"
+__version__ = "0.0.5"
+__license__ = "GPLv3"
+
+import os
+import time
+
+import pytest
+
+from mfrc522_i2c import MFRC522, FakeTransport
+from mfrc522_i2c.emulator import EmulatedMFRC522, MifareClassic
+from mfrc522_i2c.gpio import GPIOInterrupt
+
+ADDRESS = 0x28
+UID = [0xDE, 0xAD, 0xBE, 0xEF]
+
+
+class _Pin(EmulatedMFRC522):
+    """ Emulated MFRC522 that signals its IRQ pin through a pipe
+
+    Every enabled interrupt request raised by a write sends one edge event
+    """
+
+    def __init__(self, cards, fd):
+        self.fd = fd
+        self.edges = 0
+        super().__init__(cards)
+
+    def __pending(self):
+        return (self.registers[self.COMIRQREG] &
+                self.registers[0x02] & 0x7F)
+
+    def write(self, register, value):
+        pending = self.__pending()
+        super().write(register, value)
+        if (self.__pending() & ~pending):
+            os.write(self.fd, bytes(GPIOInterrupt.EVENT_SIZE))
+            self.edges = self.edges + 1
+
+
+@pytest.fixture
+def wired():
+    """ Returns a reader, its MFRC522 and the waits of its IRQ pin """
+    (readFd, writeFd) = os.pipe()
+    irq = GPIOInterrupt(fd=readFd)
+    waits = []
+    wait = irq.wait
+
+    def recorded(timeout):
+        edge = wait(timeout)
+        waits.append((timeout, edge))
+        return (edge)
+
+    irq.wait = recorded
+    transport = FakeTransport()
+    device = transport.attach(ADDRESS, _Pin([MifareClassic(UID)], writeFd))
+    reader = MFRC522(transport, ADDRESS, irq=irq)
+    del waits[:]
+    device.edges = 0
+    yield (reader, device, waits)
+    reader.close()
+    irq.close()
+    os.close(writeFd)
+
+
+def test_wait_for_edge(wired):
+    (reader, device, waits) = wired
+
+    (status, backData, tagType) = reader.scan()
+    assert status == reader.MIFARE_OK
+    # The answer of the card ended the wait with an edge
+    assert device.edges > 0
+    assert (len(waits) > 0) and (waits[-1][1])
+    # All edge events were consumed
+    assert not GPIOInterrupt.wait(reader.irq, 0)
+
+
+def test_wait_until_deadline(wired):
+    (reader, device, waits) = wired
+    # The command never ends, neither the card nor the timer interrupts
+    device.transceive = lambda: None
+
+    start = time.monotonic()
+    (status, backData, tagType) = reader.scan()
+    elapsed = time.monotonic() - start
+    assert status != reader.MIFARE_OK
+    assert device.edges == 0
+    (timeout, edge) = waits[-1]
+    assert (timeout > 0) and (not edge)
+    assert elapsed >= timeout
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf8 -*-
+"""
+Combined I2C_RDWR messages of an I2CDevTransport
+"""
+
+__author__ = "Christoph Pranzl"
+__version__ = "0.0.5"
+__license__ = "GPLv3"
+
+import pytest
+
+from mfrc522_i2c import MFRC522, I2CDevTransport
+from mfrc522_i2c.emulator import EmulatedI2CDev, EmulatedMFRC522, \
+    MifareClassic
+
+ADDRESS = 0x28
+UID = [0xDE, 0xAD, 0xBE, 0xEF]
+
+
+class _Recorder(EmulatedI2CDev):
+    """ Records the messages of every ioctl as 'w' or 'r' """
+
+    def __init__(self, devices=None):
+        super().__init__(devices)
+        self.calls = []
+
+    def ioctl(self, fd, request, transfer):
+        self.calls.append([('r' if (transfer.msgs[i].flags & self.I2C_M_RD)
+                            else 'w') for i in range(transfer.nmsgs)])
+        return (super().ioctl(fd, request, transfer))
+
+
+def _read(batch):
+    """ Scans and reads a block, returns the data and the ioctls """
+    bus = _Recorder()
+    bus.attach(ADDRESS, EmulatedMFRC522([MifareClassic(UID)]))
+    reader = MFRC522(I2CDevTransport(fd=0, ioctl=bus.ioctl, batch=batch),
+                     ADDRESS)
+    del bus.calls[:]
+
+    assert reader.scan()[0] == reader.MIFARE_OK
+    (status, serialNumber, sak) = reader.anticollision()
+    assert status == reader.MIFARE_OK
+    assert reader.authenticate(reader.MIFARE_AUTHKEY1, 8, reader.MIFARE_KEY,
+                               serialNumber)[0] == reader.MIFARE_OK
+    (status, backData, backBits) = reader.read(8)
+    assert status == reader.MIFARE_OK
+    reader.close()
+
+    return ((backData, bus.calls))
+
+
+def test_writes_are_batched():
+    (data, calls) = _read(batch=True)
+    (unbatchedData, unbatchedCalls) = _read(batch=False)
+
+    assert data == unbatchedData
+    # Several writes share one I2C_RDWR with the read that follows them
+    assert any((call.count('w') > 2) and (call[-1] == 'r')
+               for call in calls)
+    assert len(calls) < len(unbatchedCalls) / 2
+    for call in unbatchedCalls:
+        assert call.count('w') <= 1 + call.count('r')
+
+
+def test_messages_per_ioctl():
+    (data, calls) = _read(batch=True)
+    assert max(len(call) for call in calls) <= \
+        I2CDevTransport.I2C_RDWR_IOCTL_MAX_MSGS
+
+
+@pytest.mark.parametrize('writes', [1, 39, 40, 41, 100])
+def test_messages_of_long_sequences(writes):
+    bus = _Recorder()
+    bus.attach(ADDRESS, EmulatedMFRC522())
+    transport = I2CDevTransport(fd=0, ioctl=bus.ioctl)
+
+    for i in range(writes):
+        transport.write(ADDRESS, 0x24, i & 0xFF)
+    values = transport.readRegisters(ADDRESS, [0x24] * 30 + [0x37])
+    transport.close()
+
+    assert values == [(writes - 1) & 0xFF] * 30 + [EmulatedMFRC522.VERSION]
+    assert sum(call.count('w') for call in bus.calls) == writes + 31
+    for call in bus.calls:
+        assert len(call) <= I2CDevTransport.I2C_RDWR_IOCTL_MAX_MSGS
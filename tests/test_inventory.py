@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+# -*- coding: utf8 -*-
+"""
+Enumeration of several cards in the field
+"""
+
+__author__ = "Christoph Pranzl"
+__version__ = "0.0.5"
+__license__ = "GPLv3"
+
+from mfrc522_i2c.emulator import MifareClassic, Ultralight
+
+UIDS = [[0x01, 0x02, 0x03, 0x04],
+        [0x01, 0x02, 0x03, 0x05],
+        [0x81, 0x02, 0x03, 0x04],
+        [0x09, 0x09, 0x09, 0x09]]
+
+
+def test_consecutive_inventories(emulated):
+    (reader, device) = emulated([MifareClassic(uid) for uid in UIDS])
+
+    for i in range(3):
+        (status, tags) = reader.inventory()
+        assert status == reader.MIFARE_OK
+        assert sorted(uid for (uid, atqa, sak) in tags) == sorted(UIDS)
+
+
+def test_inventory_of_cascaded_uids(emulated):
+    # Both cards share the frame of the first cascade level
+    uids = [[0x04, 0x01, 0x02, 0x03, 0x04, 0x05, 0x06],
+            [0x04, 0x01, 0x02, 0x03, 0x04, 0x05, 0x07]]
+    (reader, device) = emulated([Ultralight(uid) for uid in uids] +
+                                [MifareClassic(UIDS[0])])
+
+    for i in range(2):
+        (status, tags) = reader.inventory()
+        assert sorted(uid for (uid, atqa, sak) in tags) == sorted(
+            uids + [UIDS[0]])
+
+
+def test_inventory_of_empty_field(emulated):
+    (reader, device) = emulated([])
+
+    assert reader.inventory() == (reader.MIFARE_NOTAGERR, [])
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+# -*- coding: utf8 -*-
+"""
+Attribution of bus transactions to the commands of the reader
+"""
+
+__author__ = "Christoph Pranzl"
+__version__ = "0.0.5"
+__license__ = "GPLv3"
+
+from mfrc522_i2c import Metrics
+from mfrc522_i2c.emulator import MifareClassic, Ultralight
+
+UID = [0xDE, 0xAD, 0xBE, 0xEF]
+
+
+def _commands(metrics):
+    counters = metrics.snapshot()['counters']
+    return (set(sample['labels']['command'] for name in counters
+                for sample in counters[name]))
+
+
+def test_initialization_is_attributed(emulated):
+    metrics = Metrics()
+    (reader, device) = emulated([MifareClassic(UID)], metrics=metrics)
+
+    assert _commands(metrics) == {'init'}
+    assert reader.activeCommand is None
+
+    reader.scan()
+    assert _commands(metrics) == {'init', 'scan'}
+    assert 'None' not in metrics.prometheus()
+
+
+def test_stream_is_attributed(emulated):
+    metrics = Metrics()
+    uid = [0x04, 0x01, 0x02, 0x03, 0x04, 0x05, 0x06]
+    (reader, device) = emulated([Ultralight(uid)], metrics=metrics)
+    reader.wakeup()
+    assert reader.anticollision()[0] == reader.MIFARE_OK
+    metrics.reset()
+
+    chunks = list(reader.ntag_stream(0, 63))
+    assert [status for (status, page, backData) in chunks] == \
+        [reader.MIFARE_OK] * len(chunks)
+    assert len(chunks) > 1
+    assert _commands(metrics) == {'ntag_stream'}
+    # One latency per chunk
+    [latencies] = metrics.snapshot()['histograms']['command_seconds']
+    assert latencies['labels'] == {'command': 'ntag_stream'}
+    assert latencies['count'] == len(chunks)
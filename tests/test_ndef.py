@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf8 -*-
+"""
+NDEF messages of NFC Forum Type 2 tags and MIFARE Classic cards
+"""
+
+__author__ = "Christoph Pranzl"
+__version__ = "0.0.5"
+__license__ = "GPLv3"
+
+from mfrc522_i2c import Ndef
+from mfrc522_i2c.emulator import MifareClassic, Ultralight
+from mfrc522_i2c.ndef import MAD_KEY, NFC_KEY, _madCRC
+
+NTAG_UID = [0x04, 0x01, 0x02, 0x03, 0x04, 0x05, 0x06]
+CLASSIC_UID = [0xDE, 0xAD, 0xBE, 0xEF]
+
+# Short well known records with the message begin and end flags
+URI_RECORD = [0xD1, 0x01, 12, ord('U'), 0x04] + list(b'example.com')
+TEXT = 'Hello from a MIFARE Classic card, continued in another sector'
+TEXT_RECORD = ([0xD1, 0x01, 3 + len(TEXT), ord('T'), 0x02] + list(b'en') +
+               list(TEXT.encode('utf-8')))
+
+
+def _tlv(message):
+    return ([0x03, len(message)] + message + [0xFE])
+
+
+def _selected(reader):
+    assert reader.scan()[0] == reader.MIFARE_OK
+    assert reader.anticollision()[0] == reader.MIFARE_OK
+
+
+class _Recorded(Ultralight):
+    """ Ultralight that counts the READ commands """
+
+    def __init__(self, uid, pages):
+        super().__init__(uid, pages)
+        self.reads = 0
+
+    def receive(self, data, bits):
+        if (data[0] == 0x30):
+            self.reads = self.reads + 1
+        return (super().receive(data, bits))
+
+
+def _ntag(data):
+    card = _Recorded(NTAG_UID, pages=45)
+    data = data + [0] * (-len(data) % 4)
+    for i in range(0, len(data), 4):
+        card.pages[4 + i // 4] = data[i:i + 4]
+    return (card)
+
+
+def _classic(data, sectors):
+    """ Returns a card with data in the NDEF sectors listed in its MAD """
+    card = MifareClassic(CLASSIC_UID)
+    mad = [0, 0x01] + [0] * 30
+    for sector in sectors:
+        mad[2 * sector:2 * sector + 2] = [0xE1, 0x03]
+    mad[0] = _madCRC(mad[1:])
+    card.memory[1] = mad[0:16]
+    card.memory[2] = mad[16:32]
+    card.memory[3][0:6] = MAD_KEY
+
+    blocks = []
+    for sector in sectors:
+        card.memory[sector * 4 + 3][0:6] = NFC_KEY
+        blocks.extend(range(sector * 4, sector * 4 + 3))
+    data = data + [0] * (-len(data) % 16)
+    for i in range(0, len(data), 16):
+        card.memory[blocks[i // 16]] = data[i:i + 16]
+    return (card)
+
+
+def test_uri_on_ntag(emulated):
+    (reader, device) = emulated([_ntag(_tlv(URI_RECORD))])
+    _selected(reader)
+
+    ndef = Ndef(reader)
+    assert ndef.uri() == 'https://example.com'
+    assert ndef.status == reader.MIFARE_OK
+
+    # FAST_READ once the type of the tag is known
+    assert reader.ntag_get_version()[0] == reader.MIFARE_OK
+    assert Ndef(reader).uri() == 'https://example.com'
+
+
+def test_records_on_ntag(emulated):
+    second = [0x51, 0x01, 4, ord('T'), 0x02] + list(b'en!')
+    first = [0x91] + URI_RECORD[1:]
+    (reader, device) = emulated([_ntag(_tlv(first + second))])
+    _selected(reader)
+
+    records = list(Ndef(reader).records())
+    assert [record.type for record in records] == [b'U', b'T']
+    assert records[1].text() == '!'
+    assert records[1].language() == 'en'
+
+
+def test_lazy_reads(emulated):
+    second = [0x51, 0x01, 101, ord('T'), 0x02] + list(b'en') + [0x21] * 98
+    first = [0x91] + URI_RECORD[1:]
+    card = _ntag(_tlv(first + second))
+    (reader, device) = emulated([card])
+    _selected(reader)
+
+    # The capability container and the URI record fill two READs
+    assert Ndef(reader).uri() == 'https://example.com'
+    assert card.reads == 2
+
+    card.reads = 0
+    records = list(Ndef(reader).records())
+    assert records[1].text() == '!' * 98
+    assert card.reads > 2
+
+
+def test_ntag_without_message(emulated):
+    (reader, device) = emulated([_ntag([0xFE])])
+    _selected(reader)
+
+    ndef = Ndef(reader)
+    assert list(ndef.records()) == []
+    assert ndef.status == reader.MIFARE_ERR
+
+
+def test_text_on_classic(emulated):
+    # The message continues from sector 1 in sector 3
+    (reader, device) = emulated([_classic(_tlv(TEXT_RECORD), [1, 3])])
+    _selected(reader)
+
+    ndef = Ndef(reader)
+    record = ndef.find(b'T')
+    assert ndef.status == reader.MIFARE_OK
+    assert record.language() == 'en'
+    assert record.text() == TEXT
+    assert Ndef(reader).text() == TEXT
+
+
+def test_classic_with_wrong_mad_key(emulated):
+    card = _classic(_tlv(TEXT_RECORD), [1, 3])
+    card.memory[3][0:6] = [0xFF] * 6
+    (reader, device) = emulated([card])
+    _selected(reader)
+
+    ndef = Ndef(reader)
+    assert ndef.text() is None
+    assert ndef.status == reader.MIFARE_ERR
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+# -*- coding: utf8 -*-
+"""
+Presence checks of selected cards
+"""
+
+__author__ = "Christoph Pranzl"
+__version__ = "0.0.5"
+__license__ = "GPLv3"
+
+from mfrc522_i2c.cardtypes import NTAG216
+from mfrc522_i2c.emulator import Ultralight
+
+UID = [0x04, 0x01, 0x02, 0x03, 0x04, 0x05, 0x06]
+
+
+class _Recorded(Ultralight):
+    """ Ultralight that records the first byte of every frame """
+
+    def __init__(self, uid):
+        super().__init__(uid)
+        self.frames = []
+
+    def receive(self, data, bits):
+        self.frames.append(data[0])
+        return (super().receive(data, bits))
+
+
+def test_presence_of_identified_ntag(emulated):
+    card = _Recorded(UID)
+    (reader, device) = emulated([card])
+    assert reader.scan()[0] == reader.MIFARE_OK
+    assert reader.anticollision()[0] == reader.MIFARE_OK
+    assert reader.ntag_get_version()[0] == reader.MIFARE_OK
+    assert reader.cardType is NTAG216
+
+    # A single READ of page 0 keeps the card selected, no WUPA and SELECT
+    del card.frames[:]
+    assert reader.is_present(UID)
+    assert reader.is_present(UID)
+    assert card.frames == [0x30, 0x30]
+
+    device.cards.remove(card)
+    assert not reader.is_present(UID)
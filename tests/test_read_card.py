@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf8 -*-
+"""
+Reading all sectors of a MIFARE Classic card
+"""
+
+__author__ = "Christoph Pranzl"
+__version__ = "0.0.5"
+__license__ = "GPLv3"
+
+from mfrc522_i2c.emulator import NAK, MifareClassic
+
+UID = [0xDE, 0xAD, 0xBE, 0xEF]
+
+
+def test_sectors_without_key(emulated):
+    (reader, device) = emulated([MifareClassic(UID)])
+    assert reader.scan()[0] == reader.MIFARE_OK
+    assert reader.anticollision()[0] == reader.MIFARE_OK
+
+    keys = {sector: reader.MIFARE_KEY for sector in range(16)
+            if (sector != 3)}
+    (status, data, blockStatus) = reader.read_card(keys)
+
+    assert status == reader.MIFARE_ERR
+    assert len(data) == 64 * reader.MIFARE_BLOCKSIZE
+    for blockAddr in range(64):
+        if (reader.sectorOfBlock(blockAddr) == 3):
+            assert blockStatus[blockAddr] == reader.MIFARE_ERR
+            offset = blockAddr * reader.MIFARE_BLOCKSIZE
+            assert data[offset:offset + reader.MIFARE_BLOCKSIZE] == \
+                [0] * reader.MIFARE_BLOCKSIZE
+        else:
+            assert blockStatus[blockAddr] == reader.MIFARE_OK
+
+
+class _Damaged(MifareClassic):
+    """ MIFARE Classic card that refuses to read one block """
+
+    def __init__(self, uid, block):
+        super().__init__(uid)
+        self.block = block
+
+    def command(self, data):
+        if ((self.pending is None) and (data[0:2] == [0x30, self.block])):
+            return (NAK + (self.RESPONSE_TIME,))
+        return (super().command(data))
+
+
+def test_refused_read(emulated):
+    (reader, device) = emulated([_Damaged(UID, 5)])
+    assert reader.scan()[0] == reader.MIFARE_OK
+    assert reader.anticollision()[0] == reader.MIFARE_OK
+    assert reader.authenticate(reader.MIFARE_AUTHKEY1, 7, reader.MIFARE_KEY,
+                               UID)[0] == reader.MIFARE_OK
+
+    assert reader.read(5) == (reader.MIFARE_ERR, [], 0)
+    # The NAK sent the card back to IDLE
+    assert reader.read(4)[0] != reader.MIFARE_OK
+
+
+def test_sector_with_refused_block(emulated):
+    (reader, device) = emulated([_Damaged(UID, 5)])
+    device.cards[0].memory[6] = list(range(16))
+    assert reader.scan()[0] == reader.MIFARE_OK
+    assert reader.anticollision()[0] == reader.MIFARE_OK
+
+    (status, data, blockStatus) = reader.read_sector(1, reader.MIFARE_KEY)
+    assert status == reader.MIFARE_ERR
+    assert blockStatus == {4: reader.MIFARE_OK, 5: reader.MIFARE_ERR,
+                           6: reader.MIFARE_OK, 7: reader.MIFARE_OK}
+    # Every block keeps its offset in the content of the sector
+    assert len(data) == 4 * reader.MIFARE_BLOCKSIZE
+    assert data[16:32] == [0] * 16
+    assert data[32:48] == list(range(16))
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# -*- coding: utf8 -*-
+"""
+Register accesses answered by the shadow copy of the registers
+"""
+
+__author__ = "Christoph Pranzl"
+__version__ = "0.0.5"
+__license__ = "GPLv3"
+
+from mfrc522_i2c import MFRC522
+from mfrc522_i2c.emulator import MifareClassic
+
+UID = [0xDE, 0xAD, 0xBE, 0xEF]
+
+
+def _session(reader):
+    """ Returns the results of a scan and a read of block 9 """
+    results = [reader.scan(), reader.anticollision()]
+    results.append(reader.authenticate(MFRC522.MIFARE_AUTHKEY1, 9,
+                                       MFRC522.MIFARE_KEY, UID))
+    results.append(reader.read(9))
+    reader.deauthenticate()
+    reader.halt()
+    return (results)
+
+
+def _accesses(device):
+    return (device.reads + device.writes)
+
+
+def test_same_results_with_fewer_accesses(emulated):
+    (plain, plainDevice) = emulated([MifareClassic(UID)])
+    (cached, cachedDevice) = emulated([MifareClassic(UID)],
+                                      registerCache=True)
+
+    accesses = _accesses(plainDevice)
+    expected = _session(plain)
+    plainAccesses = _accesses(plainDevice) - accesses
+
+    accesses = _accesses(cachedDevice)
+    assert _session(cached) == expected
+    assert expected[-1][0] == MFRC522.MIFARE_OK
+    assert _accesses(cachedDevice) - accesses < plainAccesses
+
+
+def test_redundant_writes_are_skipped(emulated):
+    (reader, device) = emulated([], registerCache=True)
+    reader.antennaOff()
+
+    writes = device.writes
+    reads = device.reads
+    reader.antennaOn()
+    reader.antennaOn()
+    # A single write switches on, TxControlReg is never read
+    assert device.writes == writes + 1
+    assert device.reads == reads
+    assert device.antenna()
+
+
+def test_resync_after_a_change_behind_the_back(emulated):
+    (reader, device) = emulated([], registerCache=True)
+    reader.antennaOn()
+
+    # A reset of the MFRC522 the reader did not see
+    device.write(device.TXCONTROLREG, 0x80)
+    reader.antennaOn()
+    assert not device.antenna()
+
+    reader.resyncRegisterCache()
+    reader.antennaOn()
+    assert device.antenna()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf8 -*-
+"""
+Adaptive pacing of the polls of a reader
+"""
+
+__author__ = "Christoph Pranzl"
+__version__ = "0.0.5"
+__license__ = "GPLv3"
+
+import pytest
+
+import mfrc522_i2c.scheduler
+from mfrc522_i2c import PollScheduler
+from mfrc522_i2c.emulator import MifareClassic
+
+UID = [0xDE, 0xAD, 0xBE, 0xEF]
+
+
+class _Clock:
+    """ Simulated time of the scheduler, polls take scanTime seconds """
+
+    def __init__(self):
+        self.now = 100.0
+        self.scanTime = 0.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return (self.now)
+
+    def sleep(self, delay):
+        self.sleeps.append(delay)
+        self.now = self.now + delay
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(mfrc522_i2c.scheduler, 'time', clock)
+    return (clock)
+
+
+def _timed(reader, clock):
+    """ Lets every scan of the reader take the time of the clock """
+    scan = reader.scan
+
+    def timed():
+        clock.now = clock.now + clock.scanTime
+        return (scan())
+
+    reader.scan = timed
+
+
+def test_backoff(emulated, clock):
+    card = MifareClassic(UID)
+    (reader, device) = emulated([card])
+    scheduler = PollScheduler(reader, idleInterval=0.25,
+                              activeInterval=0.02, decay=2)
+
+    assert scheduler.scan()[0] == reader.MIFARE_OK
+    assert scheduler.interval == 0.02
+    assert scheduler.detections == 1
+
+    # Every empty poll stretches the interval up to the idle interval
+    device.cards.remove(card)
+    intervals = []
+    times = [clock.now]
+    for i in range(6):
+        assert scheduler.scan()[0] != reader.MIFARE_OK
+        intervals.append(scheduler.interval)
+        times.append(clock.now)
+    assert intervals == [0.04, 0.08, 0.16, 0.25, 0.25, 0.25]
+    # Each poll follows the previous one after its interval
+    spacing = [times[i + 1] - times[i] for i in range(6)]
+    assert spacing == pytest.approx([0.02] + intervals[0:5])
+
+    scheduler.wake()
+    assert scheduler.interval == 0.02
+    assert scheduler.polls == 7
+
+
+def test_budget(emulated, clock):
+    (reader, device) = emulated([])
+    _timed(reader, clock)
+    clock.scanTime = 0.05
+    scheduler = PollScheduler(reader, idleInterval=0.25, budget=0.1)
+
+    for i in range(10):
+        scheduler.scan()
+    # A poll of 50 ms may only occupy 10 % of the time
+    assert clock.sleeps == pytest.approx([0.45] * 9)
+    assert scheduler.dutyCycle() < 0.11
+
+
+def test_antenna_off_while_idle(emulated, clock):
+    card = MifareClassic(UID)
+    (reader, device) = emulated([])
+    scheduler = PollScheduler(reader, idleInterval=0.25, antennaOff=True,
+                              settle=0.005)
+
+    scheduler.scan()
+    # Switched off between idle polls
+    assert not device.antenna()
+    assert not scheduler.antenna
+
+    # Switched on settle seconds before the next poll, cards answer again
+    device.cards.append(card)
+    assert scheduler.scan()[0] == reader.MIFARE_OK
+    assert device.antenna()
+    assert clock.sleeps[-2:] == [pytest.approx(0.245),
+                                 pytest.approx(0.005)]
+
+    # Stays on while the interval is short
+    device.cards.remove(card)
+    scheduler.scan()
+    assert device.antenna()
+
+    scheduler.close()
+    assert device.antenna()
+
+
+def test_close_switches_antenna_on(emulated, clock):
+    (reader, device) = emulated([])
+    with PollScheduler(reader, antennaOff=True) as scheduler:
+        scheduler.scan()
+        assert not device.antenna()
+    assert device.antenna()
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+# -*- coding: utf8 -*-
+"""
+Selection of cards with UIDs of 4 and 7 bytes
+"""
+
+__author__ = "Christoph Pranzl"
+__version__ = "0.0.5"
+__license__ = "GPLv3"
+
+from mfrc522_i2c.emulator import MifareClassic, Ultralight
+
+UID = [0x04, 0x01, 0x02, 0x03, 0x04, 0x05, 0x06]
+
+
+def test_select_of_partial_uid(emulated):
+    (reader, device) = emulated([Ultralight(UID)])
+
+    assert reader.scan()[0] == reader.MIFARE_OK
+    (status, frame, backBits) = reader.identify()
+    assert status == reader.MIFARE_OK
+
+    # The frame of the first cascade level holds only a part of the UID
+    (status, backData, backBits) = reader.select(frame)
+    assert status == reader.MIFARE_ERR
+    assert reader.read(0)[0] != reader.MIFARE_OK
+
+
+def test_select_of_complete_uid(emulated):
+    (reader, device) = emulated([Ultralight(UID)])
+
+    assert reader.wakeup()[0] == reader.MIFARE_OK
+    (status, backData, backBits) = reader.select(UID)
+    assert status == reader.MIFARE_OK
+    assert reader.serialNumber == UID
+    assert reader.read(0)[0] == reader.MIFARE_OK
+
+
+def test_anticollision_of_short_uid(emulated):
+    uid = [0x01, 0x02, 0x03, 0x04]
+    (reader, device) = emulated([MifareClassic(uid)])
+
+    assert reader.scan()[0] == reader.MIFARE_OK
+    (status, serialNumber, sak) = reader.anticollision()
+    assert status == reader.MIFARE_OK
+    assert serialNumber == uid
+    assert not sak & 0x04
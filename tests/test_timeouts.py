@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+# -*- coding: utf8 -*-
+"""
+Timeout profiles and their calibration
+"""
+
+__author__ = "Christoph Pranzl"
+__version__ = "0.0.5"
+__license__ = "GPLv3"
+
+from mfrc522_i2c import MFRC522
+from mfrc522_i2c.emulator import MifareClassic
+
+UID = [0xDE, 0xAD, 0xBE, 0xEF]
+
+
+def test_calibration_shortens_requests(emulated):
+    (reader, device) = emulated([MifareClassic(UID)], calibrating=True)
+    for i in range(3):
+        reader.wakeup()
+        reader.anticollision()
+        reader.halt()
+
+    timeouts = reader.calibrate()
+    assert MFRC522.CALIBRATION_MIN <= timeouts['request'] < 0.001
+    assert MFRC522.CALIBRATION_MIN <= timeouts['anticollision'] < 0.001
+
+    # The calibrated timeouts still wait long enough for the card
+    assert reader.wakeup()[0] == reader.MIFARE_OK
+    assert reader.anticollision()[0] == reader.MIFARE_OK
+    assert reader.timerPeriod < 0.001
+
+
+def test_calibration_without_answers(emulated):
+    (reader, device) = emulated([], calibrating=True)
+    reader.scan()
+
+    assert reader.calibrate() == MFRC522.TIMEOUTS
+
+
+
+def test_calibration_keeps_widened_timeouts(emulated):
+    (reader, device) = emulated([MifareClassic(UID)], calibrating=True,
+                                timeouts={'request': 0.01})
+    for i in range(3):
+        assert reader.wakeup()[0] == reader.MIFARE_OK
+        reader.halt()
+
+    # A generous factor exceeds the default but not the configured profile
+    timeouts = reader.calibrate(factor=20)
+    assert MFRC522.TIMEOUTS['request'] < timeouts['request'] <= 0.01
+    assert reader.calibrate(factor=1000)['request'] == 0.01
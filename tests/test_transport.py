@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf8 -*-
+"""
+Block transfers and errors of the bus
+"""
+
+__author__ = "Christoph Pranzl"
+__version__ = "0.0.5"
+__license__ = "GPLv3"
+
+import pytest
+
+from mfrc522_i2c import MFRC522, FakeTransport, I2CDevTransport
+from mfrc522_i2c.emulator import EmulatedI2CDev, EmulatedMFRC522, \
+    EmulatedSMBus, MifareClassic
+
+ADDRESS = 0x28
+UID = [0xDE, 0xAD, 0xBE, 0xEF]
+
+
+class _Glitch(FakeTransport):
+    """ Transport whose next block transfer fails once """
+
+    def __init__(self):
+        super().__init__()
+        self.glitch = False
+        self.blocks = 0
+
+    def readBlock(self, address, register, length):
+        self.blocks = self.blocks + 1
+        if (self.glitch):
+            self.glitch = False
+            raise OSError('Remote I/O error')
+        return (super().readBlock(address, register, length))
+
+
+class _ByteBus(EmulatedSMBus):
+    """ SMBus without I2C block transfers """
+
+    def __getattribute__(self, name):
+        if (name.endswith('i2c_block_data')):
+            raise AttributeError(name)
+        return (super().__getattribute__(name))
+
+
+def test_bus_error_is_raised():
+    transport = _Glitch()
+    transport.attach(ADDRESS, EmulatedMFRC522([MifareClassic(UID)]))
+    reader = MFRC522(transport, ADDRESS)
+
+    transport.glitch = True
+    with pytest.raises(OSError):
+        reader.scan()
+    assert reader.blockTransfer
+
+    # The card answered the request, block transfers are still used for
+    # the rest of the exchange
+    blocks = transport.blocks
+    assert reader.anticollision()[0] == reader.MIFARE_OK
+    assert transport.blocks > blocks
+    reader.close()
+
+
+def test_adapter_without_block_transfers():
+    Bus = _ByteBus()
+    Bus.attach(ADDRESS, EmulatedMFRC522([MifareClassic(UID)]))
+    reader = MFRC522(Bus, ADDRESS)
+
+    assert reader.transport.blockMax == 0
+    assert reader.scan()[0] == reader.MIFARE_OK
+    assert reader.anticollision()[1] == UID
+    reader.close()
+
+
+def test_queued_writes_survive_a_failed_ioctl():
+    bus = EmulatedI2CDev()
+    device = bus.attach(ADDRESS, EmulatedMFRC522())
+    failures = [OSError('Remote I/O error')]
+
+    def ioctl(fd, request, transfer):
+        if (failures):
+            raise failures.pop()
+        return (bus.ioctl(fd, request, transfer))
+
+    transport = I2CDevTransport(fd=0, ioctl=ioctl)
+    transport.write(ADDRESS, 0x24, 0x5A)
+    with pytest.raises(OSError):
+        transport.read(ADDRESS, 0x37)
+    assert device.registers[0x24] == 0
+
+    assert transport.read(ADDRESS, 0x24) == 0x5A
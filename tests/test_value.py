@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf8 -*-
+"""
+Value blocks of MIFARE Classic cards
+"""
+
+__author__ = "Christoph Pranzl"
+__version__ = "0.0.5"
+__license__ = "GPLv3"
+
+import pytest
+
+from mfrc522_i2c.emulator import MifareClassic
+
+UID = [0xDE, 0xAD, 0xBE, 0xEF]
+
+
+@pytest.fixture
+def authenticated(emulated):
+    """ Returns a reader with sector 1 authenticated and its card """
+    card = MifareClassic(UID)
+    (reader, device) = emulated([card])
+    assert reader.scan()[0] == reader.MIFARE_OK
+    assert reader.anticollision()[0] == reader.MIFARE_OK
+    assert reader.authenticate(reader.MIFARE_AUTHKEY1, 7, reader.MIFARE_KEY,
+                               UID)[0] == reader.MIFARE_OK
+    assert reader.format_value_block(4, 100)[0] == reader.MIFARE_OK
+    return ((reader, card))
+
+
+def test_format(authenticated):
+    (reader, card) = authenticated
+    assert reader.read_value(4) == (reader.MIFARE_OK, 100, 4)
+    assert card.memory[4] == ([100, 0, 0, 0, 0x9B, 0xFF, 0xFF, 0xFF] +
+                              [100, 0, 0, 0, 4, 0xFB, 4, 0xFB])
+
+    assert reader.format_value_block(5, -7, address=9)[0] == \
+        reader.MIFARE_OK
+    assert reader.read_value(5) == (reader.MIFARE_OK, -7, 9)
+
+    # Neither the manufacturer block nor a trailer hold values
+    assert reader.format_value_block(0, 1)[0] == reader.MIFARE_ERR
+    assert reader.format_value_block(7, 1)[0] == reader.MIFARE_ERR
+    assert reader.format_value_block(6, 0x80000000)[0] == reader.MIFARE_ERR
+    # Plain data is not a value block
+    assert reader.read_value(6) == (reader.MIFARE_ERR, None, None)
+
+
+def test_increment_decrement_transfer(authenticated):
+    (reader, card) = authenticated
+
+    assert reader.increment(4, 25)[0] == reader.MIFARE_OK
+    # Only the transfer writes the result
+    assert reader.read_value(4)[1] == 100
+    assert reader.transfer(4)[0] == reader.MIFARE_OK
+    assert reader.read_value(4)[1] == 125
+
+    assert reader.decrement(4, 130)[0] == reader.MIFARE_OK
+    assert reader.transfer(5)[0] == reader.MIFARE_OK
+    assert reader.read_value(5) == (reader.MIFARE_OK, -5, 4)
+    assert reader.read_value(4)[1] == 125
+
+    assert reader.increment(4, -1)[0] == reader.MIFARE_ERR
+
+
+def test_restore(authenticated):
+    (reader, card) = authenticated
+
+    assert reader.restore(4)[0] == reader.MIFARE_OK
+    assert reader.transfer(6)[0] == reader.MIFARE_OK
+    assert reader.read_value(6) == (reader.MIFARE_OK, 100, 4)
+
+
+def test_operation_on_plain_data(authenticated):
+    (reader, card) = authenticated
+
+    assert reader.increment(6, 1)[0] == reader.MIFARE_ERR
+
+
+def test_decrement_transfer(authenticated):
+    (reader, card) = authenticated
+
+    assert reader.decrement_transfer(4, 30)[0] == reader.MIFARE_OK
+    assert reader.read_value(4)[1] == 70
+
+    assert reader.decrement_transfer(4, 20, targetAddr=5)[0] == \
+        reader.MIFARE_OK
+    assert reader.read_value(5) == (reader.MIFARE_OK, 50, 4)
+
+
+def test_decrement_transfer_with_key(authenticated):
+    (reader, card) = authenticated
+    assert reader.authenticate(reader.MIFARE_AUTHKEY1, 11, reader.MIFARE_KEY,
+                               UID)[0] == reader.MIFARE_OK
+
+    assert reader.decrement_transfer(4, 1, key=reader.MIFARE_KEY)[0] == \
+        reader.MIFARE_OK
+    assert reader.read_value(4)[1] == 99
+
+
+def test_decrement_transfer_to_another_sector(authenticated):
+    (reader, card) = authenticated
+    memory = [list(block) for block in card.memory]
+
+    for targetAddr in (8, 7, 0):
+        assert reader.decrement_transfer(4, 1, targetAddr=targetAddr)[0] \
+            == reader.MIFARE_ERR
+    assert card.memory == memory
+    # Nothing was sent, the card is still authenticated
+    assert reader.read_value(4) == (reader.MIFARE_OK, 100, 4)